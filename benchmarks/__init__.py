@@ -0,0 +1,5 @@
+"""
+Benchmark suite for the hash -> tree -> proof -> verify pipeline
+
+Run with ``python -m benchmarks.pipeline`` from the repository root.
+"""
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Anchoring Burst Test
+Drives the anchor queue against the fake Solana RPC: roots are enqueued in
+bursts (as a busy builder would) while anchor_queue.py workers drain the
+queue through injected failures, latency, hangs, dropped transactions,
+transactions that land with an error and an outage. One worker is killed
+mid-run and restarted to exercise crash recovery, and the first sends of a
+final root are rejected by preflight or land with an error so the workers
+have to re-sign it.
+
+Fails unless every root ends up anchored or superseded by an anchored newer
+root, no root lands twice, and the account holds the newest root.
+
+Usage:
+    python -m benchmarks.anchor_burst
+    python -m benchmarks.anchor_burst --roots 200 --burst 20 --failure-rate 0.3 --drop-rate 0.3
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_rpc import FakeSolanaRPC
+from benchmarks.pipeline import RESULTS_DIR, SCRIPTS_DIR, _environment
+
+
+def start_worker(roots_dir: Path, rpc_url: str, wallet: Path, idl: Path, log_path: Path) -> subprocess.Popen:
+    """Start an ``anchor_queue.py run`` worker with test-sized timeouts"""
+    return subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / "anchor_queue.py"), "--roots-dir", str(roots_dir), "run",
+         "--rpc-url", rpc_url, "--wallet", str(wallet), "--idl", str(idl), "--rpc-timeout", "0.5",
+         "--confirm-poll", "0.1", "--backoff-base", "0.05", "--backoff-max", "1"],
+        cwd=SCRIPTS_DIR, stdout=subprocess.DEVNULL, stderr=open(log_path, "ab")
+    )
+
+
+def write_identity(work_dir: Path) -> Dict[str, Path]:
+    """Throwaway fee-payer wallet and IDL pointing at a random program address"""
+    from solders.keypair import Keypair
+    from solders.pubkey import Pubkey
+
+    wallet = work_dir / "wallet.json"
+    idl = work_dir / "idl.json"
+    wallet.write_text(json.dumps(list(bytes(Keypair()))))
+    idl.write_text(json.dumps({"address": str(Pubkey.new_unique())}))
+    return {"wallet": wallet, "idl": idl}
+
+
+def check(entries: List[Dict[str, Any]], anchored: Dict[str, int], account_root: Optional[str]) -> Dict[str, Any]:
+    """
+    Outcome of a run from the queue entries and the fake chain
+
+    Returns:
+        Lost roots, roots anchored more than once, broken supersede chains
+        and whether the account holds the newest root
+    """
+    by_root = {e["root"]: e for e in entries}
+    newest = max(entries, key=lambda e: e["generation"])
+    lost = [e["root"] for e in entries if e["status"] not in ("confirmed", "superseded")]
+    broken = []
+    for entry in entries:
+        seen = set()
+        while entry["status"] == "superseded" and entry["root"] not in seen:
+            seen.add(entry["root"])
+            entry = by_root.get(entry["superseded_by"], {"status": "missing", "root": None})
+        if entry["status"] not in ("confirmed", "pending", "sent"):
+            broken.append(entry["root"])
+    return {
+        "lost": lost,
+        "duplicates": {root: n for root, n in anchored.items() if n > 1},
+        "broken_supersede_chains": broken,
+        "account_holds_newest": account_root == newest["root"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the anchoring burst test"""
+    parser = argparse.ArgumentParser(description='Anchor queue burst test against a faulty fake RPC')
+    parser.add_argument('--roots', type=int, default=60, help='Roots to enqueue (default: 60)')
+    parser.add_argument('--burst', type=int, default=10, help='Roots per burst (default: 10)')
+    parser.add_argument('--burst-interval', type=float, default=0.5, help='Seconds between bursts (default: 0.5)')
+    parser.add_argument('--workers', type=int, default=2, help='Concurrent workers (default: 2)')
+    parser.add_argument('--failure-rate', type=float, default=0.2, help='Fraction of failing RPC requests')
+    parser.add_argument('--latency', type=float, default=0.02, help='Mean RPC latency in seconds')
+    parser.add_argument('--hang-rate', type=float, default=0.02, help='Fraction of RPC requests that time out')
+    parser.add_argument('--drop-rate', type=float, default=0.3, help='Fraction of transactions that never land')
+    parser.add_argument('--error-rate', type=float, default=0.1,
+                        help='Fraction of transactions that land with an error')
+    parser.add_argument('--failed-transactions', type=int, default=2,
+                        help='Transactions of the final root that land with an error (default: 2)')
+    parser.add_argument('--rejected-transactions', type=int, default=3,
+                        help='Sends of the final root rejected by preflight (default: 3)')
+    parser.add_argument('--outage', type=float, default=2.0, help='Seconds of total RPC outage mid-run')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds to wait for the queue to drain')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', type=Path,
+                        help='Result file (default: benchmarks/results/anchor_burst_<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from anchor_queue import AnchorQueue
+
+    started = datetime.now()
+    rpc = FakeSolanaRPC(block_time=0.05, blockhash_ttl=30, failure_rate=args.failure_rate, latency=args.latency,
+                        hang_rate=args.hang_rate, hang_seconds=1.0, drop_rate=args.drop_rate,
+                        error_rate=args.error_rate, seed=args.seed)
+    with rpc, tempfile.TemporaryDirectory(prefix="audit-anchor-") as work_dir:
+        work_dir = Path(work_dir)
+        identity = write_identity(work_dir)
+        roots_dir = work_dir / "roots"
+        log_path = work_dir / "workers.log"
+        queue = AnchorQueue(roots_dir)
+        workers = [start_worker(roots_dir, rpc.url, identity["wallet"], identity["idl"], log_path)
+                   for _ in range(args.workers)]
+        enqueued = 0
+        generation = 0
+        final_root = None
+        max_backlog = 0
+        try:
+            bursts = (args.roots + args.burst - 1) // args.burst
+            for burst in range(bursts):
+                for _ in range(min(args.burst, args.roots - enqueued)):
+                    generation += 1
+                    queue.enqueue(os.urandom(32).hex(), generation)
+                    enqueued += 1
+                max_backlog = max(max_backlog, queue.pressure()["backlog"])
+                if burst == bursts // 3:
+                    rpc.outage(args.outage)
+                    print(f"[anchor] RPC down for {args.outage}s", flush=True)
+                if burst == bursts // 2:
+                    # Crash a worker mid-step; its lease expires and the restarted worker resumes
+                    workers[0].send_signal(signal.SIGKILL)
+                    workers[0].wait()
+                    workers[0] = start_worker(roots_dir, rpc.url, identity["wallet"], identity["idl"], log_path)
+                    print("[anchor] Killed and restarted a worker", flush=True)
+                time.sleep(args.burst_interval)
+            if args.failed_transactions or args.rejected_transactions:
+                # The newest root is never superseded: it must be re-signed until one lands cleanly
+                rpc.reject_transactions(args.rejected_transactions)
+                rpc.fail_transactions(args.failed_transactions)
+                generation += 1
+                final_root = os.urandom(32).hex()
+                queue.enqueue(final_root, generation)
+                enqueued += 1
+                print(f"[anchor] Final root: {args.rejected_transactions} sends rejected, "
+                      f"{args.failed_transactions} transactions land with an error", flush=True)
+            last_enqueue = time.monotonic()
+
+            deadline = last_enqueue + args.timeout
+            pressure = queue.pressure()
+            while pressure["backlog"] and time.monotonic() < deadline:
+                time.sleep(0.1)
+                pressure = queue.pressure()
+            drain_seconds = time.monotonic() - last_enqueue
+        finally:
+            for worker in workers:
+                worker.terminate()
+                worker.wait()
+
+        entries = queue.entries(limit=enqueued)
+        # Rejected and failed sends must not pile up in the signatures checked for the final root
+        final_signatures = len(queue.signatures(final_root)) if final_root else 0
+        queue.close()
+        # Let in-flight transactions that were still valid land before judging duplicates
+        time.sleep(rpc.block_time * (rpc.confirm_blocks + 1))
+        result = check(entries, rpc.anchored_roots(), rpc.account_root())
+
+    statuses: Dict[str, int] = {}
+    for entry in entries:
+        statuses[entry["status"]] = statuses.get(entry["status"], 0) + 1
+    passed = (not pressure["backlog"] and not result["lost"] and not result["duplicates"]
+              and not result["broken_supersede_chains"] and result["account_holds_newest"]
+              and rpc.stats["errored"] >= min(args.failed_transactions, 1)
+              and rpc.stats["rejected"] >= min(args.rejected_transactions, 1))
+    report = {
+        "benchmark": "anchor_burst",
+        "started": started.isoformat(),
+        "environment": _environment(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "roots": enqueued,
+        "statuses": statuses,
+        "signed_transactions": sum(e["sends"] for e in entries),
+        "max_backlog": max_backlog,
+        "final_root_signatures": final_signatures,
+        "drain_seconds": round(drain_seconds, 3),
+        "rpc": rpc.stats,
+        **result,
+        "passed": passed,
+    }
+    print(f"[anchor] {enqueued} roots: {statuses}, {report['signed_transactions']} signed transactions, "
+          f"max backlog {max_backlog}, drained {report['drain_seconds']}s after the last burst")
+    print(f"[anchor] RPC: {rpc.stats}")
+    print(f"[anchor] lost {len(result['lost'])}, duplicates {len(result['duplicates'])}, "
+          f"account holds newest root: {result['account_holds_newest']}")
+
+    output = args.output or RESULTS_DIR / f"anchor_burst_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to: {output}")
+    print("✅ No roots lost" if passed else "❌ Anchoring lost or duplicated roots")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Disclosure Rejection Checks
+Builds a small ``--leaf-mode fields`` tree from synthetic exports, produces a
+genuine disclosure and then feeds the verifiers variants that must all be
+rejected: disclosures missing their commitment, path or root, disclosures
+with a tampered value, salt, sibling, commitment, path or root, a forged
+field at a position that is already disclosed, swapped or out-of-range
+positions, a self-consistent forgery that carries its own root, and a
+genuine disclosure checked against the wrong root.
+
+Every case goes through disclosure.verify_disclosure, LogVerifier (which
+defaults to the published root) and the ``disclosure.py verify`` CLI.
+
+Usage:
+    python -m benchmarks.disclosure_checks
+    python -m benchmarks.disclosure_checks --events 500 --index 123
+"""
+
+import argparse
+import copy
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.events import write_exports
+from benchmarks.pipeline import RESULTS_DIR, SCRIPTS_DIR, _environment
+
+REVEALED = ["Id", "Level", "RecordId"]
+
+
+def _flip(hex_digest: str) -> str:
+    """Same-length hex string differing in the last nibble"""
+    return hex_digest[:-1] + ("0" if hex_digest[-1] != "0" else "1")
+
+
+def _forge_self_consistent(genuine: Dict[str, Any]) -> Dict[str, Any]:
+    """Change a revealed value and recompute commitment and root so they agree with it"""
+    from disclosure import commitment_root
+    from tree_snapshot import hash_leaf, path_to_json
+
+    forged = copy.deepcopy(genuine)
+    forged["fields"][0]["value"] = 0
+    commitment = commitment_root(forged)
+    forged["commitment"] = commitment.hex()
+    forged["path"] = path_to_json([])
+    forged["root"] = hash_leaf(commitment, forged["algorithm"]).hex()
+    return forged
+
+
+def _reviewed_forgery(genuine: Dict[str, Any]) -> Dict[str, Any]:
+    """A single made-up field with no commitment, path or root at all"""
+    return {"algorithm": genuine["algorithm"], "field_count": 1,
+            "fields": [{"position": 0, "name": "Level", "value": 4, "salt": "00" * 16}], "siblings": []}
+
+
+def _duplicate_position(genuine: Dict[str, Any]) -> Dict[str, Any]:
+    """A fabricated field placed in front of a genuine one at the same position"""
+    forged = copy.deepcopy(genuine)
+    original = forged["fields"][0]
+    forged["fields"].insert(0, {**original, "name": "LogName", "value": "FORGED-LOG"})
+    return forged
+
+
+def _swapped_names(genuine: Dict[str, Any]) -> Dict[str, Any]:
+    """Two revealed fields whose positions are swapped"""
+    forged = copy.deepcopy(genuine)
+    first, second = forged["fields"][:2]
+    first["position"], second["position"] = second["position"], first["position"]
+    return forged
+
+
+def _without(key: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def mutate(genuine):
+        return {k: v for k, v in genuine.items() if k != key}
+    return mutate
+
+
+def _tampered(mutate: Callable[[Dict[str, Any]], None]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def apply(genuine):
+        result = copy.deepcopy(genuine)
+        mutate(result)
+        return result
+    return apply
+
+
+def cases() -> Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    """Name -> function turning the genuine disclosure into one that must be rejected"""
+    return {
+        "missing_commitment": _without("commitment"),
+        "missing_path": _without("path"),
+        "missing_root": _without("root"),
+        "missing_commitment_path_root": _reviewed_forgery,
+        "duplicate_position_forgery": _duplicate_position,
+        "swapped_positions": _swapped_names,
+        "position_out_of_range": _tampered(lambda d: d["fields"][-1].update(position=d["field_count"])),
+        "tampered_value": _tampered(lambda d: d["fields"][0].update(value=d["fields"][0]["value"] + 1)),
+        "tampered_salt": _tampered(lambda d: d["fields"][0].update(salt=_flip(d["fields"][0]["salt"]))),
+        "tampered_sibling": _tampered(lambda d: d["siblings"].__setitem__(0, _flip(d["siblings"][0]))),
+        "tampered_commitment": _tampered(lambda d: d.update(commitment=_flip(d["commitment"]))),
+        "tampered_path": _tampered(lambda d: d["path"][0].update(digest=_flip(d["path"][0]["digest"]))),
+        "tampered_root": _tampered(lambda d: d.update(root=_flip(d["root"]))),
+        "self_consistent_forgery": _forge_self_consistent,
+        "not_an_object": lambda genuine: [genuine],
+    }
+
+
+def cli_verify(path: Path, logs_dir: Path, root: Optional[str] = None) -> int:
+    """Exit status of ``disclosure.py verify`` for one disclosure file"""
+    command = [sys.executable, str(SCRIPTS_DIR / "disclosure.py"), "verify", str(path), "--logs-dir", str(logs_dir)]
+    if root:
+        command += ["--root", root]
+    return subprocess.run(command, cwd=SCRIPTS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the disclosure rejection checks"""
+    parser = argparse.ArgumentParser(description='Check that forged and tampered disclosures are rejected')
+    parser.add_argument('--events', type=int, default=200, help='Synthetic events to build the tree from (default: 200)')
+    parser.add_argument('--index', type=int, default=57, help='Leaf whose fields are disclosed (default: 57)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', type=Path,
+                        help='Result file (default: benchmarks/results/disclosure_checks_<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import disclosure
+    from verify_log import LogVerifier
+
+    started = datetime.now()
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="audit-disclosure-") as work_dir:
+        logs_dir = Path(work_dir) / "logs"
+        write_exports(logs_dir, args.events, seed=args.seed)
+        build = subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / "hash_and_build_merkle.py"), "--logs-dir", str(logs_dir),
+             "--leaf-mode", "fields"],
+            cwd=SCRIPTS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        if build.returncode:
+            print(f"[disclosure] build failed: {build.stderr.strip()[-500:]}")
+            return 1
+
+        verifier = LogVerifier(logs_dir=str(logs_dir))
+        genuine = verifier.disclose_fields(args.index, REVEALED)
+        published = genuine["root"]
+        wrong_root = _flip(published)
+        disclosure_path = Path(work_dir) / "disclosure.json"
+
+        def run(name: str, disclosed: Any, expected_root: Optional[str], accept: bool):
+            disclosure_path.write_text(json.dumps(disclosed))
+            module = disclosure.verify_disclosure(disclosed, expected_root or published)
+            service = verifier.verify_disclosure(disclosed, expected_root)
+            cli = cli_verify(disclosure_path, logs_dir, expected_root)
+            outcomes = {"module": module[0], "verifier": service["verified"], "cli": cli == 0}
+            results[name] = {"expected": "accept" if accept else "reject", **outcomes,
+                             "reason": service["reason"],
+                             "passed": all(v == accept for v in outcomes.values())}
+
+        run("genuine", genuine, None, True)
+        run("genuine_explicit_root", genuine, published, True)
+        run("wrong_expected_root", genuine, wrong_root, False)
+        for name, mutate in cases().items():
+            run(name, mutate(genuine), None, False)
+
+    passed = all(r["passed"] for r in results.values())
+    report = {
+        "benchmark": "disclosure_checks",
+        "started": started.isoformat(),
+        "environment": _environment(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "cases": results,
+        "passed": passed,
+    }
+    for name, result in results.items():
+        mark = "ok  " if result["passed"] else "FAIL"
+        print(f"  {mark} {name:<30} expected {result['expected']:<6} {result['reason']}")
+
+    output = args.output or RESULTS_DIR / f"disclosure_checks_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to: {output}")
+    print("✅ Only genuine disclosures are accepted" if passed else "❌ A forged or tampered disclosure was accepted")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
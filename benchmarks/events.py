@@ -0,0 +1,142 @@
+"""
+Synthetic Windows event generator
+
+Produces records shaped like ``Get-WinEvent | ConvertTo-Json -Depth 5``
+output so the pipeline can be exercised without a Windows host.
+"""
+
+import json
+import random
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+LOG_NAMES = ["Application", "System", "Security"]
+
+PROVIDERS = {
+    "Application": ["Microsoft-Windows-Security-SPP", "Application Error", "MsiInstaller", "VSS"],
+    "System": ["Service Control Manager", "Microsoft-Windows-Kernel-General", "EventLog", "Microsoft-Windows-Time-Service"],
+    "Security": ["Microsoft-Windows-Security-Auditing"],
+}
+
+LEVELS = {2: "Error", 3: "Warning", 4: "Information"}
+
+MESSAGES = [
+    "The {0} service entered the running state.",
+    "An account was successfully logged on. Subject: {0}",
+    "Special privileges assigned to new logon. Account Name: {0}",
+    "Faulting application name: {0}.exe, version: 10.0.19041.1",
+    "The system time was changed from {0} to {0}.",
+    "Installation completed successfully for product {0}.",
+]
+
+
+def generate_event(rng: random.Random, record_id: int) -> Dict[str, Any]:
+    """
+    Build a single event record
+
+    Args:
+        rng: Random source (seeded for reproducible runs)
+        record_id: Monotonic record id
+
+    Returns:
+        Event dictionary in ConvertTo-Json layout
+    """
+    log_name = rng.choice(LOG_NAMES)
+    provider = rng.choice(PROVIDERS[log_name])
+    level = rng.choice(list(LEVELS))
+    token = uuid.UUID(int=rng.getrandbits(128))
+    created_ms = 1700000000000 + record_id * 1000 + rng.randrange(1000)
+    return {
+        "Id": rng.choice([7036, 4624, 4672, 1000, 4616, 11707]),
+        "Version": rng.choice([0, 1, 2]),
+        "Qualifiers": rng.choice([None, 16384, 32768]),
+        "Level": level,
+        "Task": rng.randrange(0, 13000),
+        "Opcode": rng.choice([0, 1, 2]),
+        "Keywords": rng.choice([-9214364837600034816, 36028797018963968, -9223372036854775808]),
+        "RecordId": record_id,
+        "ProviderName": provider,
+        "ProviderId": str(token),
+        "LogName": log_name,
+        "ProcessId": rng.randrange(4, 65535),
+        "ThreadId": rng.randrange(4, 65535),
+        "MachineName": f"WS-{rng.randrange(1000):03d}.corp.local",
+        "UserId": {"BinaryLength": 12, "AccountDomainSid": None, "Value": "S-1-5-18"},
+        "TimeCreated": f"/Date({created_ms})/",
+        "ActivityId": None,
+        "RelatedActivityId": None,
+        "ContainerLog": log_name,
+        "MatchedQueryIds": [],
+        "Bookmark": {},
+        "LevelDisplayName": LEVELS[level],
+        "OpcodeDisplayName": "Info",
+        "TaskDisplayName": None,
+        "KeywordsDisplayNames": ["Classic"],
+        "Properties": [{"Value": token.hex[:16]}, {"Value": rng.randrange(1 << 16)}],
+        "Message": rng.choice(MESSAGES).format(token.hex[:12]),
+    }
+
+
+def generate_events(count: int, seed: int = 0, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``count`` synthetic events
+
+    Args:
+        count: Number of events to generate
+        seed: Random seed
+        start: First record id
+
+    Returns:
+        Iterator of event dictionaries
+    """
+    rng = random.Random(seed * 1000003 + start)
+    for record_id in range(start, start + count):
+        yield generate_event(rng, record_id)
+
+
+def write_export(path: Path, events: List[Dict[str, Any]]) -> int:
+    """
+    Write events the way collect_logs.ps1 does (indented JSON array, UTF-8 BOM)
+
+    Args:
+        path: Destination file
+        events: Events to write
+
+    Returns:
+        Number of bytes written
+    """
+    payload = json.dumps(events, indent=4)
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write(payload)
+    return path.stat().st_size
+
+
+def write_exports(logs_dir: Path, total: int, events_per_file: int = 100,
+                  seed: int = 0) -> List[Path]:
+    """
+    Populate ``logs_dir`` with synthetic exports totalling ``total`` events
+
+    Args:
+        logs_dir: Directory to write ``*_log_<n>.json`` files into
+        total: Total number of events
+        events_per_file: Events per exported file
+        seed: Random seed
+
+    Returns:
+        List of written file paths
+    """
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    written = 0
+    file_no = 0
+    while written < total:
+        count = min(events_per_file, total - written)
+        events = list(generate_events(count, seed=seed, start=written))
+        log_name = LOG_NAMES[file_no % len(LOG_NAMES)].lower()
+        path = logs_dir / f"{log_name}_log_{file_no:08d}.json"
+        write_export(path, events)
+        paths.append(path)
+        written += count
+        file_no += 1
+    return paths
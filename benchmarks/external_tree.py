@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+External-Memory Tree Benchmark
+Builds a tree snapshot over synthetic leaf digests with the streaming
+SnapshotWriter and checks it against the in-memory path:
+
+* the root must equal MerkleAccumulator's, which needs O(log n) memory and
+  so runs at any scale;
+* up to ``--parity-limit`` leaves, every level must also be byte-identical
+  to build_levels + write_snapshot;
+* sampled audit paths read from the on-disk levels must resolve to the root.
+
+Each build runs in a fresh interpreter so its peak RSS is its own.
+
+Usage:
+    python -m benchmarks.external_tree
+    python -m benchmarks.external_tree --leaves 100M --parity-limit 0 --work-dir /data/tmp
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks.pipeline import RESULTS_DIR, _environment, parse_scale, peak_rss_bytes
+
+# Leaves generated per call; small next to any tree worth streaming
+GENERATE_CHUNK = 1 << 16
+
+
+def synthetic_leaves(count: int, seed: int) -> Iterator[List[bytes]]:
+    """Deterministic leaf digests in chunks (hashes of a seeded counter)"""
+    from tree_snapshot import hash_leaves
+
+    prefix = seed.to_bytes(8, "little")
+    for start in range(0, count, GENERATE_CHUNK):
+        stop = min(count, start + GENERATE_CHUNK)
+        yield hash_leaves(prefix + i.to_bytes(8, "little") for i in range(start, stop))
+
+
+def build_streaming(path: str, count: int, seed: int) -> Dict[str, Any]:
+    """Stream leaves into a SnapshotWriter (runs in a fresh interpreter)"""
+    from tree_snapshot import MerkleAccumulator, SnapshotWriter
+
+    accumulator = MerkleAccumulator()
+    start = time.perf_counter()
+    with SnapshotWriter(Path(path)) as writer:
+        for chunk in synthetic_leaves(count, seed):
+            writer.extend(chunk)
+            for leaf in chunk:
+                accumulator.append(leaf)
+        root = writer.finish()
+    seconds = time.perf_counter() - start
+    rss = peak_rss_bytes()
+    return {
+        "seconds": round(seconds, 3),
+        "leaves_per_sec": round(count / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": round(rss / (1024 * 1024), 1) if rss is not None else None,
+        "root": root.hex(),
+        "accumulator_root": accumulator.root().hex(),
+    }
+
+
+def build_in_memory(path: str, count: int, seed: int) -> Dict[str, Any]:
+    """build_levels + write_snapshot over the same leaves (runs in a fresh interpreter)"""
+    from tree_snapshot import build_levels, write_snapshot
+
+    start = time.perf_counter()
+    leaves = [leaf for chunk in synthetic_leaves(count, seed) for leaf in chunk]
+    levels = build_levels(leaves)
+    write_snapshot(Path(path), levels)
+    seconds = time.perf_counter() - start
+    rss = peak_rss_bytes()
+    return {
+        "seconds": round(seconds, 3),
+        "leaves_per_sec": round(count / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": round(rss / (1024 * 1024), 1) if rss is not None else None,
+        "root": levels[-1][0].hex(),
+    }
+
+
+def levels_identical(path_a: Path, path_b: Path, chunk: int = 1 << 22) -> bool:
+    """Compare every level of two snapshots through their mappings, chunk by chunk"""
+    from tree_snapshot import TreeSnapshot
+
+    with TreeSnapshot(path_a) as a, TreeSnapshot(path_b) as b:
+        if [count for _, count in a.levels] != [count for _, count in b.levels]:
+            return False
+        for level in range(len(a.levels)):
+            view_a, view_b = a.level_view(level), b.level_view(level)
+            try:
+                for start in range(0, len(view_a), chunk):
+                    if view_a[start:start + chunk] != view_b[start:start + chunk]:
+                        return False
+            finally:
+                view_a.release()
+                view_b.release()
+    return True
+
+
+def check_proofs(path: Path, samples: int, seed: int) -> Dict[str, Any]:
+    """Audit paths for random leaves, read from the on-disk levels, must resolve to the root"""
+    from tree_snapshot import TreeSnapshot, verify_audit_path
+
+    rng = random.Random(seed)
+    with TreeSnapshot(path) as snapshot:
+        indices = [rng.randrange(snapshot.size) for _ in range(samples)]
+        root = snapshot.root()
+        start = time.perf_counter()
+        paths = [snapshot.audit_path(i) for i in indices]
+        seconds = time.perf_counter() - start
+        failures = sum(not verify_audit_path(snapshot.leaf(i), p, root) for i, p in zip(indices, paths))
+        depth = max((len(p) for p in paths), default=0)
+    return {
+        "samples": samples,
+        "failures": failures,
+        "siblings_per_proof": depth,
+        "proofs_per_sec": round(samples / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the external-memory tree benchmark"""
+    parser = argparse.ArgumentParser(description='Streaming tree build vs in-memory build, with parity checks')
+    parser.add_argument('--leaves', default='1M', help='Number of leaves (default: 1M)')
+    parser.add_argument('--parity-limit', default='10M',
+                        help='Largest tree to also build in memory for a byte-level comparison (default: 10M)')
+    parser.add_argument('--proof-samples', type=int, default=1000, help='Audit paths to check (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--work-dir', help='Scratch directory parent (default: system temp)')
+    parser.add_argument('--output', type=Path,
+                        help='Result file (default: benchmarks/results/external_tree_<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    count = parse_scale(args.leaves)
+    parity_limit = parse_scale(args.parity_limit)
+    started = datetime.now()
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="audit-external-", dir=args.work_dir) as scratch:
+        streamed_path = Path(scratch) / "streamed.snapshot"
+        in_memory_path = Path(scratch) / "in_memory.snapshot"
+
+        print(f"[external] streaming {count:,} leaves ...", flush=True)
+        with ctx.Pool(1) as pool:
+            streaming = pool.apply(build_streaming, (str(streamed_path), count, args.seed))
+        print(f"[external] streaming: {streaming['seconds']}s, peak RSS {streaming['peak_rss_mb']} MB", flush=True)
+
+        in_memory = None
+        identical = None
+        if count <= parity_limit:
+            print(f"[external] in-memory build of the same {count:,} leaves ...", flush=True)
+            with ctx.Pool(1) as pool:
+                in_memory = pool.apply(build_in_memory, (str(in_memory_path), count, args.seed))
+            print(f"[external] in-memory: {in_memory['seconds']}s, peak RSS {in_memory['peak_rss_mb']} MB",
+                  flush=True)
+            identical = levels_identical(streamed_path, in_memory_path)
+            in_memory_path.unlink()
+
+        proofs = check_proofs(streamed_path, args.proof_samples, args.seed)
+        snapshot_bytes = streamed_path.stat().st_size
+
+    parity = {
+        "accumulator_root": streaming["root"] == streaming["accumulator_root"],
+        "in_memory_root": in_memory["root"] == streaming["root"] if in_memory else None,
+        "levels_identical": identical,
+    }
+    passed = all(v is not False for v in parity.values()) and not proofs["failures"]
+    report = {
+        "benchmark": "external_tree",
+        "started": started.isoformat(),
+        "environment": _environment(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "leaves": count,
+        "snapshot_bytes": snapshot_bytes,
+        "streaming": streaming,
+        "in_memory": in_memory,
+        "parity": parity,
+        "proofs": proofs,
+        "passed": passed,
+    }
+    print(f"[external] parity: {parity}")
+    print(f"[external] proofs: {proofs['samples']} checked, {proofs['failures']} failed, "
+          f"{proofs['siblings_per_proof']} siblings each, {proofs['proofs_per_sec']} /sec")
+
+    output = args.output or RESULTS_DIR / f"external_tree_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to: {output}")
+    print("✅ Streaming build matches the in-memory root" if passed else "❌ Streaming build does not match")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Fake Solana RPC
+In-process JSON-RPC endpoint that speaks just enough of the Solana API for
+submit_root.py and anchor_queue.py (getLatestBlockhash, sendTransaction,
+getSignatureStatuses, getBlockHeight, getAccountInfo), with injectable
+failures, latency, hangs, dropped transactions, preflight rejections,
+transactions that land with an error and outages.
+
+Block height advances with wall-clock time, blockhashes expire after
+``blockhash_ttl`` blocks and a transaction lands ``confirm_blocks`` after it
+is first received, so expiry and resubmission behave like a real cluster.
+Landed transactions update the wallet's root account, and every landing is
+recorded so a test can detect a root anchored twice. A transaction that
+lands with an error reports ``err`` in its signature status and leaves the
+account untouched, like a failed instruction on a real cluster.
+
+Usage:
+    python -m benchmarks.fake_rpc --port 8899 --failure-rate 0.2 --latency 0.05
+    python -m benchmarks.fake_rpc --error-rate 0.5
+"""
+
+import argparse
+import base64
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Anchor discriminator of RootAccount is not checked by the clients; any 8 bytes do
+ACCOUNT_DISCRIMINATOR = bytes(8)
+FINALIZED_DEPTH = 32
+# getSignatureStatuses limit of real nodes
+MAX_SIGNATURE_STATUSES = 256
+# Reported for transactions that land with an error (a failed custom program instruction)
+TRANSACTION_ERROR = {"InstructionError": [0, {"Custom": 6000}]}
+
+
+class RPCError(Exception):
+    """
+    JSON-RPC error returned to the client
+    """
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class FakeSolanaRPC:
+    """
+    Simulated validator behind a threaded HTTP server
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, block_time: float = 0.05,
+                 blockhash_ttl: int = 150, confirm_blocks: int = 2, failure_rate: float = 0.0,
+                 latency: float = 0.0, hang_rate: float = 0.0, hang_seconds: float = 5.0,
+                 drop_rate: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            host, port: Address to listen on (port 0 picks a free port)
+            block_time: Seconds per block
+            blockhash_ttl: Blocks a blockhash stays valid
+            confirm_blocks: Blocks between receiving a transaction and it landing
+            failure_rate: Fraction of requests answered with HTTP 503 or a JSON-RPC error
+            latency: Mean added latency per request in seconds
+            hang_rate: Fraction of requests that stall for ``hang_seconds`` (client timeouts)
+            drop_rate: Fraction of accepted transactions that never land
+            error_rate: Fraction of accepted transactions that land with an error
+            seed: Random seed for fault injection
+        """
+        self.block_time = block_time
+        self.blockhash_ttl = blockhash_ttl
+        self.confirm_blocks = confirm_blocks
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self._fail_next = 0
+        self._reject_next = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._down_until = 0.0
+        self._blockhashes: Dict[str, int] = {}
+        # signature -> transaction record (landing height, root, accounts, applied, error)
+        self._transactions: Dict[str, Dict[str, Any]] = {}
+        self._accounts: Dict[str, bytes] = {}
+        self.landings: List[Tuple[int, str, str]] = []
+        self.stats: Dict[str, int] = {"requests": 0, "injected_failures": 0, "hangs": 0, "sends": 0,
+                                      "dropped": 0, "errored": 0, "rejected": 0,
+                                      "rejected_expired": 0}
+
+        rpc = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, payload = rpc.handle(body)
+                data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out during an injected hang
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSolanaRPC":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def outage(self, seconds: float):
+        """Fail every request for the next ``seconds``"""
+        with self._lock:
+            self._down_until = time.monotonic() + seconds
+
+    def fail_transactions(self, count: int):
+        """Make the next ``count`` accepted transactions land with an error"""
+        with self._lock:
+            self._fail_next = count
+
+    def reject_transactions(self, count: int):
+        """Fail the preflight check of the next ``count`` sendTransaction calls"""
+        with self._lock:
+            self._reject_next = count
+
+    def block_height(self) -> int:
+        return int((time.monotonic() - self._started) / self.block_time)
+
+    # --- request handling ---
+
+    def handle(self, body: bytes) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Answer one JSON-RPC request; returns (HTTP status, payload)"""
+        with self._lock:
+            self.stats["requests"] += 1
+            down = time.monotonic() < self._down_until
+            roll = self._rng.random()
+            hang = self._rng.random() < self.hang_rate
+            delay = self._rng.uniform(0, 2 * self.latency) if self.latency else 0.0
+        if hang:
+            with self._lock:
+                self.stats["hangs"] += 1
+            time.sleep(self.hang_seconds)
+        elif delay:
+            time.sleep(delay)
+
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return 400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+        request_id = request.get("id")
+        if down or roll < self.failure_rate:
+            with self._lock:
+                self.stats["injected_failures"] += 1
+            if down or roll < self.failure_rate / 2:
+                return 503, None
+            return 200, {"jsonrpc": "2.0", "id": request_id,
+                         "error": {"code": -32005, "message": "Node is behind by 42 slots",
+                                   "data": {"numSlotsBehind": 42}}}
+
+        method = request.get("method")
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            return 200, {"jsonrpc": "2.0", "id": request_id,
+                         "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        try:
+            with self._lock:
+                self._apply_landed()
+                result = handler(*request.get("params", []))
+        except RPCError as e:
+            error = {"code": e.code, "message": str(e)}
+            if e.data is not None:
+                error["data"] = e.data
+            return 200, {"jsonrpc": "2.0", "id": request_id, "error": error}
+        return 200, {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def _context(self) -> Dict[str, Any]:
+        return {"apiVersion": "1.18.0", "slot": self.block_height()}
+
+    def _apply_landed(self):
+        """Apply transactions that have landed by now to the root accounts, in landing order"""
+        height = self.block_height()
+        due = sorted((tx["land_height"], signature) for signature, tx in self._transactions.items()
+                     if not tx["applied"] and tx["land_height"] is not None and tx["land_height"] <= height)
+        for land_height, signature in due:
+            tx = self._transactions[signature]
+            tx["applied"] = True
+            if tx["err"] is not None:
+                continue
+            self._accounts[tx["account"]] = (ACCOUNT_DISCRIMINATOR + tx["root"]
+                                             + int(time.time()).to_bytes(8, "little", signed=True) + tx["user"])
+            self.landings.append((land_height, tx["root"].hex(), signature))
+
+    def _rpc_getLatestBlockhash(self, config=None):
+        from solders.hash import Hash
+
+        height = self.block_height()
+        blockhash = str(Hash(self._rng.randbytes(32)))
+        self._blockhashes[blockhash] = height + self.blockhash_ttl
+        return {"context": self._context(),
+                "value": {"blockhash": blockhash, "lastValidBlockHeight": height + self.blockhash_ttl}}
+
+    def _rpc_getBlockHeight(self, config=None):
+        return self.block_height()
+
+    def _rpc_sendTransaction(self, encoded: str, config=None):
+        from solders.transaction import Transaction
+
+        config = config or {}
+        if config.get("encoding", "base58") == "base64":
+            raw = base64.b64decode(encoded)
+        else:
+            raw = _b58decode(encoded)
+        tx = Transaction.from_bytes(raw)
+        signature = str(tx.signatures[0])
+        self.stats["sends"] += 1
+        if self._reject_next and signature not in self._transactions:
+            self._reject_next -= 1
+            self.stats["rejected"] += 1
+            raise RPCError(-32002, "Transaction simulation failed: Attempt to debit an account but found no "
+                                   "record of a prior credit.",
+                           {"err": "AccountNotFound", "logs": [], "accounts": None, "unitsConsumed": 0,
+                            "returnData": None})
+        if signature in self._transactions:
+            # Re-broadcast of a known transaction is idempotent
+            return signature
+
+        message = tx.message
+        last_valid = self._blockhashes.get(str(message.recent_blockhash))
+        height = self.block_height()
+        expired = last_valid is None or height > last_valid
+        if expired and not config.get("skipPreflight"):
+            self.stats["rejected_expired"] += 1
+            raise RPCError(-32002, "Transaction simulation failed: Blockhash not found",
+                           {"err": "BlockhashNotFound", "logs": [], "accounts": None, "unitsConsumed": 0,
+                            "returnData": None})
+
+        instruction = message.instructions[0]
+        keys = message.account_keys
+        land_height = height + self.confirm_blocks
+        if expired or land_height > last_valid or self._rng.random() < self.drop_rate:
+            # Dropped by the leader (or already too old to land): never lands
+            self.stats["dropped"] += 1
+            land_height = None
+        err = None
+        if land_height is not None and (self._fail_next or self._rng.random() < self.error_rate):
+            self._fail_next = max(0, self._fail_next - 1)
+            self.stats["errored"] += 1
+            err = TRANSACTION_ERROR
+        self._transactions[signature] = {
+            "land_height": land_height,
+            "root": bytes(instruction.data[8:40]),
+            "account": str(keys[instruction.accounts[0]]),
+            "user": bytes(keys[instruction.accounts[1]]),
+            "program": str(keys[instruction.program_id_index]),
+            "applied": False,
+            "err": err,
+        }
+        return signature
+
+    def _rpc_getSignatureStatuses(self, signatures: List[str], config=None):
+        if len(signatures) > MAX_SIGNATURE_STATUSES:
+            raise RPCError(-32602, f"Too many inputs provided; max {MAX_SIGNATURE_STATUSES}")
+        height = self.block_height()
+        value = []
+        for signature in signatures:
+            tx = self._transactions.get(signature)
+            if tx is None or tx["land_height"] is None or tx["land_height"] > height:
+                value.append(None)
+                continue
+            depth = height - tx["land_height"]
+            value.append({
+                "slot": tx["land_height"],
+                "confirmations": None if depth >= FINALIZED_DEPTH else depth,
+                "err": tx["err"],
+                "status": {"Ok": None} if tx["err"] is None else {"Err": tx["err"]},
+                "confirmationStatus": "finalized" if depth >= FINALIZED_DEPTH else "confirmed",
+            })
+        return {"context": self._context(), "value": value}
+
+    def _rpc_getAccountInfo(self, address: str, config=None):
+        data = self._accounts.get(address)
+        if data is None:
+            return {"context": self._context(), "value": None}
+        owner = next(tx["program"] for tx in self._transactions.values() if tx["account"] == address)
+        return {"context": self._context(), "value": {
+            "data": [base64.b64encode(data).decode("ascii"), "base64"],
+            "executable": False, "lamports": 1_000_000, "owner": owner, "rentEpoch": 0, "space": len(data),
+        }}
+
+    # --- inspection ---
+
+    def anchored_roots(self) -> Dict[str, int]:
+        """How many times each root has landed"""
+        with self._lock:
+            self._apply_landed()
+            counts: Dict[str, int] = {}
+            for _, root, _ in self.landings:
+                counts[root] = counts.get(root, 0) + 1
+            return counts
+
+    def account_root(self) -> Optional[str]:
+        """Root currently held by the (single) root account"""
+        with self._lock:
+            self._apply_landed()
+            if not self._accounts:
+                return None
+            return next(iter(self._accounts.values()))[8:40].hex()
+
+
+def _b58decode(text: str) -> bytes:
+    """Decode base58 (the default sendTransaction encoding)"""
+    alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    number = 0
+    for char in text:
+        number = number * 58 + alphabet.index(char)
+    raw = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return bytes(len(text) - len(text.lstrip("1"))) + raw
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a fake RPC endpoint until interrupted"""
+    parser = argparse.ArgumentParser(description='Fake Solana JSON-RPC endpoint with fault injection')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--block-time', type=float, default=0.4, help='Seconds per block (default: 0.4)')
+    parser.add_argument('--blockhash-ttl', type=int, default=150, help='Blocks a blockhash stays valid')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean added latency in seconds')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='Fraction of requests that stall')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Fraction of transactions that never land')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of transactions that land with an error')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rpc = FakeSolanaRPC(args.host, args.port, block_time=args.block_time, blockhash_ttl=args.blockhash_ttl,
+                        failure_rate=args.failure_rate, latency=args.latency, hang_rate=args.hang_rate,
+                        drop_rate=args.drop_rate, error_rate=args.error_rate, seed=args.seed)
+    print(f"Fake Solana RPC on {rpc.url}", flush=True)
+    try:
+        rpc._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rpc._server.server_close()
+        print(json.dumps({"stats": rpc.stats, "anchored": rpc.anchored_roots()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
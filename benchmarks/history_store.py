@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Operation History Benchmark
+Fills a throwaway history database with synthetic operations and times what
+the History page does on every rerun: the summary counts, the first page,
+paging deep into the history by keyset, a status-filtered page and loading
+one entry's output. The timings should stay flat as the history grows.
+
+Usage:
+    python -m benchmarks.history_store
+    python -m benchmarks.history_store --operations 1M --page-size 50
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.pipeline import RESULTS_DIR, SCRIPTS_DIR, _environment, parse_scale
+
+
+def timed(fn: Callable, repeat: int) -> float:
+    """Median seconds of ``repeat`` calls"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the history benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark the operation history store')
+    parser.add_argument('--operations', default='100k', help='Operations to record (default: 100k)')
+    parser.add_argument('--output-bytes', type=int, default=2000, help='Captured output per operation (default: 2000)')
+    parser.add_argument('--page-size', type=int, default=20, help='Entries per page (default: 20)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed repetitions per query (default: 20)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', type=Path,
+                        help='Result file (default: benchmarks/results/history_store_<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from history import OperationHistory
+
+    rng = random.Random(args.seed)
+    operations = parse_scale(args.operations)
+    started = datetime.now()
+    with tempfile.TemporaryDirectory(prefix="audit-history-") as work_dir:
+        history = OperationHistory(Path(work_dir) / "history.db")
+        line = "[INFO] Processing security_log_20250101_120000.json: 1000 entries hashed\n"
+        output = (line * (args.output_bytes // len(line) + 1))[:args.output_bytes]
+
+        start = time.perf_counter()
+        now = time.time() - operations
+        for i in range(operations):
+            history.record(f"python scripts/hash_and_build_merkle.py --run {i}", output,
+                           "Failed" if rng.random() < 0.1 else "Success", rng.uniform(0.1, 5.0), now + i)
+        record_seconds = time.perf_counter() - start
+
+        def deep_page():
+            cursor = None
+            for _ in range(50):
+                entries = history.page(before=cursor, limit=args.page_size)
+                cursor = entries[-1]["id"]
+
+        newest = history.page(limit=1)[0]["id"]
+        queries: Dict[str, Callable] = {
+            "totals": lambda: (history.count(), history.count("Success"), history.count("Failed")),
+            "first_page": lambda: history.page(limit=args.page_size),
+            "page_50_by_keyset": deep_page,
+            "failed_page": lambda: history.page("Failed", newest // 2, args.page_size),
+            "load_output": lambda: history.output(rng.randint(1, newest)),
+        }
+        timings = {name: round(timed(fn, args.repeat) * 1000, 3) for name, fn in queries.items()}
+        totals = history.totals()
+        database_bytes = sum(p.stat().st_size for p in Path(work_dir).iterdir())
+        history.close()
+
+    report = {
+        "benchmark": "history_store",
+        "started": started.isoformat(),
+        "environment": _environment(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "operations": operations,
+        "records_per_second": round(operations / record_seconds, 1),
+        "database_bytes": database_bytes,
+        "totals": totals,
+        "query_ms": timings,
+    }
+    print(f"[history] {operations:,} operations recorded at {report['records_per_second']:,.0f}/s, "
+          f"{database_bytes / 1e6:.1f} MB on disk")
+    for name, ms in timings.items():
+        print(f"  {name:<20} {ms:>9.3f} ms")
+
+    output_path = args.output or RESULTS_DIR / f"history_store_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to: {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
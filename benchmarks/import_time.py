@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Import-time Regression Check
+Imports each pipeline script in a fresh interpreter under ``-X importtime``
+and fails if cold start exceeds the budget or a heavy dependency (pymerkle,
+solana, solders, numpy) is pulled in at import time.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 100 --runs 5
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+MODULES = ["verify_log", "hash_and_build_merkle", "submit_root", "verify_service", "bulk_verify",
+           "anchor_queue", "history"]
+HEAVY_MODULES = {"pymerkle", "solana", "solders", "numpy", "streamlit"}
+DEFAULT_BUDGET_MS = 150.0
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """
+    Import ``module`` in a fresh interpreter and parse the importtime report
+
+    Args:
+        module: Module name inside scripts/
+
+    Returns:
+        Cumulative import time of the module and the top-level packages it loaded
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    cumulative_us = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(cumulative)
+    return {"cumulative_ms": (cumulative_us or 0) / 1000.0, "loaded": sorted(loaded)}
+
+
+def check(modules: List[str], budget_ms: float, runs: int) -> Dict[str, Any]:
+    """
+    Measure every module ``runs`` times and compare the best run to the budget
+
+    Returns:
+        Report with per-module timings, heavy imports and an overall verdict
+    """
+    report = {"budget_ms": budget_ms, "modules": {}, "passed": True}
+    for module in modules:
+        samples = [measure_import(module) for _ in range(runs)]
+        best = min(s["cumulative_ms"] for s in samples)
+        heavy = sorted(HEAVY_MODULES.intersection(samples[0]["loaded"]))
+        passed = best <= budget_ms and not heavy
+        report["modules"][module] = {
+            "best_ms": round(best, 3),
+            "runs_ms": [round(s["cumulative_ms"], 3) for s in samples],
+            "heavy_imports": heavy,
+            "passed": passed,
+        }
+        report["passed"] = report["passed"] and passed
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the import-time check"""
+    parser = argparse.ArgumentParser(description='Check cold-start import time of the pipeline scripts')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Maximum cumulative import time per module (default: {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per module; best run counts (default: 3)')
+    parser.add_argument('--modules', default=",".join(MODULES), help='Comma separated modules in scripts/')
+    parser.add_argument('--output', type=Path, help='Write the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = check([m for m in args.modules.split(",") if m], args.budget_ms, args.runs)
+    for module, result in report["modules"].items():
+        status = "✅" if result["passed"] else "❌"
+        heavy = f"  heavy imports: {', '.join(result['heavy_imports'])}" if result["heavy_imports"] else ""
+        print(f"{status} {module:<24} {result['best_ms']:>8.1f} ms (budget {args.budget_ms:.0f} ms){heavy}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Verification Service Load Test
+Builds a tree over synthetic exports, starts a local verify_service.py on a
+free port and drives it with concurrent keep-alive clients, reporting p50/p99
+latency and requests/sec per workload. ``--url`` targets an already running
+instance instead (its logs must contain the files being queried).
+
+Usage:
+    python -m benchmarks.load_test --events 100k --concurrency 64 --duration 10
+    python -m benchmarks.load_test --url http://127.0.0.1:8787 --logs-dir logs
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.events import write_exports
+from benchmarks.pipeline import RESULTS_DIR, SCRIPTS_DIR, _environment, parse_scale
+
+WORKLOADS = ("proof", "verify", "batch")
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of ``samples`` (q in 0..100)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def load_queries(logs_dir: Path, limit: int) -> List[Dict[str, Any]]:
+    """
+    Read up to ``limit`` events from the exports in ``logs_dir`` as verify queries
+
+    Returns:
+        List of ``{"file", "entry", "event"}`` dictionaries
+    """
+    queries = []
+    for path in sorted(logs_dir.glob("*_log_*.json")):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            events = json.load(f)
+        if isinstance(events, dict):
+            events = [events]
+        for entry, event in enumerate(events):
+            queries.append({"file": path.name, "entry": entry, "event": event})
+            if len(queries) >= limit:
+                return queries
+    return queries
+
+
+class Client:
+    """
+    Minimal keep-alive HTTP/1.1 client
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Any = None) -> Tuple[int, bytes]:
+        """Send one request, reconnecting if the server closed the connection"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+        )
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        length = 0
+        keep_alive = True
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.strip().lower() == "close":
+                keep_alive = False
+        payload = await self._reader.readexactly(length) if length else b""
+        if not keep_alive:
+            await self.close()
+        return status, payload
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+
+async def run_load(url: str, queries: List[Dict[str, Any]], workload: str, concurrency: int,
+                   duration: float, batch_size: int, seed: int) -> Dict[str, Any]:
+    """
+    Drive one workload for ``duration`` seconds with ``concurrency`` clients
+
+    Returns:
+        Request count, error count, requests/sec and latency percentiles (ms)
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        rng = random.Random(seed * 7919 + worker_id)
+        client = Client(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                if workload == "proof":
+                    method, path, body = "GET", f"/proof/{rng.randrange(len(queries))}", None
+                elif workload == "verify":
+                    method, path, body = "POST", "/verify", rng.choice(queries)
+                else:
+                    method, path, body = "POST", "/verify/batch", {
+                        "queries": [rng.choice(queries) for _ in range(batch_size)]}
+                start = time.perf_counter()
+                try:
+                    status, payload = await client.request(method, path, body)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+                elif workload != "proof":
+                    result = json.loads(payload)
+                    if result.get("failed") or result.get("verified") is False:
+                        errors += 1
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "workload": workload,
+        "concurrency": concurrency,
+        "batch_size": batch_size if workload == "batch" else None,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies) if latencies else None),
+    }
+
+
+def start_service(logs_dir: Path) -> Tuple[subprocess.Popen, str]:
+    """Start verify_service.py on a free port; returns the process and its URL"""
+    proc = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / "verify_service.py"), "--port", "0", "--no-chain",
+         "--logs-dir", str(logs_dir)],
+        cwd=SCRIPTS_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    for line in proc.stdout:
+        if line.startswith("Serving on "):
+            return proc, line.split()[-1]
+    proc.wait()
+    raise RuntimeError(f"verify_service.py exited with status {proc.returncode} before serving")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the verification service load test"""
+    parser = argparse.ArgumentParser(description='Load test the verification service')
+    parser.add_argument('--events', default='10k', help='Synthetic events to build a tree over (default: 10k)')
+    parser.add_argument('--events-per-file', type=int, default=1000,
+                        help='Events per synthetic export file (default: 1000)')
+    parser.add_argument('--url', help='Existing service to test instead of starting one')
+    parser.add_argument('--logs-dir', type=Path, help='Logs directory of the service given by --url')
+    parser.add_argument('--workloads', default=",".join(WORKLOADS),
+                        help=f'Comma separated workloads from {", ".join(WORKLOADS)} (default: all)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent keep-alive clients (default: 32)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per workload (default: 5)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Queries per batch request (default: 100)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', type=Path,
+                        help='Result file (default: benchmarks/results/load_test_<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    if args.url and not args.logs_dir:
+        parser.error("--url requires --logs-dir")
+    workloads = [w for w in args.workloads.split(",") if w]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"Unknown workloads: {', '.join(sorted(unknown))}")
+
+    started = datetime.now()
+    proc = None
+    with tempfile.TemporaryDirectory(prefix="audit-load-") as work_dir:
+        if args.url:
+            url, logs_dir = args.url, args.logs_dir
+        else:
+            logs_dir = Path(work_dir) / "logs"
+            events = parse_scale(args.events)
+            print(f"[load] Building a tree over {events} events ...", flush=True)
+            write_exports(logs_dir, events, events_per_file=args.events_per_file, seed=args.seed)
+            subprocess.run([sys.executable, str(SCRIPTS_DIR / "hash_and_build_merkle.py"),
+                            "--logs-dir", str(logs_dir)], cwd=SCRIPTS_DIR, check=True,
+                           stdout=subprocess.DEVNULL)
+            proc, url = start_service(logs_dir)
+            print(f"[load] Service running at {url}", flush=True)
+
+        try:
+            queries = load_queries(logs_dir, limit=100_000)
+            if not queries:
+                print(f"[ERROR] No exported events found in {logs_dir}")
+                return 1
+            results = []
+            for workload in workloads:
+                result = asyncio.run(run_load(url, queries, workload, args.concurrency, args.duration,
+                                              args.batch_size, args.seed))
+                results.append(result)
+                print(f"[load] {workload:<7} {result['requests_per_sec']:>10} req/s  "
+                      f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  "
+                      f"errors {result['errors']}", flush=True)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    report = {
+        "benchmark": "load_test",
+        "started": started.isoformat(),
+        "environment": _environment(),
+        "url": args.url,
+        "queries": len(queries),
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"load_test_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to: {output}")
+    return 0 if all(r["errors"] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+Times the builder, proofs, verify_log and the bulk sweep over synthetic
+exports, plus the leaf-hashing and field-commit steps in isolation, and
+writes machine-readable JSON so runs can be compared over time.
+
+Usage:
+    python -m benchmarks.pipeline --scales 1k,100k
+    python -m benchmarks.pipeline --scales 1M,10M --events-per-file 10000
+    python -m benchmarks.pipeline --scales 100k --max-field-overhead 8
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.events import write_exports
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT_DIR / "scripts"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+SCALE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_scale(text: str) -> int:
+    """Parse ``1k`` / ``100k`` / ``1M`` / ``10M`` style event counts"""
+    text = text.strip().lower()
+    if text and text[-1] in SCALE_SUFFIXES:
+        return int(float(text[:-1]) * SCALE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident set size of this process, if available"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    except Exception:
+        pass
+    return None
+
+
+class StageTimer:
+    """
+    Accumulates wall-clock time per named stage
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, seconds: float, items: int = 0):
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "items": 0})
+        stage["seconds"] += seconds
+        stage["items"] += items
+
+    def measure(self, name: str):
+        return _Measure(self, name)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for name, stage in self.stages.items():
+            seconds = stage["seconds"]
+            report[name] = {
+                "seconds": round(seconds, 6),
+                "items": stage["items"],
+                "items_per_sec": round(stage["items"] / seconds, 1) if seconds > 0 else None,
+                "cumulative_peak_rss_mb": stage.get("cumulative_peak_rss_mb"),
+            }
+        return report
+
+
+class _Measure:
+    def __init__(self, timer: StageTimer, name: str):
+        self.timer = timer
+        self.name = name
+        self.items = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start, self.items)
+        # Process peak so far, not this stage's own: later stages inherit it
+        rss = peak_rss_bytes()
+        if rss is not None:
+            self.timer.stages[self.name]["cumulative_peak_rss_mb"] = round(rss / (1024 * 1024), 1)
+        return False
+
+
+def run_scale(events: int, events_per_file: int, proof_samples: int,
+              seed: int, work_dir: Optional[str], parity_limit: int = 1_000_000) -> Dict[str, Any]:
+    """
+    Run the full pipeline once over ``events`` synthetic events
+
+    The build, proof, verification and sweep stages run the real
+    hash_and_build_merkle.build(), TreeSnapshot, LogVerifier and bulk_verify
+    code on the generated exports. The leaf-hashing and field-commit stages
+    time those functions in isolation on the same entries, for the speedup
+    and overhead ratios.
+
+    Args:
+        events: Number of events to generate and process
+        events_per_file: Events per synthetic export file
+        proof_samples: Number of leaves to prove and verify
+        seed: Random seed for the generator and sampling
+        work_dir: Parent directory for the scratch tree (system temp if None)
+        parity_limit: Largest scale that is also built with pymerkle (held
+                      entirely in memory) to check the root against it
+
+    Returns:
+        Result dictionary for this scale
+    """
+    from pymerkle import InmemoryTree as MerkleTree, verify_inclusion
+    from bulk_verify import sweep
+    from disclosure import KEY_SIZE, commit_events
+    from hash_and_build_merkle import build, canonicalize
+    from metrics import get_registry
+    from publish import read_manifest
+    from tree_snapshot import TreeSnapshot, hash_leaves, verify_audit_path
+    from verify_log import LogVerifier
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory(prefix="merkle_bench_", dir=work_dir) as scratch:
+        logs_dir = Path(scratch) / "logs"
+
+        gen_start = time.perf_counter()
+        write_exports(logs_dir, events, events_per_file=events_per_file, seed=seed)
+        generate_seconds = time.perf_counter() - gen_start
+
+        # The builder itself; its stage histogram gives the breakdown
+        registry = get_registry("builder", persist=False)
+        with timer.measure("build") as m, contextlib.redirect_stdout(io.StringIO()) as output:
+            if build(logs_dir, registry):
+                raise RuntimeError(f"Build failed: {output.getvalue().strip()[-500:]}")
+            manifest = read_manifest(logs_dir / "roots")
+            size = m.items = manifest["size"]
+        root = bytes.fromhex(manifest["root"])
+        build_stages = {
+            sample["labels"][0]: round(sample["value"]["sum"], 6)
+            for sample in registry.to_dict()["metrics"]["audit_build_stage_seconds"]["samples"]
+        }
+
+        rng = random.Random(seed)
+        sample = sorted(rng.sample(range(size), min(proof_samples, size)))
+        sampled_events = {}
+        bytes_parsed = 0
+        parity = size <= parity_limit
+        # pymerkle tree: the builder's former leaf path, kept for the speedup
+        # comparison, the root parity check and the pymerkle proof stages
+        tree = MerkleTree(algorithm='sha3_256') if parity else None
+        # Cost of --leaf-mode fields relative to hashing whole events
+        disclosure_key = random.Random(seed).randbytes(KEY_SIZE)
+
+        with TreeSnapshot(logs_dir / "roots" / manifest["snapshot"]) as snapshot:
+            leaf_level = snapshot.level_view(0)
+            for included in manifest["files"]:
+                file_path = logs_dir / included["name"]
+                with open(file_path, "r", encoding="utf-8-sig") as f:
+                    processes = json.load(f)
+                bytes_parsed += file_path.stat().st_size
+                leaf_start = included["leaf_start"]
+                for index in sample:
+                    if leaf_start <= index < leaf_start + len(processes):
+                        sampled_events[index] = processes[index - leaf_start]
+
+                with timer.measure("canonicalize") as m:
+                    encoded = [canonicalize(p) for p in processes]
+                    m.items = len(encoded)
+
+                with timer.measure("leaf_hash") as m:
+                    digests = hash_leaves(encoded)
+                    m.items = len(digests)
+                span = slice(leaf_start * len(root), (leaf_start + len(digests)) * len(root))
+                if b"".join(digests) != leaf_level[span]:
+                    raise RuntimeError(f"Leaf hashing disagrees with the built snapshot for {included['name']}")
+
+                with timer.measure("field_commit") as m:
+                    commit_events(processes, encoded, disclosure_key)
+                    m.items = len(encoded)
+
+                if parity:
+                    # Former builder: pymerkle hashed every leaf and the .hash store hashed it again
+                    with timer.measure("legacy_leaf_hash") as m:
+                        for process_bytes in encoded:
+                            tree.append_entry(process_bytes)
+                        [hashlib.sha3_256(b).digest() for b in encoded]
+                        m.items = len(encoded)
+            del leaf_level
+
+            if parity:
+                if tree.get_state() != root:
+                    raise RuntimeError("The builder does not reproduce the pymerkle root")
+                with timer.measure("proof") as m:
+                    proofs = [tree.prove_inclusion(i + 1) for i in sample]
+                    m.items = len(proofs)
+                with timer.measure("verify_proof") as m:
+                    for index, proof in zip(sample, proofs):
+                        verify_inclusion(tree.get_leaf(index + 1), root, proof)
+                    m.items = len(proofs)
+
+            with timer.measure("snapshot_proof") as m:
+                paths = [snapshot.audit_path(i) for i in sample]
+                m.items = len(paths)
+            with timer.measure("snapshot_verify") as m:
+                failures = sum(
+                    not verify_audit_path(snapshot.leaf(i), path, root)
+                    for i, path in zip(sample, paths)
+                )
+                m.items = len(paths)
+
+        # verify_log.py: inclusion of the sampled exported events, then the whole batch
+        verifier = LogVerifier(logs_dir=str(logs_dir))
+        with timer.measure("verify_inclusion") as m:
+            failures += sum(
+                not verifier.verify_inclusion(i, event=sampled_events[i])["verified"] for i in sample
+            )
+            m.items = len(sample)
+        with timer.measure("verify_batch") as m:
+            batch = verifier.verify_batch("latest", root.hex())
+            m.items = size
+        if failures or not batch["verified"]:
+            raise RuntimeError("The published tree failed to verify its own exports")
+
+        # In-process: the benchmark already runs inside a (daemonic) pool worker
+        with timer.measure("sweep") as m:
+            report = sweep(logs_dir, workers=1)
+            m.items = report["events"]
+        if not report["passed"]:
+            raise RuntimeError("Bulk sweep reported mismatches on untouched logs")
+
+    stages = timer.report()
+    build_seconds = stages["build"]["seconds"]
+    rss = peak_rss_bytes()
+    event_hash_seconds = stages["canonicalize"]["seconds"] + stages["leaf_hash"]["seconds"]
+    leaf_hash_seconds = stages["leaf_hash"]["seconds"]
+    return {
+        "events": events,
+        "events_per_file": events_per_file,
+        "bytes_parsed": bytes_parsed,
+        "generate_seconds": round(generate_seconds, 6),
+        "build_seconds": round(build_seconds, 6),
+        "events_per_sec": round(events / build_seconds, 1) if build_seconds > 0 else None,
+        "peak_rss_mb": round(rss / (1024 * 1024), 1) if rss is not None else None,
+        "root": root.hex(),
+        "pymerkle_parity": parity,
+        "proof_samples": len(sample),
+        "verify_failures": failures,
+        "field_commit_overhead": (round(stages["field_commit"]["seconds"] / event_hash_seconds, 2)
+                                  if event_hash_seconds > 0 else None),
+        "leaf_hash_speedup": (round(stages["legacy_leaf_hash"]["seconds"] / leaf_hash_seconds, 2)
+                              if parity and leaf_hash_seconds > 0 else None),
+        "build_stages": build_stages,
+        "stages": stages,
+    }
+
+
+def _environment() -> Dict[str, Any]:
+    """Describe the machine and code revision the run was taken on"""
+    try:
+        from importlib.metadata import version
+        pymerkle_version = version("pymerkle")
+    except Exception:
+        pymerkle_version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT_DIR,
+            capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "pymerkle": pymerkle_version,
+        "git_commit": commit,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the pipeline benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark the hash -> tree -> proof -> verify pipeline')
+    parser.add_argument('--scales', default='1k,100k',
+                        help='Comma separated event counts, e.g. 1k,100k,1M,10M (default: 1k,100k)')
+    parser.add_argument('--events-per-file', type=int, default=1000,
+                        help='Events per synthetic export file (default: 1000)')
+    parser.add_argument('--proof-samples', type=int, default=1000,
+                        help='Leaves to prove and verify per scale (default: 1000)')
+    parser.add_argument('--parity-limit', type=parse_scale, default='1M',
+                        help='Largest scale also built with pymerkle for the root check and speedup (default: 1M)')
+    parser.add_argument('--max-field-overhead', type=float,
+                        help='Fail if field_commit_overhead (field commitments vs whole-event hashing) exceeds this')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--work-dir', help='Scratch directory parent (default: system temp)')
+    parser.add_argument('--output', type=Path, help='Result file (default: benchmarks/results/pipeline_<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    scales = [parse_scale(s) for s in args.scales.split(',') if s.strip()]
+    started = datetime.now()
+    results = []
+
+    # One fresh interpreter per scale so peak RSS is not inherited
+    ctx = multiprocessing.get_context("spawn")
+    for events in scales:
+        print(f"[bench] {events} events ...", flush=True)
+        with ctx.Pool(1) as pool:
+            result = pool.apply(run_scale, (events, args.events_per_file,
+                                            args.proof_samples, args.seed, args.work_dir,
+                                            args.parity_limit))
+        results.append(result)
+        print(f"[bench] {events} events: {result['events_per_sec']} events/sec, "
+              f"peak RSS {result['peak_rss_mb']} MB", flush=True)
+        for name, stage in result["stages"].items():
+            print(f"    {name:<16} {stage['seconds']:>10.3f}s  {stage['items_per_sec']} /sec")
+        print("    build: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in result["build_stages"].items()))
+        if result["leaf_hash_speedup"] is not None:
+            print(f"    leaf hashing {result['leaf_hash_speedup']}x faster than the former pymerkle + .hash path",
+                  flush=True)
+        print(f"    field commitments cost {result['field_commit_overhead']}x whole-event hashing", flush=True)
+
+    limits = {
+        f"max_field_overhead_{result['events']}": (
+            args.max_field_overhead, result["field_commit_overhead"],
+            args.max_field_overhead is None or (result["field_commit_overhead"] or 0) <= args.max_field_overhead)
+        for result in results
+    }
+    passed = all(ok for _, _, ok in limits.values())
+    report = {
+        "benchmark": "pipeline",
+        "started": started.isoformat(),
+        "environment": _environment(),
+        "results": results,
+        "limits": {name: {"limit": limit, "value": value, "ok": ok} for name, (limit, value, ok) in limits.items()},
+        "passed": passed,
+    }
+
+    output = args.output or RESULTS_DIR / f"pipeline_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to: {output}")
+    print("✅ Pipeline within limits" if passed else "❌ Field commitments exceeded --max-field-overhead")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+End-to-End Replay Harness
+Runs the whole collect -> build -> anchor workflow on any machine, without
+PowerShell or a Solana validator. Recorded exports (``--source``) or
+synthetic Get-WinEvent exports are written into a scratch ``logs/`` at a
+fixed event rate, standing in for collect_logs.ps1. Builds run with
+``hash_and_build_merkle.py --anchor`` whenever new exports have arrived,
+and an ``anchor_queue.py`` worker anchors the published roots against the
+in-process fake JSON-RPC (benchmarks/fake_rpc.py).
+
+Reports sustained events/sec, the publication lag (export written -> first
+published root that covers it) and the anchoring lag (root published ->
+a root of that or a later generation confirmed), and fails if any of them
+crosses the given limits.
+
+Usage:
+    python -m benchmarks.replay --rate 500 --duration 30
+    python -m benchmarks.replay --source recorded_logs/ --rate 2000 --max-publication-lag 10
+    python -m benchmarks.replay --failure-rate 0.2 --latency 0.05 --max-anchor-lag 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.anchor_burst import start_worker, write_identity
+from benchmarks.events import LOG_NAMES, generate_events, write_export
+from benchmarks.fake_rpc import FakeSolanaRPC
+from benchmarks.load_test import percentile
+from benchmarks.pipeline import RESULTS_DIR, SCRIPTS_DIR, _environment
+
+
+class Replayer(threading.Thread):
+    """
+    Writes exports into ``logs_dir`` at ``rate`` events/sec until stopped
+
+    Each file appears atomically (written under a temporary name, then
+    renamed), so a build never reads a half-written export.
+    """
+
+    def __init__(self, logs_dir: Path, rate: float, events_per_file: int, seed: int = 0,
+                 recorded: Optional[List[List[Any]]] = None):
+        super().__init__(daemon=True)
+        self.logs_dir = logs_dir
+        self.rate = rate
+        self.events_per_file = events_per_file
+        self.seed = seed
+        self.recorded = recorded
+        self.written: Dict[str, Dict[str, Any]] = {}
+        self.events = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _next_export(self, file_no: int) -> List[Any]:
+        if self.recorded:
+            return self.recorded[file_no % len(self.recorded)]
+        return list(generate_events(self.events_per_file, seed=self.seed, start=self.events))
+
+    def run(self):
+        start = time.monotonic()
+        file_no = 0
+        while not self._stop_event.is_set():
+            events = self._next_export(file_no)
+            log_name = LOG_NAMES[file_no % len(LOG_NAMES)].lower()
+            path = self.logs_dir / f"{log_name}_log_{file_no:08d}.json"
+            tmp_path = path.with_suffix(".tmp")
+            write_export(tmp_path, events)
+            os.replace(tmp_path, path)
+            self.written[path.name] = {"written": time.time(), "events": len(events)}
+            self.events += len(events)
+            file_no += 1
+            # Pace by events, so recorded files of any size keep the same rate
+            self._stop_event.wait(max(0.0, start + self.events / self.rate - time.monotonic()))
+
+
+def load_recorded(source: Path) -> List[List[Any]]:
+    """Recorded exports (``*.json`` arrays), in name order"""
+    exports = []
+    for path in sorted(source.glob("*.json")):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+        exports.append(data if isinstance(data, list) else [data])
+    if not exports:
+        raise FileNotFoundError(f"No *.json exports in {source}")
+    return exports
+
+
+def run_build(logs_dir: Path) -> Dict[str, Any]:
+    """One ``hash_and_build_merkle.py --anchor`` run and the manifest it published"""
+    from publish import read_manifest
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "hash_and_build_merkle.py"), "--logs-dir", str(logs_dir), "--anchor"],
+        cwd=SCRIPTS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    seconds = time.perf_counter() - start
+    manifest = read_manifest(logs_dir / "roots") if result.returncode == 0 else None
+    return {"returncode": result.returncode, "seconds": seconds, "manifest": manifest,
+            "error": result.stderr.strip()[-500:] if result.returncode else None}
+
+
+def _lag_summary(samples: List[float]) -> Dict[str, Optional[float]]:
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+    return {"p50": rounded(percentile(samples, 50)), "p95": rounded(percentile(samples, 95)),
+            "max": rounded(max(samples) if samples else None), "samples": len(samples)}
+
+
+def analyze(written: Dict[str, Dict[str, Any]], publications: List[Dict[str, Any]],
+            anchored: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Lags per export from the replay log, the published generations and the anchor queue
+
+    Args:
+        written: Export name -> {"written": time, "events": count}
+        publications: Published generations in order ({"generation", "published", "files"})
+        anchored: Confirmed queue entries ({"generation", "confirmed_at"})
+
+    Returns:
+        Publication, anchoring and end-to-end lag summaries and the exports
+        still unpublished or unanchored
+    """
+    first_publication = {}
+    for publication in publications:
+        for name in publication["files"]:
+            first_publication.setdefault(name, publication)
+    confirmations = sorted((entry["generation"], entry["confirmed_at"]) for entry in anchored)
+
+    def anchored_at(generation: int) -> Optional[float]:
+        # A later root covers every earlier export (builds are cumulative)
+        times = [confirmed for g, confirmed in confirmations if g >= generation]
+        return min(times) if times else None
+
+    publication_lags, anchor_lags, end_to_end = [], [], []
+    unpublished, unanchored = [], []
+    for name, info in written.items():
+        publication = first_publication.get(name)
+        if publication is None:
+            unpublished.append(name)
+            continue
+        publication_lags.append(publication["published"] - info["written"])
+        confirmed = anchored_at(publication["generation"])
+        if confirmed is None:
+            unanchored.append(name)
+            continue
+        anchor_lags.append(confirmed - publication["published"])
+        end_to_end.append(confirmed - info["written"])
+    return {
+        "publication_lag_seconds": _lag_summary(publication_lags),
+        "anchor_lag_seconds": _lag_summary(anchor_lags),
+        "end_to_end_lag_seconds": _lag_summary(end_to_end),
+        "unpublished_exports": len(unpublished),
+        "unanchored_exports": len(unanchored),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the end-to-end replay harness"""
+    parser = argparse.ArgumentParser(description='Replay exports through build and anchoring against a fake RPC')
+    parser.add_argument('--source', type=Path, help='Directory of recorded *.json exports (default: synthetic)')
+    parser.add_argument('--rate', type=float, default=500.0, help='Events written per second (default: 500)')
+    parser.add_argument('--events-per-file', type=int, default=100,
+                        help='Events per synthetic export, like collect_logs.ps1 (default: 100)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to replay (default: 30)')
+    parser.add_argument('--drain-timeout', type=float, default=60.0,
+                        help='Seconds to wait for the last export to be published and anchored (default: 60)')
+    parser.add_argument('--block-time', type=float, default=0.4, help='Fake validator seconds per block')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of failing RPC requests')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean RPC latency in seconds')
+    parser.add_argument('--min-events-per-sec', type=float, help='Fail below this sustained throughput')
+    parser.add_argument('--max-publication-lag', type=float, help='Fail if the p95 publication lag exceeds this')
+    parser.add_argument('--max-anchor-lag', type=float, help='Fail if the p95 anchoring lag exceeds this')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--work-dir', help='Scratch directory parent (default: system temp)')
+    parser.add_argument('--output', type=Path,
+                        help='Result file (default: benchmarks/results/replay_<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    from anchor_queue import AnchorQueue
+
+    recorded = load_recorded(args.source) if args.source else None
+    started = datetime.now()
+    rpc = FakeSolanaRPC(block_time=args.block_time, failure_rate=args.failure_rate, latency=args.latency,
+                        seed=args.seed)
+    with rpc, tempfile.TemporaryDirectory(prefix="audit-replay-", dir=args.work_dir) as scratch:
+        scratch = Path(scratch)
+        logs_dir = scratch / "logs"
+        logs_dir.mkdir()
+        identity = write_identity(scratch)
+        worker = start_worker(logs_dir / "roots", rpc.url, identity["wallet"], identity["idl"],
+                              scratch / "worker.log")
+        replayer = Replayer(logs_dir, args.rate, args.events_per_file, args.seed, recorded)
+        builds: List[Dict[str, Any]] = []
+        publications: List[Dict[str, Any]] = []
+        queue = None
+        try:
+            run_start = time.time()
+            replayer.start()
+            print(f"[replay] writing {args.rate:g} events/sec for {args.duration:g}s ...", flush=True)
+            deadline = time.monotonic() + args.duration
+            drain_deadline = deadline + args.drain_timeout
+            while time.monotonic() < drain_deadline:
+                if replayer.is_alive() and time.monotonic() >= deadline:
+                    replayer.stop()
+                    replayer.join()
+                covered = set(publications[-1]["files"]) if publications else set()
+                pending = set(replayer.written) - covered
+                if not pending:
+                    if not replayer.is_alive():
+                        break
+                    time.sleep(0.05)
+                    continue
+                build = run_build(logs_dir)
+                manifest = build.pop("manifest")
+                builds.append({"seconds": round(build["seconds"], 3), "returncode": build["returncode"],
+                               "leaves": manifest["size"] if manifest else None, "error": build["error"]})
+                if manifest and (not publications or manifest["generation"] > publications[-1]["generation"]):
+                    publications.append({
+                        "generation": manifest["generation"],
+                        "published": datetime.fromisoformat(manifest["published"]).timestamp(),
+                        "files": [f["name"] for f in manifest["files"]],
+                        "size": manifest["size"],
+                    })
+                    print(f"[replay] generation {manifest['generation']}: {manifest['size']:,} events "
+                          f"in {build['seconds']:.2f}s", flush=True)
+            replayer.stop()
+            replayer.join()
+
+            # Wait for the newest root to be anchored
+            queue = AnchorQueue(logs_dir / "roots")
+            newest = publications[-1]["generation"] if publications else None
+            while newest is not None and time.monotonic() < drain_deadline:
+                confirmed = [e for e in queue.entries(limit=len(publications) + 1) if e["status"] == "confirmed"]
+                if any(e["generation"] >= newest for e in confirmed):
+                    break
+                time.sleep(0.1)
+            anchored = [e for e in queue.entries(limit=len(publications) + 1) if e["status"] == "confirmed"]
+        finally:
+            replayer.stop()
+            worker.terminate()
+            worker.wait()
+            if queue is not None:
+                queue.close()
+
+    lags = analyze(replayer.written, publications, anchored)
+    last = publications[-1] if publications else None
+    published_events = last["size"] if last else 0
+    sustained = published_events / (last["published"] - run_start) if last else 0.0
+    build_rates = [b["leaves"] / b["seconds"] for b in builds if b["leaves"] and b["seconds"] > 0]
+    limits = {
+        "min_events_per_sec": (args.min_events_per_sec, sustained,
+                               args.min_events_per_sec is None or sustained >= args.min_events_per_sec),
+        "max_publication_lag": (args.max_publication_lag, lags["publication_lag_seconds"]["p95"],
+                                args.max_publication_lag is None or
+                                (lags["publication_lag_seconds"]["p95"] or 0) <= args.max_publication_lag),
+        "max_anchor_lag": (args.max_anchor_lag, lags["anchor_lag_seconds"]["p95"],
+                           args.max_anchor_lag is None or
+                           (lags["anchor_lag_seconds"]["p95"] or 0) <= args.max_anchor_lag),
+    }
+    failed_builds = sum(1 for b in builds if b["returncode"])
+    passed = (all(ok for _, _, ok in limits.values()) and not failed_builds
+              and not lags["unpublished_exports"] and not lags["unanchored_exports"])
+    report = {
+        "benchmark": "replay",
+        "started": started.isoformat(),
+        "environment": _environment(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "events_written": replayer.events,
+        "exports_written": len(replayer.written),
+        "events_published": published_events,
+        "sustained_events_per_sec": round(sustained, 1),
+        "builds": len(builds),
+        "failed_builds": failed_builds,
+        "last_build_events_per_sec": round(build_rates[-1], 1) if build_rates else None,
+        "build_seconds": [b["seconds"] for b in builds],
+        "generations_anchored": len(anchored),
+        **lags,
+        "rpc": rpc.stats,
+        "limits": {name: {"limit": limit, "value": value, "ok": ok} for name, (limit, value, ok) in limits.items()},
+        "passed": passed,
+    }
+    print(f"[replay] {replayer.events:,} events in {len(replayer.written)} exports, {len(builds)} builds "
+          f"({failed_builds} failed), {len(anchored)} roots anchored")
+    print(f"[replay] sustained {sustained:,.0f} events/sec; last build {report['last_build_events_per_sec']} events/sec")
+    for name in ("publication_lag_seconds", "anchor_lag_seconds", "end_to_end_lag_seconds"):
+        summary = lags[name]
+        print(f"  {name:<24} p50 {summary['p50']}s  p95 {summary['p95']}s  max {summary['max']}s")
+    if failed_builds:
+        print(f"[replay] last build error: {next(b['error'] for b in reversed(builds) if b['returncode'])}")
+
+    output = args.output or RESULTS_DIR / f"replay_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to: {output}")
+    print("✅ Pipeline kept up" if passed else "❌ Pipeline fell behind or failed (see limits and lags)")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+"""
+Anchor Queue Module
+Durable queue of Merkle roots waiting to be anchored on Solana. Roots are
+recorded in a SQLite database in WAL mode next to the manifest
+(``logs/roots/anchor_queue.db``), so a slow or unreachable validator delays
+anchoring instead of losing the root, and a worker drains the queue with
+exponential backoff.
+
+Every signed transaction is recorded before it is sent, and a root counts as
+anchored once any of its signatures reaches ``confirmed``. A retry after a
+timeout or a crash therefore never anchors the same root twice. An
+unconfirmed transaction is re-broadcast unchanged while its blockhash is
+valid, and re-signed with a fresh blockhash once that has expired.
+Signatures that were rejected, landed with an error or expired unseen can
+never confirm and are dropped, so the set checked per root stays small.
+
+The program keeps one root per wallet and every build covers all exports, so
+the newest root goes first: queued roots of older generations that were
+never sent are marked ``superseded`` by it. ``pressure()`` summarizes the
+backlog for the builder.
+
+Usage:
+    python scripts/anchor_queue.py enqueue
+    python scripts/anchor_queue.py run
+    python scripts/anchor_queue.py run --until-idle
+    python scripts/anchor_queue.py status
+"""
+
+import argparse
+import json
+import logging
+import random
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import Registry, get_registry
+import profiling
+from publish import ROOTS_DIR, read_manifest
+from submit_root import IDL_PATH, RPC_URL, WALLET_PATH, load_program_id, load_wallet, sign_root_transaction
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "anchor_queue.db"
+# Backlog states are pending (waiting to be signed) and sent (a transaction may still land)
+TERMINAL = ("confirmed", "superseded")
+
+# Retry delay after a failed RPC call: BACKOFF_BASE * 2^(failures - 1), capped, with jitter
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 300.0
+# Seconds between status checks of an in-flight transaction (a few slots)
+CONFIRM_POLL = 1.0
+# Most signatures getSignatureStatuses accepts per call
+MAX_SIGNATURE_STATUSES = 256
+# Backpressure thresholds reported to the builder
+STALL_FAILURES = 5
+STALL_SECONDS = 600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    root TEXT PRIMARY KEY,
+    generation INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    tx BLOB,
+    signature TEXT,
+    last_valid_block_height INTEGER,
+    sends INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt REAL NOT NULL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    confirmed_at REAL,
+    confirmed_slot INTEGER,
+    superseded_by TEXT
+);
+CREATE INDEX IF NOT EXISTS roots_due ON roots (status, next_attempt);
+CREATE TABLE IF NOT EXISTS signatures (
+    signature TEXT PRIMARY KEY,
+    root TEXT NOT NULL REFERENCES roots (root),
+    last_valid_block_height INTEGER NOT NULL,
+    sent_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signatures_root ON signatures (root);
+"""
+
+
+def backoff_delay(failures: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Delay before the next attempt after ``failures`` consecutive failures (equal jitter)"""
+    delay = min(cap, base * 2 ** min(max(failures - 1, 0), 32))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AnchorQueue:
+    """
+    Durable queue of roots to anchor, shared by the builder, submitters and workers
+    """
+
+    def __init__(self, roots_dir: Path = ROOTS_DIR):
+        self.roots_dir = Path(roots_dir)
+        self.roots_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.roots_dir / QUEUE_NAME
+        # Autocommit; writes use explicit BEGIN IMMEDIATE transactions
+        self._db = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def enqueue(self, root: str, generation: Optional[int] = None, now: float = None) -> str:
+        """
+        Queue ``root`` for anchoring unless it is already queued or anchored
+
+        Roots of older generations that are queued but have no transaction in
+        flight are superseded by it.
+
+        Args:
+            root: Hex Merkle root
+            generation: Manifest generation the root was published as, if known
+
+        Returns:
+            Status of the root after the call
+        """
+        root = bytes.fromhex(root).hex()
+        if len(root) != 64:
+            raise ValueError(f"Expected a 32-byte hex root, got {len(root) // 2} bytes")
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            row = db.execute("SELECT status, generation FROM roots WHERE root = ?", (root,)).fetchone()
+            if row is None:
+                db.execute("INSERT INTO roots (root, generation, next_attempt, enqueued_at, updated_at) "
+                           "VALUES (?, ?, ?, ?, ?)", (root, generation, now, now, now))
+                status = "pending"
+            else:
+                status = row["status"]
+                if generation is not None and (row["generation"] is None or generation > row["generation"]):
+                    # The same root rebuilt as a newer generation
+                    db.execute("UPDATE roots SET generation = ? WHERE root = ?", (generation, root))
+                if status in TERMINAL:
+                    return status
+            if generation is not None:
+                self._supersede_older(db, root, generation, now)
+        return status
+
+    def _supersede_older(self, db: sqlite3.Connection, root: str, generation: int, now: float):
+        db.execute("UPDATE roots SET status = 'superseded', superseded_by = ?, updated_at = ? "
+                   "WHERE status = 'pending' AND generation < ?", (root, now, generation))
+
+    def claim(self, lease: float, now: float = None) -> Optional[sqlite3.Row]:
+        """
+        Lease the most urgent root that is due: newest generation first
+
+        Args:
+            lease: Seconds before another worker may take the root over
+                   (longer than one step, so only a dead worker loses it)
+
+        Returns:
+            The root's row, or None if nothing is due
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT * FROM roots WHERE status IN ('pending', 'sent') AND next_attempt <= ? "
+                "AND lease_until <= ? ORDER BY generation DESC, enqueued_at DESC LIMIT 1", (now, now)
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE roots SET lease_until = ? WHERE root = ?", (now + lease, row["root"]))
+        return row
+
+    def signatures(self, root: str) -> List[Tuple[str, int]]:
+        """Every signature still tracked for ``root`` with its last valid block height, oldest first"""
+        return [(r[0], r[1]) for r in self._db.execute(
+            "SELECT signature, last_valid_block_height FROM signatures WHERE root = ? ORDER BY sent_at", (root,))]
+
+    def record_send(self, root: str, tx: bytes, signature: str, last_valid_block_height: int, now: float = None):
+        """Record a signed transaction; called before it is sent"""
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            db.execute("UPDATE roots SET status = 'sent', tx = ?, signature = ?, last_valid_block_height = ?, "
+                       "sends = sends + 1, updated_at = ? WHERE root = ?",
+                       (tx, signature, last_valid_block_height, now, root))
+            db.execute("INSERT OR IGNORE INTO signatures (signature, root, last_valid_block_height, sent_at) "
+                       "VALUES (?, ?, ?, ?)", (signature, root, last_valid_block_height, now))
+
+    def forget_signatures(self, signatures: List[str]):
+        """Stop checking signatures that can no longer confirm (failed or expired unseen)"""
+        with self._transaction() as db:
+            db.executemany("DELETE FROM signatures WHERE signature = ?", [(s,) for s in signatures])
+
+    def retry_later(self, root: str, delay: float, now: float = None):
+        """Release the lease and check ``root`` again after ``delay`` seconds"""
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            db.execute("UPDATE roots SET next_attempt = ?, lease_until = 0, failures = 0, updated_at = ? "
+                       "WHERE root = ?", (now + delay, now, root))
+
+    def record_failure(self, root: str, error: str, drop_tx: bool = False, base: float = BACKOFF_BASE,
+                       cap: float = BACKOFF_MAX, now: float = None, failed_signature: str = None) -> float:
+        """
+        Back off after a failed attempt
+
+        Args:
+            root: Root whose attempt failed
+            error: Error message to keep for ``status``
+            drop_tx: The transaction cannot land (rejected or failed); sign a new one next time
+            failed_signature: Signature that landed with an error; it can never
+                              confirm, so it is no longer checked
+
+        Returns:
+            Seconds until the next attempt
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            failures = db.execute("SELECT failures FROM roots WHERE root = ?", (root,)).fetchone()[0] + 1
+            delay = backoff_delay(failures, base, cap)
+            db.execute("UPDATE roots SET failures = ?, last_error = ?, next_attempt = ?, lease_until = 0, "
+                       "updated_at = ? WHERE root = ?", (failures, error, now + delay, now, root))
+            if drop_tx:
+                db.execute("UPDATE roots SET status = 'pending', tx = NULL, signature = NULL WHERE root = ?", (root,))
+            if failed_signature is not None:
+                db.execute("DELETE FROM signatures WHERE signature = ?", (failed_signature,))
+        return delay
+
+    def expire(self, root: str, now: float = None):
+        """The in-flight transaction's blockhash has expired; it can no longer land"""
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            db.execute("UPDATE roots SET status = 'pending', tx = NULL, updated_at = ? WHERE root = ?", (now, root))
+
+    def supersede(self, root: str, now: float = None) -> Optional[str]:
+        """
+        Retire ``root`` in favour of the newest queued or anchored root
+
+        Returns:
+            The superseding root, or None if there is no newer one
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            newer = db.execute(
+                "SELECT r.root FROM roots r JOIN roots o ON o.root = ? WHERE r.generation > o.generation "
+                "AND r.status IN ('pending', 'sent', 'confirmed') ORDER BY r.generation DESC LIMIT 1", (root,)
+            ).fetchone()
+            if newer is None:
+                return None
+            db.execute("UPDATE roots SET status = 'superseded', superseded_by = ?, tx = NULL, lease_until = 0, "
+                       "updated_at = ? WHERE root = ?", (newer[0], now, root))
+        return newer[0]
+
+    def confirm(self, root: str, signature: str, slot: int, now: float = None) -> Optional[str]:
+        """
+        Mark ``root`` as anchored by ``signature`` at ``slot``
+
+        An older root that lands after a newer one has overwritten it in the
+        program's account, so the newer root is queued again.
+
+        Returns:
+            The re-queued newer root, if any
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as db:
+            db.execute("UPDATE roots SET status = 'confirmed', signature = ?, tx = NULL, confirmed_at = ?, "
+                       "confirmed_slot = ?, failures = 0, last_error = NULL, lease_until = 0, updated_at = ? "
+                       "WHERE root = ?", (signature, now, slot, now, root))
+            generation = db.execute("SELECT generation FROM roots WHERE root = ?", (root,)).fetchone()[0]
+            if generation is None:
+                return None
+            self._supersede_older(db, root, generation, now)
+            newer = db.execute(
+                "SELECT root, confirmed_slot FROM roots WHERE status = 'confirmed' AND generation > ? "
+                "ORDER BY generation DESC LIMIT 1", (generation,)
+            ).fetchone()
+            if newer is None or newer["confirmed_slot"] is None or newer["confirmed_slot"] > slot:
+                return None
+            # Its old signatures are confirmed too; forget them so it is sent again
+            db.execute("DELETE FROM signatures WHERE root = ?", (newer["root"],))
+            db.execute("UPDATE roots SET status = 'pending', signature = NULL, confirmed_at = NULL, "
+                       "confirmed_slot = NULL, next_attempt = ?, updated_at = ? WHERE root = ?",
+                       (now, now, newer["root"]))
+        return newer["root"]
+
+    def get(self, root: str) -> Optional[Dict[str, Any]]:
+        """Queue entry for ``root``"""
+        row = self._db.execute("SELECT * FROM roots WHERE root = ?", (root,)).fetchone()
+        return _entry(row) if row is not None else None
+
+    def entries(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recently enqueued entries, newest first"""
+        rows = self._db.execute("SELECT * FROM roots ORDER BY enqueued_at DESC LIMIT ?", (limit,))
+        return [_entry(row) for row in rows]
+
+    def next_due(self) -> Optional[float]:
+        """Wall-clock time the next backlog entry becomes due"""
+        row = self._db.execute("SELECT MIN(MAX(next_attempt, lease_until)) FROM roots "
+                               "WHERE status IN ('pending', 'sent')").fetchone()
+        return row[0]
+
+    def pressure(self, now: float = None) -> Dict[str, Any]:
+        """
+        Backpressure signal for producers of roots
+
+        Returns:
+            Dictionary with the backlog size, roots in flight, age of the
+            oldest unanchored root, the longest run of consecutive failures,
+            the last anchored root and a ``level``: ``idle``, ``busy`` or
+            ``stalled``
+        """
+        now = time.time() if now is None else now
+        backlog, in_flight, oldest, failures = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(status = 'sent'), 0), MIN(enqueued_at), COALESCE(MAX(failures), 0) "
+            "FROM roots WHERE status IN ('pending', 'sent')"
+        ).fetchone()
+        last = self._db.execute("SELECT root, generation, signature, confirmed_at FROM roots "
+                                "WHERE status = 'confirmed' ORDER BY confirmed_at DESC LIMIT 1").fetchone()
+        oldest_seconds = now - oldest if oldest is not None else 0.0
+        if not backlog:
+            level = "idle"
+        elif failures >= STALL_FAILURES or oldest_seconds >= STALL_SECONDS:
+            level = "stalled"
+        else:
+            level = "busy"
+        return {
+            "backlog": backlog,
+            "in_flight": in_flight,
+            "oldest_seconds": round(oldest_seconds, 3),
+            "failures": failures,
+            "level": level,
+            "last_confirmed": dict(last) if last is not None else None,
+        }
+
+    def wait_for_capacity(self, timeout: float, poll: float = 1.0) -> Dict[str, Any]:
+        """
+        Block until anchoring is no longer stalled, for at most ``timeout`` seconds
+
+        Returns:
+            The last pressure reading
+        """
+        deadline = time.monotonic() + timeout
+        pressure = self.pressure()
+        while pressure["level"] == "stalled" and time.monotonic() < deadline:
+            time.sleep(min(poll, max(0.0, deadline - time.monotonic())))
+            pressure = self.pressure()
+        return pressure
+
+
+def _entry(row: sqlite3.Row) -> Dict[str, Any]:
+    entry = dict(row)
+    entry.pop("tx", None)
+    return entry
+
+
+class Anchorer:
+    """
+    Drains an AnchorQueue against a Solana RPC endpoint
+    """
+
+    def __init__(self, queue: AnchorQueue, rpc_url: str = RPC_URL, wallet_path: Path = WALLET_PATH,
+                 idl_path: Path = IDL_PATH, registry: Registry = None, rpc_timeout: float = 10.0,
+                 confirm_poll: float = CONFIRM_POLL, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX):
+        """
+        Args:
+            queue: Queue to drain
+            rpc_url: Solana JSON-RPC endpoint
+            wallet_path: Fee-payer wallet file
+            idl_path: Anchor IDL of the audit program
+            registry: Metrics registry (in-memory only if not provided)
+            rpc_timeout: Seconds before an RPC call counts as failed
+            confirm_poll: Seconds between status checks of an in-flight transaction
+            backoff_base, backoff_max: Exponential backoff after failures
+        """
+        from solana.rpc.api import Client
+
+        self.queue = queue
+        self.client = Client(rpc_url, timeout=rpc_timeout)
+        self.wallet = load_wallet(wallet_path)
+        self.program_id = load_program_id(idl_path)
+        self.confirm_poll = confirm_poll
+        # A step makes a few RPC calls; pruning keeps the status check to one call
+        self.lease = 5 * rpc_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        registry = registry or get_registry("submitter", persist=False)
+        self._rpc_latency = registry.histogram("audit_rpc_latency_seconds", "Solana RPC call latency", ("method",))
+        self._submissions = registry.counter("audit_submissions_total", "Merkle root submissions by outcome",
+                                             ("status",))
+        self._backlog = registry.gauge("audit_anchor_backlog", "Roots queued but not yet anchored")
+        self._oldest = registry.gauge("audit_anchor_oldest_seconds", "Age of the oldest unanchored root")
+
+    def _rpc(self, method: str, func, *args, **kwargs):
+        with self._rpc_latency.labels(method=method).time():
+            return func(*args, **kwargs)
+
+    def step(self) -> bool:
+        """
+        Move the most urgent due root one step towards confirmation
+
+        Returns:
+            False if no root was due
+        """
+        row = self.queue.claim(self.lease)
+        if row is None:
+            return False
+        try:
+            outcome = self._advance(row)
+        except Exception as e:
+            # Transport errors and timeouts: an in-flight transaction may still land
+            outcome = self._fail(row["root"], e)
+        if outcome:
+            self._submissions.labels(status=outcome).inc()
+        return True
+
+    def _fail(self, root: str, error: Exception, drop_tx: bool = False, failed_signature: str = None) -> str:
+        message = f"{type(error).__name__}: {str(error) or repr(error.__cause__)}"
+        delay = self.queue.record_failure(root, message, drop_tx, self.backoff_base, self.backoff_max,
+                                          failed_signature=failed_signature)
+        logger.warning(f"Anchoring {root[:16]}... failed ({message}); retrying in {delay:.1f}s")
+        return "failed"
+
+    def _advance(self, row: sqlite3.Row) -> Optional[str]:
+        """One state transition for ``row``; returns the outcome to count, if any"""
+        from solana.rpc.core import RPCException
+        from solana.rpc.types import TxOpts
+        from solders.signature import Signature
+        from solders.transaction_status import TransactionConfirmationStatus
+
+        confirmed = (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized)
+
+        root = row["root"]
+        height = None
+        # 1. Did any transaction sent for this root land? (dedup across retries and restarts)
+        signatures = self.queue.signatures(root)
+        if signatures:
+            # Read the height first: a signature still unseen afterwards whose
+            # blockhash had already expired at that height can never land
+            height = self._rpc("getBlockHeight", self.client.get_block_height).value
+            statuses = []
+            for start in range(0, len(signatures), MAX_SIGNATURE_STATUSES):
+                chunk = signatures[start:start + MAX_SIGNATURE_STATUSES]
+                statuses += self._rpc("getSignatureStatuses", self.client.get_signature_statuses,
+                                      [Signature.from_string(s) for s, _ in chunk],
+                                      search_transaction_history=True).value
+            landed = False
+            dead = []
+            for (signature, last_valid), status in zip(signatures, statuses):
+                if status is None:
+                    if height > last_valid:
+                        dead.append(signature)
+                    continue
+                if status.err is not None:
+                    # Landed but failed: it can never confirm, so stop checking it
+                    if signature == row["signature"]:
+                        return self._fail(root, RuntimeError(f"Transaction {signature} failed: {status.err}"),
+                                          drop_tx=True, failed_signature=signature)
+                    dead.append(signature)
+                    continue
+                if status.confirmation_status in confirmed:
+                    requeued = self.queue.confirm(root, signature, status.slot)
+                    logger.info(f"Root {root[:16]}... confirmed in slot {status.slot} ({signature})")
+                    if requeued:
+                        logger.warning(f"Root {root[:16]}... landed after newer root {requeued[:16]}...; "
+                                       f"re-queued the newer root")
+                    return "confirmed"
+                landed = True
+            if dead:
+                self.queue.forget_signatures(dead)
+            if landed:
+                # Processed but not yet confirmed
+                self.queue.retry_later(root, self.confirm_poll)
+                return None
+
+        # 2. A transaction is in flight: re-broadcast it until its blockhash expires
+        if row["tx"] is not None:
+            if height is None:
+                height = self._rpc("getBlockHeight", self.client.get_block_height).value
+            if height <= row["last_valid_block_height"]:
+                self._rpc("sendTransaction", self.client.send_raw_transaction, row["tx"],
+                          TxOpts(skip_preflight=True))
+                self.queue.retry_later(root, self.confirm_poll)
+                return "rebroadcast"
+            self._submissions.labels(status="expired").inc()
+            newer = self.queue.supersede(root)
+            if newer:
+                logger.info(f"Root {root[:16]}... expired unconfirmed; superseded by {newer[:16]}...")
+                return "superseded"
+            self.queue.expire(root)
+
+        # 3. Sign with a fresh blockhash, record, then send
+        blockhash = self._rpc("getLatestBlockhash", self.client.get_latest_blockhash).value
+        transaction = sign_root_transaction(self.wallet, self.program_id, bytes.fromhex(root), blockhash.blockhash)
+        signature = str(transaction.signatures[0])
+        # Recorded first: after a crash or timeout the signature status tells whether it landed
+        self.queue.record_send(root, bytes(transaction), signature, blockhash.last_valid_block_height)
+        try:
+            self._rpc("sendTransaction", self.client.send_raw_transaction, bytes(transaction))
+        except RPCException as e:
+            # Rejected by the node (preflight, unhealthy): never forwarded, sign again next time
+            return self._fail(root, e, drop_tx=True, failed_signature=signature)
+        self.queue.retry_later(root, self.confirm_poll)
+        logger.info(f"Sent root {root[:16]}... ({signature}), valid until block {blockhash.last_valid_block_height}")
+        return "sent"
+
+    def update_gauges(self) -> Dict[str, Any]:
+        pressure = self.queue.pressure()
+        self._backlog.set(pressure["backlog"])
+        self._oldest.set(pressure["oldest_seconds"])
+        return pressure
+
+    def run(self, root: str = None, until_idle: bool = False, timeout: float = None,
+            idle_poll: float = 1.0) -> Dict[str, Any]:
+        """
+        Drain the queue
+
+        Args:
+            root: Stop once this root is confirmed or superseded
+            until_idle: Stop once the backlog is empty
+            timeout: Stop after this many seconds
+            idle_poll: Longest sleep while nothing is due (new roots may arrive)
+
+        Returns:
+            The final pressure reading
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            while self.step():
+                if root and self.queue.get(root)["status"] in TERMINAL:
+                    break
+            pressure = self.update_gauges()
+            if root and self.queue.get(root)["status"] in TERMINAL:
+                return pressure
+            if until_idle and not pressure["backlog"]:
+                return pressure
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return pressure
+            due = self.queue.next_due()
+            wait = idle_poll if due is None else min(idle_poll, max(0.0, due - time.time()))
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            time.sleep(max(wait, 0.01))
+
+
+def current_root(roots_dir: Path = ROOTS_DIR) -> Dict[str, Any]:
+    """
+    Root and generation of the published manifest
+
+    Raises:
+        FileNotFoundError: if nothing has been published yet
+    """
+    manifest = read_manifest(roots_dir)
+    if not manifest:
+        raise FileNotFoundError(f"No published root in {roots_dir}. Please run hash_and_build_merkle.py first.")
+    return {"root": manifest["root"], "generation": manifest["generation"]}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the anchor queue"""
+    parser = argparse.ArgumentParser(description='Durable queue for anchoring Merkle roots on Solana')
+    parser.add_argument('--roots-dir', type=Path, default=ROOTS_DIR, help='Directory holding the manifest and queue')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = sub.add_parser('enqueue', help='Queue a root (default: the published root)')
+    enqueue_parser.add_argument('--root', help='Hex root to queue instead of the published one')
+    enqueue_parser.add_argument('--generation', type=int, help='Generation of --root, if known')
+
+    run_parser = sub.add_parser('run', help='Anchor queued roots with retries')
+    run_parser.add_argument('--rpc-url', default=RPC_URL, help=f'Solana JSON-RPC endpoint (default: {RPC_URL})')
+    run_parser.add_argument('--wallet', type=Path, default=WALLET_PATH, help='Fee-payer wallet file')
+    run_parser.add_argument('--idl', type=Path, default=IDL_PATH, help='Anchor IDL of the audit program')
+    run_parser.add_argument('--rpc-timeout', type=float, default=10.0, help='Seconds per RPC call (default: 10)')
+    run_parser.add_argument('--confirm-poll', type=float, default=CONFIRM_POLL,
+                            help=f'Seconds between confirmation checks (default: {CONFIRM_POLL})')
+    run_parser.add_argument('--backoff-base', type=float, default=BACKOFF_BASE,
+                            help=f'First retry delay in seconds (default: {BACKOFF_BASE:.0f})')
+    run_parser.add_argument('--backoff-max', type=float, default=BACKOFF_MAX,
+                            help=f'Longest retry delay in seconds (default: {BACKOFF_MAX:.0f})')
+    run_parser.add_argument('--until-idle', action='store_true', help='Exit once every queued root is anchored')
+    run_parser.add_argument('--timeout', type=float, help='Exit after this many seconds')
+    profiling.add_profile_argument(run_parser)
+
+    status_parser = sub.add_parser('status', help='Show the backlog and recent entries')
+    status_parser.add_argument('--limit', type=int, default=20, help='Entries to show (default: 20)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    # One line per RPC request is too chatty for a long-running worker
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with AnchorQueue(args.roots_dir) as queue:
+        if args.command == 'enqueue':
+            try:
+                published = current_root(args.roots_dir) if not args.root else {"root": args.root,
+                                                                                 "generation": args.generation}
+                status = queue.enqueue(published["root"], published["generation"])
+            except (FileNotFoundError, ValueError) as e:
+                print(f"[ERROR] {e}")
+                return 1
+            print(f"Root {published['root']} is {status}")
+            print(json.dumps(queue.pressure(), indent=2))
+            return 0
+
+        if args.command == 'status':
+            print(json.dumps({"pressure": queue.pressure(), "entries": queue.entries(args.limit)}, indent=2))
+            return 0
+
+        profiling.start("anchor_queue", args.profile, args.roots_dir.parent / "profiles")
+        # Pipeline metrics (persisted to logs/metrics/submitter.json on exit)
+        registry = get_registry("submitter", metrics_dir=args.roots_dir.parent / "metrics")
+        anchorer = Anchorer(queue, args.rpc_url, args.wallet, args.idl, registry, args.rpc_timeout,
+                            args.confirm_poll, args.backoff_base, args.backoff_max)
+        try:
+            pressure = anchorer.run(until_idle=args.until_idle, timeout=args.timeout)
+        except KeyboardInterrupt:
+            pressure = queue.pressure()
+        print(json.dumps(pressure, indent=2))
+        return 0 if not pressure["backlog"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,19 @@
 import streamlit as st
+import os
 import subprocess
 import sys
+import threading
 from pathlib import Path
 import json
-import hashlib
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from disclosure import load_key
+from hash_and_build_merkle import canonicalize, hash_file_path, leaf_entries
+from history import OperationHistory
+import metrics
+import profiling
+import publish
+from tree_snapshot import SnapshotError, TreeSnapshot, hash_leaf
 
 # Get the full absolute path to this file (app.py)
 SCRIPT_PATH = Path(__file__).resolve()
@@ -16,6 +25,7 @@ ROOT_DIR = SCRIPT_PATH.parent.parent
 POWERSHELL_SCRIPT = ROOT_DIR / 'powershell' / 'collect_logs.ps1'
 MERKLE_SCRIPT     = SCRIPT_PATH.parent / 'hash_and_build_merkle.py'
 SUBMIT_SCRIPT     = SCRIPT_PATH.parent / 'submit_root.py'
+SWEEP_SCRIPT      = SCRIPT_PATH.parent / 'bulk_verify.py'
 
 # Configure Streamlit page
 st.set_page_config(
@@ -127,24 +137,161 @@ with col2:
     st.markdown("✅ Secure")
     st.markdown("✅ Connected")
 
-# Initialize session state for history
-if 'history' not in st.session_state:
-    st.session_state.history = []
+# Profiling mode for pipeline runs ("Off", "cprofile" or "sample"), set on the Settings page
+if 'profile_mode' not in st.session_state:
+    st.session_state.profile_mode = "Off"
+
+@st.cache_resource
+def get_app_metrics():
+    """Create the app's metrics registry and start the /metrics endpoint once per process"""
+    registry = metrics.get_registry("app")
+    try:
+        server = metrics.start_server(live=[registry])
+    except OSError:
+        # Port already taken (another app instance or scripts/metrics.py)
+        server = None
+    return registry, server
+
+app_metrics, metrics_server = get_app_metrics()
+
+@st.cache_resource
+def get_operation_history():
+    """Operation history shared by every session of this process"""
+    return OperationHistory()
+
+operation_history = get_operation_history()
+
+# Process-wide caches shared by every session. File contents are keyed on
+# (inode, mtime, size), the same token publish.read_manifest uses, so a rerun
+# costs one stat per file and rewritten files are re-read on the next rerun.
+# Cached values are shared between sessions and must not be mutated.
+
+def file_token(path):
+    """Cache key for the current contents of ``path``"""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _list_log_files(logs_dir, token):
+    return sorted(p.name for p in Path(logs_dir).glob("*.json"))
+
+def list_log_files(logs_dir):
+    """Exported log files; re-globbed only when files are added or removed"""
+    try:
+        token = file_token(logs_dir)
+    except FileNotFoundError:
+        return []
+    return [logs_dir / name for name in _list_log_files(str(logs_dir), token)]
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def log_file_preview(path, token, lines=5):
+    """First ``lines`` lines of a log file and whether it is empty"""
+    with open(path, 'rb') as f:
+        head = f.read(1024)
+    preview = []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for i, line in enumerate(f):
+            if i >= lines:
+                break
+            preview.append(line.rstrip())
+    return {"empty": not head.strip(), "preview": '\n'.join(preview), "size": token[2]}
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def log_file_summary(path, token):
+    """Entry count and first entry of a log file, or its JSON error"""
+    try:
+        data = load_log_entries(path, token)
+    except json.JSONDecodeError as e:
+        return {"error": str(e)}
+    if isinstance(data, list):
+        return {"count": len(data), "first": data[0] if data else None}
+    return {"data": data}
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_log_entries(path, token):
+    """Parsed contents of a log file, shared across sessions (read-only)"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _read_root_file(path, token):
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+def published_root(roots_dir=ROOT_DIR / "logs" / "roots"):
+    """
+    Currently published root and generation (from the manifest, or from
+    latest_merkle_root.txt for trees built before manifests existed)
+    """
+    try:
+        manifest = publish.read_manifest(roots_dir)
+    except Exception:
+        manifest = None
+    if manifest:
+        return manifest["root"], manifest["generation"], manifest.get("snapshot")
+    root_file = roots_dir / "latest_merkle_root.txt"
+    try:
+        return _read_root_file(str(root_file), file_token(root_file)), None, None
+    except OSError:
+        return None, None, None
+
+@st.cache_resource
+def _mapped_snapshot():
+    """The one snapshot mapping shared by every session, and the lock guarding it"""
+    return {"path": None, "snapshot": None, "lock": threading.Lock()}
+
+def mapped_snapshot_root(path):
+    """
+    Root of the snapshot at ``path``; snapshot files are immutable, so the
+    mapping is reused until a new generation is asked for, which closes it
+    """
+    mapped = _mapped_snapshot()
+    with mapped["lock"]:
+        if mapped["path"] != path:
+            previous, mapped["snapshot"], mapped["path"] = mapped["snapshot"], None, None
+            if previous is not None:
+                previous.close()
+            mapped["snapshot"], mapped["path"] = TreeSnapshot(Path(path)), path
+        return mapped["snapshot"].root().hex()
+
+# Stored metrics and profile summaries change with each build; re-read per
+# published generation, and at most every 30 seconds in between
+@st.cache_data(ttl=30, max_entries=4, show_spinner=False)
+def metrics_summary(generation):
+    return metrics.summarize()
+
+@st.cache_data(ttl=30, max_entries=4, show_spinner=False)
+def recent_profiles(generation, limit=10):
+    return profiling.list_profiles(limit=limit)
+
+command_seconds = app_metrics.histogram(
+    "audit_command_duration_seconds", "Duration of pipeline commands run from the app", ("script",))
+commands_total = app_metrics.counter(
+    "audit_commands_total", "Pipeline commands run from the app", ("script", "status"))
 
 def run_command(command, shell=False):
     """Run a command and add it to history"""
+    env = None
+    if st.session_state.profile_mode != "Off" and command[0] == sys.executable:
+        env = {**os.environ, profiling.ENV_VAR: st.session_state.profile_mode}
+    
     start_time = datetime.now()
-    result = subprocess.run(command, shell=shell, capture_output=True, text=True)
+    result = subprocess.run(command, shell=shell, capture_output=True, text=True, env=env)
     end_time = datetime.now()
     
+    # Record metrics per script
+    script = Path(str(command[-1])).name
+    command_seconds.labels(script=script).observe((end_time - start_time).total_seconds())
+    commands_total.labels(script=script, status='Success' if result.returncode == 0 else 'Failed').inc()
+    
     # Add to history
-    st.session_state.history.append({
-        'timestamp': start_time.isoformat(),
-        'command': ' '.join(map(str, command)),
-        'output': result.stdout + result.stderr,
-        'status': 'Success' if result.returncode == 0 else 'Failed',
-        'duration': str(end_time - start_time)
-    })
+    operation_history.record(
+        command=' '.join(map(str, command)),
+        output=result.stdout + result.stderr,
+        status='Success' if result.returncode == 0 else 'Failed',
+        duration=(end_time - start_time).total_seconds(),
+        timestamp=start_time.timestamp()
+    )
     
     return result.stdout + result.stderr
 
@@ -152,12 +299,15 @@ if page == "Workflow":
     st.header(f"{nav_options[page]['icon']} Workflow Steps")
     
     # Status indicators
+    logs_dir = ROOT_DIR / "logs"
+    log_files = list_log_files(logs_dir)
+    root, generation, _ = published_root()
     col1, col2, col3 = st.columns(3)
     with col1:
-        logs_exist = any(ROOT_DIR.glob("logs/*.json"))
+        logs_exist = bool(log_files)
         st.metric("Log Files", "✅" if logs_exist else "⚠️")
     with col2:
-        merkle_root_exists = (ROOT_DIR / "logs/roots/latest_merkle_root.txt").exists()
+        merkle_root_exists = root is not None
         st.metric("Merkle Tree", "✅" if merkle_root_exists else "⚠️")
     with col3:
         st.metric("Blockchain Status", "Ready")
@@ -171,51 +321,41 @@ if page == "Workflow":
                 st.success("Logs collected successfully!")
         
         # Show existing logs
-        logs_dir = ROOT_DIR / "logs"
-        if logs_dir.exists():
-            log_files = list(logs_dir.glob("*.json"))
-            if log_files:
-                st.write("📁 Available Log Files:")
-                for log_file in log_files:
-                    with st.expander(f"📄 {log_file.name}"):
-                        try:
-                            # Quick check for empty file
-                            if Path(log_file).stat().st_size == 0:
-                                st.warning("File is empty")
-                                continue
-                            
-                            # Read just enough for preview and basic validation
-                            with open(log_file, 'r', encoding='utf-8-sig') as f:
-                                preview_lines = []
-                                for i, line in enumerate(f):
-                                    if i < 5:  # Only store first 5 lines
-                                        preview_lines.append(line.rstrip())
-                                    else:
-                                        break
-                            
-                            st.write("📄 Content Preview:")
-                            preview_content = '\n'.join(preview_lines)
-                            if Path(log_file).stat().st_size > 1024:
-                                preview_content += "\n..."
-                            st.code(preview_content, language="text")
-                            
-                            # Try to parse as JSON
-                            try:
-                                with open(log_file, 'r', encoding='utf-8-sig') as f:
-                                    json_data = json.load(f)
-                                st.write("✅ Valid JSON found:")
-                                if isinstance(json_data, list):
-                                    st.write(f"Found {len(json_data)} log entries")
-                                    if len(json_data) > 0:
-                                        st.write("First entry preview:")
-                                        st.json(json_data[0])
-                                else:
-                                    st.json(json_data)
-                            except json.JSONDecodeError as e:
-                                st.error("Invalid JSON format")
-                                st.info("💡 Tip: Check for proper JSON formatting")
-                        except Exception as e:
-                            st.error(f"Error reading file: {str(e)}")
+        if log_files:
+            st.write("📁 Available Log Files:")
+            for log_file in log_files:
+                with st.expander(f"📄 {log_file.name}"):
+                    try:
+                        token = file_token(log_file)
+                        # Quick check for empty file
+                        if token[2] == 0:
+                            st.warning("File is empty")
+                            continue
+                        
+                        # Read just enough for preview and basic validation
+                        preview = log_file_preview(str(log_file), token)
+                        st.write("📄 Content Preview:")
+                        preview_content = preview["preview"]
+                        if preview["size"] > 1024:
+                            preview_content += "\n..."
+                        st.code(preview_content, language="text")
+                        
+                        # Try to parse as JSON
+                        summary = log_file_summary(str(log_file), token)
+                        if "error" in summary:
+                            st.error("Invalid JSON format")
+                            st.info("💡 Tip: Check for proper JSON formatting")
+                        else:
+                            st.write("✅ Valid JSON found:")
+                            if "count" in summary:
+                                st.write(f"Found {summary['count']} log entries")
+                                if summary['count'] > 0:
+                                    st.write("First entry preview:")
+                                    st.json(summary['first'])
+                            else:
+                                st.json(summary['data'])
+                    except Exception as e:
+                        st.error(f"Error reading file: {str(e)}")
     
     # Step 2: Build Merkle Tree
     with st.expander("Step 2: Build Merkle Tree", expanded=True):
@@ -229,10 +369,10 @@ if page == "Workflow":
                     st.error("Failed to build Merkle tree")
         
         # Show current Merkle root if exists
-        root_file = ROOT_DIR / "logs/roots/latest_merkle_root.txt"
-        if root_file.exists():
-            with open(root_file, 'r') as f:
-                st.info(f"Current Merkle Root: {f.read().strip()}")
+        if root:
+            st.info(f"Current Merkle Root: {root}")
+            if generation:
+                st.caption(f"Generation {generation}")
     
     # Step 3: Submit to Blockchain
     with st.expander("Step 3: Submit to Blockchain", expanded=True):
@@ -245,6 +385,22 @@ if page == "Workflow":
                     st.code(output)
                     if "ERROR" not in output:
                         st.success("Successfully submitted to blockchain!")
+
+        queue_db = ROOT_DIR / "logs/roots/anchor_queue.db"
+        if queue_db.exists():
+            from anchor_queue import AnchorQueue
+
+            queue = AnchorQueue(queue_db.parent)
+            try:
+                pressure = queue.pressure()
+            finally:
+                queue.close()
+            last = pressure["last_confirmed"]
+            summary = (f"Anchor queue: {pressure['backlog']} waiting, {pressure['in_flight']} in flight "
+                       f"({pressure['level']})")
+            if last:
+                summary += f" · last anchored generation {last['generation']}"
+            (st.warning if pressure["level"] == "stalled" else st.caption)(summary)
     
     if st.button("⚡ Run All Steps"):
         st.info("Running all steps...")
@@ -266,43 +422,31 @@ elif page == "Verify":
         st.subheader("🔍 Verify Individual Log")
         logs_dir = ROOT_DIR / "logs"
         if logs_dir.exists():
-            log_files = list(logs_dir.glob("*.json"))
+            log_files = list_log_files(logs_dir)
             if log_files:
                 selected_file = st.selectbox("Select Log File", [f.name for f in log_files])
                 if selected_file:
                     log_path = logs_dir / selected_file
                     try:
                         # Check file and get preview
-                        with open(log_path, 'rb') as f:
-                            first_chunk = f.read(1024)  # Read first 1KB
-                            is_empty = not first_chunk.strip()
-                            has_bom = first_chunk.startswith(b'\xef\xbb\xbf')
+                        token = file_token(log_path)
+                        preview = log_file_preview(str(log_path), token)
                         
-                        if is_empty:
+                        if preview["empty"]:
                             st.error("File is empty!")
                         else:
-                            # Read preview efficiently
-                            with open(log_path, 'r', encoding='utf-8-sig' if has_bom else 'utf-8') as f:
-                                preview_lines = []
-                                for i, line in enumerate(f):
-                                    if i < 5:
-                                        preview_lines.append(line.rstrip())
-                                    else:
-                                        break
-                            
-                            preview_content = '\n'.join(preview_lines)
-                            if Path(log_path).stat().st_size > 1024:  # If file is larger than preview
+                            preview_content = preview["preview"]
+                            if preview["size"] > 1024:  # If file is larger than preview
                                 preview_content += "\n..."
                             
                             st.write("File preview:")
                             st.code(preview_content, language="text")
                             st.write("File analysis:")
-                            st.code(f"File size: {Path(log_path).stat().st_size} bytes")
+                            st.code(f"File size: {preview['size']} bytes")
                             
                             try:
-                                # Try to parse as JSON efficiently
-                                with open(log_path, 'r', encoding='utf-8-sig' if has_bom else 'utf-8') as f:
-                                    logs_data = json.load(f)  # More efficient than loads
+                                # Parsed once per file version for all sessions
+                                logs_data = load_log_entries(str(log_path), token)
                                 if isinstance(logs_data, list):
                                     st.success("Successfully parsed JSON file")
                                     # Show individual log entries
@@ -311,12 +455,15 @@ elif page == "Verify":
                                             st.json(log)
                                             verify_button_key = f"verify_{selected_file}_{idx}"
                                             if st.button("🔐 Verify This Entry", key=verify_button_key):
-                                                # Calculate hash for this entry
-                                                log_bytes = json.dumps(log, sort_keys=True).encode("utf-8")
-                                                log_hash = hashlib.sha3_256(log_bytes).hexdigest()
+                                                # Leaf digest of this entry, as the builder stores it
+                                                manifest = publish.read_manifest(logs_dir / "roots") or {}
+                                                leaf_mode = manifest.get("leaf_mode", "event")
+                                                key = load_key(logs_dir) if leaf_mode == "fields" else None
+                                                leaf_data = leaf_entries([log], [canonicalize(log)], leaf_mode, key)[0]
+                                                log_hash = hash_leaf(leaf_data).hex()
                                                 
-                                                # Check if hash exists in hashes directory
-                                                hash_file = logs_dir / "hashes" / f"{selected_file.replace('.json', '')}_process_{idx}.hash"
+                                                # Check if hash exists in the published hashes directory
+                                                hash_file = hash_file_path(logs_dir, manifest, selected_file, idx)
                                                 if hash_file.exists():
                                                     with open(hash_file, 'r') as f:
                                                         stored_hash = f.read().strip()
@@ -342,44 +489,20 @@ elif page == "Verify":
     with col2:
         st.subheader("🌳 Verify Merkle Root")
         
-        # Initialize session state for Merkle root verification
-        if 'merkle_root_cache' not in st.session_state:
-            st.session_state.merkle_root_cache = None
-            st.session_state.merkle_root_last_check = 0
-        
-        # Function to get Merkle root with caching
-        def get_merkle_root():
-            current_time = datetime.now().timestamp()
-            merkle_root_file = logs_dir / "roots" / "latest_merkle_root.txt"
-            
-            # Only read file if cache is empty or older than 5 seconds
-            if (st.session_state.merkle_root_cache is None or 
-                current_time - st.session_state.merkle_root_last_check > 5):
-                
-                if merkle_root_file.exists():
-                    try:
-                        with open(merkle_root_file, 'r') as f:
-                            st.session_state.merkle_root_cache = f.read().strip()
-                    except Exception:
-                        st.session_state.merkle_root_cache = None
-                else:
-                    st.session_state.merkle_root_cache = None
-                
-                st.session_state.merkle_root_last_check = current_time
-            
-            return st.session_state.merkle_root_cache
-        
-        # Get current root from cache
-        current_root = get_merkle_root()
+        # Shared by all sessions; re-read only when the builder publishes
+        current_root, generation, snapshot_name = published_root()
         
         if current_root:
             st.info(f"Current Merkle Root: {current_root}")
+            if generation:
+                st.caption(f"Generation {generation}")
             
             # Add verification options
             verify_option = st.radio(
                 "Verification Method",
-                ["Quick Verify", "Full Verify"],
-                help="Quick verify checks only the root hash, Full verify rebuilds the entire tree"
+                ["Quick Verify", "Full Verify", "Bulk Sweep"],
+                help="Quick verify checks only the root hash, Full verify rebuilds the entire tree, "
+                     "Bulk sweep re-hashes every entry and lists the ones that changed"
             )
             
             if st.button("🔄 Verify Current Root"):
@@ -390,10 +513,25 @@ elif page == "Verify":
                         if merkle_root_file.exists():
                             with open(merkle_root_file, 'r') as f:
                                 stored_root = f.read().strip()
-                            if stored_root == current_root:
+                            snapshot_root = current_root
+                            if snapshot_name:
+                                # The mapped snapshot must fold up to the same root
+                                try:
+                                    snapshot_root = mapped_snapshot_root(str(logs_dir / "roots" / snapshot_name))
+                                except SnapshotError:
+                                    snapshot_root = None
+                            if stored_root == current_root and snapshot_root == current_root:
                                 st.success("✅ Quick verification passed: Merkle root matches stored value.")
                             else:
                                 st.error("❌ Verification failed: Merkle root mismatch!")
+                    elif verify_option == "Bulk Sweep":
+                        # Re-hash every entry against the published snapshot's leaves
+                        output = run_command([sys.executable, str(SWEEP_SCRIPT)])
+                        if "No changes detected" in output:
+                            st.success("✅ Bulk sweep passed: every entry matches its stored digest.")
+                        else:
+                            st.error("❌ Bulk sweep found changed entries.")
+                            st.code(output)
                     else:
                         # Full verification with tree rebuild
                         output = run_command([sys.executable, str(MERKLE_SCRIPT)])
@@ -414,13 +552,60 @@ elif page == "Verify":
 elif page == "History":
     st.header(f"{nav_options[page]['icon']} Operation History")
     
-    if not st.session_state.history:
+    # Pipeline metrics summary (from logs/metrics/)
+    with st.expander("📈 Pipeline Metrics", expanded=True):
+        summary = metrics_summary(published_root()[1])
+        if not summary:
+            st.info("No metrics recorded yet.")
+        else:
+            def histogram_mean(name):
+                entries = [v for k, v in summary.items() if k.split('{')[0] == name]
+                count = sum(v['count'] for v in entries)
+                return sum(v['sum'] for v in entries) / count if count else 0.0
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Events Ingested", int(summary.get("audit_events_ingested_total", 0)))
+                st.metric("Bytes Parsed", int(summary.get("audit_bytes_parsed_total", 0)))
+            with col2:
+                st.metric("Hashes/sec (last build)", f"{summary.get('audit_hashes_per_second', 0):,.0f}")
+                st.metric("Tree Depth", int(summary.get("audit_tree_depth", 0)))
+            with col3:
+                st.metric("Avg Build Time", f"{histogram_mean('audit_build_duration_seconds'):.2f}s")
+                st.metric("Avg RPC Latency", f"{histogram_mean('audit_rpc_latency_seconds') * 1000:.0f} ms")
+            with col4:
+                st.metric("Confirmations", int(summary.get('audit_submissions_total{status="confirmed"}', 0)))
+                failures = sum(v for k, v in summary.items() if k.startswith("audit_verify_failures_total"))
+                st.metric("Verify Failures", int(failures))
+            
+            # Where build time goes, per stage
+            stage_rows = [
+                {"Stage": k.split('"')[1], "Runs": v['count'], "Total (s)": round(v['sum'], 3), "Mean (s)": round(v['mean'], 4)}
+                for k, v in summary.items() if k.startswith("audit_build_stage_seconds")
+            ]
+            if stage_rows:
+                st.write("**Build time by stage:**")
+                st.table(stage_rows)
+            if metrics_server:
+                st.caption(f"Prometheus endpoint: http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+    
+    # Profiled runs (from logs/profiles/)
+    profiles = recent_profiles(published_root()[1])
+    if profiles:
+        with st.expander(f"🔥 Profiles ({len(profiles)} most recent)"):
+            for summary in profiles:
+                st.write(f"**{summary['name']}** · {summary['mode']} · {summary['started']} · "
+                         f"{summary['duration']:.2f}s · `{summary['profile_file']}`")
+                st.table([
+                    {"Function": row['function'], "Calls": row['calls'],
+                     "Self (s)": row['self_seconds'], "Total (s)": row['total_seconds']}
+                    for row in summary['top'][:10]
+                ])
+    
+    total_operations = operation_history.count()
+    if not total_operations:
         st.info("No operations performed yet.")
     else:
-        # Initialize pagination state
-        if 'history_page' not in st.session_state:
-            st.session_state.history_page = 0
-        
         # Add filter options
         col1, col2 = st.columns(2)
         with col1:
@@ -435,63 +620,61 @@ elif page == "History":
                 [5, 10, 20, 50],
                 key="history_items_per_page"
             )
+        status = None if filter_status == "All" else filter_status
         
-        # Filter entries
-        filtered_history = st.session_state.history
-        if filter_status != "All":
-            filtered_history = [
-                entry for entry in filtered_history 
-                if entry['status'] == filter_status
-            ]
+        # Keyset pagination: one cursor (the last id shown) per page visited,
+        # restarted whenever the filter or page size changes
+        query = (status, items_per_page)
+        if st.session_state.get('history_query') != query:
+            st.session_state.history_query = query
+            st.session_state.history_cursors = [None]
+        cursors = st.session_state.history_cursors
+        
+        # Summary metrics from the precomputed totals
+        filtered_count = operation_history.count(status)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Successful Operations", operation_history.count("Success"))
+        with col2:
+            st.metric("Failed Operations", operation_history.count("Failed"))
+        with col3:
+            st.metric("Total Operations", total_operations)
         
-        # Calculate pagination
-        total_pages = (len(filtered_history) + items_per_page - 1) // items_per_page
+        total_pages = (filtered_count + items_per_page - 1) // items_per_page
         if total_pages > 0:
             # Pagination controls
             col1, col2, col3 = st.columns([1, 2, 1])
             with col1:
-                if st.button("◀️ Previous") and st.session_state.history_page > 0:
-                    st.session_state.history_page -= 1
-            with col2:
-                st.write(f"Page {st.session_state.history_page + 1} of {total_pages}")
+                if st.button("◀️ Previous") and len(cursors) > 1:
+                    cursors.pop()
+            current_entries = operation_history.page(status, cursors[-1], items_per_page)
             with col3:
-                if st.button("Next ▶️") and st.session_state.history_page < total_pages - 1:
-                    st.session_state.history_page += 1
-            
-            # Display entries for current page
-            start_idx = st.session_state.history_page * items_per_page
-            end_idx = min(start_idx + items_per_page, len(filtered_history))
-            
-            current_entries = list(reversed(filtered_history[start_idx:end_idx]))
-            
-            # Summary metrics
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                success_count = sum(1 for entry in filtered_history if entry['status'] == 'Success')
-                st.metric("Successful Operations", success_count)
+                if st.button("Next ▶️") and len(cursors) < total_pages and current_entries:
+                    cursors.append(current_entries[-1]['id'])
+                    current_entries = operation_history.page(status, cursors[-1], items_per_page)
             with col2:
-                failed_count = sum(1 for entry in filtered_history if entry['status'] == 'Failed')
-                st.metric("Failed Operations", failed_count)
-            with col3:
-                st.metric("Total Operations", len(filtered_history))
+                st.write(f"Page {len(cursors)} of {total_pages}")
             
-            # Display entries
+            # Display entries; output is loaded only when asked for
             for entry in current_entries:
                 status_color = "🟢" if entry['status'] == 'Success' else "🔴"
-                with st.expander(f"{status_color} {entry['timestamp']} - {entry['command'][:50]}{'...' if len(entry['command']) > 50 else ''}"):
+                started = datetime.fromtimestamp(entry['timestamp']).isoformat()
+                with st.expander(f"{status_color} {started} - {entry['command'][:50]}{'...' if len(entry['command']) > 50 else ''}"):
                     st.write(f"**Status:** {entry['status']}")
-                    st.write(f"**Duration:** {entry['duration']}")
-                    if len(entry['output']) > 1000:
-                        st.write("**Output:** (truncated)")
-                        st.code(entry['output'][:1000] + "\n...")
-                    else:
-                        st.write("**Output:**")
-                        st.code(entry['output'])
+                    st.write(f"**Duration:** {timedelta(seconds=entry['duration'])}")
+                    if st.checkbox(f"Show output ({entry['output_size']:,} bytes)", key=f"history_output_{entry['id']}"):
+                        output = operation_history.output(entry['id']) or ""
+                        if len(output) > 1000:
+                            st.write("**Output:** (truncated)")
+                            st.code(output[:1000] + "\n...")
+                        else:
+                            st.write("**Output:**")
+                            st.code(output)
         
         # Clear history button
         if st.button("🗑️ Clear History"):
-            st.session_state.history = []
-            st.session_state.history_page = 0
+            operation_history.clear()
+            st.session_state.history_cursors = [None]
             st.experimental_rerun()
 
 elif page == "Settings":
@@ -502,6 +685,9 @@ elif page == "Settings":
     st.write(f"**Root Directory:** `{ROOT_DIR}`")
     st.write(f"**Logs Directory:** `{ROOT_DIR}/logs`")
     st.write(f"**Scripts Directory:** `{SCRIPT_PATH.parent}`")
+    st.write(f"**Metrics Directory:** `{metrics.METRICS_DIR}`")
+    if metrics_server:
+        st.write(f"**Metrics Endpoint:** `http://127.0.0.1:{metrics_server.server_address[1]}/metrics`")
     
     # Configuration
     st.subheader("⚙️ Configuration")
@@ -520,6 +706,17 @@ elif page == "Settings":
                     help="Algorithm used for Merkle tree")
         st.number_input("Batch Size", min_value=1, value=100, 
                      help="Number of logs to process in one batch")
+    
+    # Profiling
+    st.subheader("🔥 Profiling")
+    profile_options = ["Off", "cprofile", "sample"]
+    st.session_state.profile_mode = st.selectbox(
+        "Profile pipeline runs",
+        profile_options,
+        index=profile_options.index(st.session_state.profile_mode),
+        help="Profile the build, submit and verify scripts started from this app. "
+             "Profiles are saved under logs/profiles/ and summarized on the History page."
+    )
 
 elif page == "About":
     st.header("About Plug and Play Audit Addon")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Bulk Verification Module
+Nightly "did anything change on disk" sweep. Every exported log entry is
+re-hashed in parallel chunks into an ``(n, 32)`` uint8 array, which is
+compared against the stored digests in one vectorized operation; only the
+mismatching leaf indices are reported.
+
+Stored digests come from the leaf level of the published tree snapshot
+(default) or from the per-entry ``.hash`` files the manifest publishes
+under logs/hashes/; both hold the same leaf digests.
+
+Usage:
+    python scripts/bulk_verify.py
+    python scripts/bulk_verify.py --against hashes --workers 8 --output sweep.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import Registry, get_registry
+import profiling
+from publish import read_manifest
+from tree_snapshot import SnapshotError, TreeSnapshot, hash_leaves
+
+LOGS_DIR = Path(__file__).parent.parent / "logs"
+SOURCES = ("snapshot", "hashes")
+DIGEST_SIZE = 32
+# Leaves re-hashed per worker task; large exports are split into several
+SWEEP_CHUNK = 4096
+
+
+# Last export parsed by this process, so consecutive ranges of one file parse it once
+_parsed: Dict[str, Any] = {}
+
+
+def _load_entries(path: Path) -> List[Any]:
+    """Parsed export, re-read only when the file changes"""
+    stat = path.stat()
+    token = (str(path), stat.st_mtime_ns, stat.st_size)
+    if _parsed.get("token") != token:
+        _parsed.clear()
+        with open(path, "r", encoding="utf-8-sig") as f:
+            _parsed.update(token=token, entries=json.load(f))
+    return _parsed["entries"]
+
+
+def _hash_range(task: Tuple[str, str, str, str, int, int, str, Optional[str]]
+                ) -> Tuple[str, int, Optional[bytes], Optional[bytes], Optional[int], Optional[str]]:
+    """
+    Re-hash a range of entries of one export (runs in a worker process)
+
+    Args:
+        task: (logs dir, file name, stored digest source, algorithm, first entry,
+              end entry, leaf mode and .hash directory of the published tree)
+
+    Returns:
+        (file name, first entry, concatenated computed digests, concatenated
+        stored digests for the ``hashes`` source, entries in the file, error message)
+    """
+    from disclosure import load_key
+    from hash_and_build_merkle import canonicalize, hash_file_path, leaf_entries
+
+    logs_dir, file_name, source, algorithm, entry_start, entry_stop, leaf_mode, hashes = task
+    logs_dir = Path(logs_dir)
+    try:
+        processes = _load_entries(logs_dir / file_name)
+        key = load_key(logs_dir) if leaf_mode == "fields" else None
+    except (OSError, ValueError) as e:
+        return file_name, entry_start, None, None, None, f"{type(e).__name__}: {e}"
+
+    processes_range = processes[entry_start:entry_stop]
+    canonical = [canonicalize(p) for p in processes_range]
+    computed = b"".join(hash_leaves(leaf_entries(processes_range, canonical, leaf_mode, key), algorithm))
+    if source == "snapshot":
+        return file_name, entry_start, computed, None, len(processes), None
+
+    stored = bytearray()
+    for idx in range(entry_start, entry_stop):
+        try:
+            digest = bytes.fromhex(hash_file_path(logs_dir, {"hashes": hashes}, file_name, idx).read_text().strip())
+        except (OSError, ValueError):
+            digest = b""
+        # Missing or corrupt digest file; all-zero never matches a real digest
+        stored += digest if len(digest) == DIGEST_SIZE else bytes(DIGEST_SIZE)
+    return file_name, entry_start, computed, bytes(stored), len(processes), None
+
+
+def sweep(logs_dir: Path = LOGS_DIR, against: str = "snapshot", workers: int = None,
+          registry: Registry = None) -> Dict[str, Any]:
+    """
+    Re-hash every entry of the published tree and compare it with the stored digests
+
+    Args:
+        logs_dir: Directory containing the exported logs and roots/
+        against: Stored digest source, ``snapshot`` or ``hashes``
+        workers: Worker processes (default: CPU count; 1 hashes in-process)
+        registry: Metrics registry (in-memory only if not provided)
+
+    Returns:
+        Report with the mismatching leaf indices (and their file and entry),
+        unreadable files, and whether the snapshot still yields the published root
+
+    Raises:
+        SnapshotError: if no tree has been published
+    """
+    import numpy as np
+
+    registry = registry or get_registry("verifier", persist=False)
+    verifications = registry.counter("audit_verifications_total", "Verification checks performed", ("kind",))
+    failures = registry.counter("audit_verify_failures_total", "Verification checks that failed", ("kind",))
+    duration = registry.histogram("audit_verify_duration_seconds", "Time spent per verification check", ("kind",))
+
+    start = time.perf_counter()
+    logs_dir = Path(logs_dir)
+    roots_dir = logs_dir / "roots"
+    manifest = read_manifest(roots_dir)
+    if not manifest or not manifest.get("snapshot"):
+        raise SnapshotError(f"No tree snapshot published in {roots_dir}")
+    files = manifest["files"]
+    size = manifest["size"]
+    algorithm = manifest.get("algorithm", "sha3_256")
+    spans = {f["name"]: (f["leaf_start"], f["leaves"]) for f in files}
+
+    computed = np.zeros((size, DIGEST_SIZE), dtype=np.uint8)
+    stored = np.zeros((size, DIGEST_SIZE), dtype=np.uint8) if against == "hashes" else None
+    # Leaves whose entry no longer exists on disk count as mismatches
+    present = np.zeros(size, dtype=bool)
+    errors = {}
+    extra = {}
+
+    leaf_mode = manifest.get("leaf_mode", "event")
+    # Fixed-size leaf ranges in tree order; each worker takes one contiguous
+    # run of them, so the work splits evenly however the leaves are spread
+    # over exports and an export is parsed by at most the workers that share it
+    tasks = [(str(logs_dir), f["name"], against, algorithm, entry, min(entry + SWEEP_CHUNK, f["leaves"]),
+              leaf_mode, manifest.get("hashes"))
+             for f in files for entry in range(0, max(f["leaves"], 1), SWEEP_CHUNK)]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = min(workers, len(tasks))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_hash_range, tasks, chunksize=-(-len(tasks) // workers)))
+    else:
+        results = [_hash_range(task) for task in tasks]
+        _parsed.clear()
+    hashed_at = time.perf_counter()
+
+    for file_name, entry_start, digests, stored_digests, entries, error in results:
+        leaf_start, leaves = spans[file_name]
+        if error:
+            errors[file_name] = error
+            continue
+        if entries > leaves:
+            extra[file_name] = entries - leaves
+        n = len(digests) // DIGEST_SIZE
+        rows = slice(leaf_start + entry_start, leaf_start + entry_start + n)
+        computed[rows] = np.frombuffer(digests, dtype=np.uint8, count=n * DIGEST_SIZE).reshape(n, DIGEST_SIZE)
+        present[rows] = True
+        if stored is not None:
+            stored[rows] = np.frombuffer(stored_digests, dtype=np.uint8, count=n * DIGEST_SIZE).reshape(n, DIGEST_SIZE)
+
+    root_ok = None
+    if against == "snapshot":
+        with TreeSnapshot(roots_dir / manifest["snapshot"]) as snapshot:
+            stored = np.frombuffer(snapshot.level_view(0), dtype=np.uint8).reshape(size, DIGEST_SIZE).copy()
+            # The stored leaves must still fold up to the published root; the
+            # levels are checked chunk by chunk straight from the mapping
+            root_ok = snapshot.root().hex() == manifest["root"] and snapshot.verify_levels()
+
+    # One vectorized comparison over all n digests (4 x uint64 per row)
+    differs = (computed.view(np.uint64) != stored.view(np.uint64)).any(axis=1) | ~present
+    mismatches = np.flatnonzero(differs)
+    compared_at = time.perf_counter()
+
+    starts = np.array([f["leaf_start"] for f in files], dtype=np.int64)
+    owners = np.searchsorted(starts, mismatches, side="right") - 1
+    elapsed = compared_at - start
+
+    verifications.labels(kind="sweep").inc(size)
+    failures.labels(kind="sweep").inc(len(mismatches))
+    duration.labels(kind="sweep").observe(elapsed)
+
+    return {
+        "generation": manifest["generation"],
+        "against": against,
+        "events": size,
+        "files": len(files),
+        "mismatches": [
+            {"index": int(i), "file": files[o]["name"], "entry": int(i - files[o]["leaf_start"])}
+            for i, o in zip(mismatches, owners)
+        ],
+        "unreadable_files": errors,
+        "unhashed_entries": extra,
+        "root_ok": root_ok,
+        "passed": not len(mismatches) and not extra and root_ok is not False,
+        "hash_seconds": round(hashed_at - start, 3),
+        "compare_seconds": round(compared_at - hashed_at, 3),
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(size / elapsed, 1) if elapsed else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the bulk verification sweep"""
+    parser = argparse.ArgumentParser(description='Re-verify every stored digest in one sweep')
+    parser.add_argument('--logs-dir', type=Path, default=LOGS_DIR, help='Directory containing the exported logs')
+    parser.add_argument('--against', choices=SOURCES, default='snapshot',
+                        help='Stored digests to compare with (default: snapshot)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', type=Path, help='Write the full report as JSON')
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.start("bulk_verify", args.profile, args.logs_dir / "profiles")
+
+    try:
+        report = sweep(args.logs_dir, args.against, args.workers,
+                       get_registry("verifier", metrics_dir=args.logs_dir / "metrics"))
+    except SnapshotError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    print(f"Swept {report['events']} events in {report['files']} files (generation {report['generation']}, "
+          f"against {report['against']}) in {report['seconds']}s, {report['events_per_sec']} events/sec")
+    for file_name, error in report["unreadable_files"].items():
+        print(f"[ERROR] {file_name}: {error}")
+    for file_name, count in report["unhashed_entries"].items():
+        print(f"[WARN] {file_name} has {count} entries not in the tree")
+    if report["root_ok"] is False:
+        print("[ERROR] Snapshot leaves no longer fold up to the published root")
+    if report["mismatches"]:
+        print(f"{len(report['mismatches'])} mismatching entries:")
+        for m in report["mismatches"]:
+            print(f"  {m['index']}: {m['file']} entry {m['entry']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    print("✅ No changes detected" if report["passed"] else "❌ Stored logs have changed")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
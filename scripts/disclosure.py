@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Selective Disclosure Module
+Field-level commitments for log entries. In the ``fields`` leaf mode each
+entry's Merkle leaf commits to a small tree over its sorted top-level fields
+instead of to the whole record, so an auditor can be handed a subset of the
+fields plus a short proof and still check it against the anchored root.
+
+Field leaves are ``H(0x00 || salt || json([name, value]))``. The salts of an
+entry are one SHAKE-256 output over a secret key kept next to the logs
+(``disclosure.key``) and the entry's canonical bytes, so undisclosed
+low-entropy fields (levels, event ids, ...) cannot be brute-forced from
+their digests; only the holder of the key can produce disclosures. Field
+trees use the same node hashing and odd-node promotion as the main tree.
+
+Usage:
+    python scripts/disclosure.py verify disclosure.json              # against the published root
+    python scripts/disclosure.py verify disclosure.json --root <hex>
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tree_snapshot import LEAF_PREFIX, NODE_PREFIX, build_levels, hash_leaf, path_from_json, resolve_audit_path
+
+LEAF_MODES = ("event", "fields")
+KEY_NAME = "disclosure.key"
+KEY_SIZE = 32
+SALT_SIZE = 16
+LOGS_DIR = Path(__file__).parent.parent / "logs"
+# Everything a verifier recomputes; a disclosure missing any of these is rejected
+REQUIRED_KEYS = ("algorithm", "field_count", "fields", "siblings", "commitment", "path", "root")
+
+# Compact separators keep field encodings independent of json defaults
+_encode = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+_encode_str = json.encoder.encode_basestring_ascii
+_SCALARS = {type(None): lambda v: "null", bool: lambda v: "true" if v else "false", int: int.__repr__,
+            str: _encode_str}
+
+
+def _encode_field(name: str, value: Any) -> bytes:
+    """``_encode([name, value])`` without the encoder overhead for scalar values"""
+    scalar = _SCALARS.get(type(value))
+    encoded = scalar(value) if scalar else _encode(value)
+    return ("[" + _encode_str(name) + "," + encoded + "]").encode("ascii")
+
+
+def _salts(canonical: bytes, key: bytes, count: int) -> bytes:
+    """``count`` concatenated field salts of one entry"""
+    h = hashlib.shake_256(key)
+    h.update(canonical)
+    return h.digest(SALT_SIZE * count)
+
+
+def load_key(logs_dir: Path, create: bool = False) -> bytes:
+    """
+    Secret used to derive field salts
+
+    Args:
+        logs_dir: Directory holding ``disclosure.key``
+        create: Generate the key if it does not exist yet
+
+    Raises:
+        FileNotFoundError: if the key is missing and ``create`` is False
+    """
+    path = Path(logs_dir) / KEY_NAME
+    if create and not path.exists():
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(os.urandom(KEY_SIZE))
+    key = path.read_bytes()
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"{path} is not a {KEY_SIZE}-byte disclosure key")
+    return key
+
+
+def _fields(event: Any) -> List[Tuple[str, Any]]:
+    """Sorted top-level fields; non-objects commit as a single unnamed field"""
+    if isinstance(event, dict) and event:
+        return sorted(event.items())
+    return [("", event)]
+
+
+def field_digests(event: Any, canonical: bytes, key: bytes, algorithm: str = "sha3_256") -> List[Tuple[str, Any, bytes, bytes]]:
+    """
+    Salted digest of every field of one entry
+
+    Args:
+        event: Log entry
+        canonical: Canonical bytes of the entry (binds salts to this entry)
+        key: Disclosure key
+
+    Returns:
+        List of (name, value, salt, digest) in field order
+    """
+    hashfunc = getattr(hashlib, algorithm)
+    fields = _fields(event)
+    salts = _salts(canonical, key, len(fields))
+    result = []
+    for i, (name, value) in enumerate(fields):
+        salt = salts[i * SALT_SIZE:(i + 1) * SALT_SIZE]
+        result.append((name, value, salt, hashfunc(LEAF_PREFIX + salt + _encode_field(name, value)).digest()))
+    return result
+
+
+def _fold(digests: Sequence[bytes], hashfunc) -> bytes:
+    """Root over ``digests`` with odd-node promotion (as :func:`build_levels`)"""
+    level = list(digests)
+    while len(level) > 1:
+        parents = [hashfunc(NODE_PREFIX + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        level = parents
+    return level[0]
+
+
+def commit_events(events: Iterable[Any], canonical: Iterable[bytes], key: bytes,
+                  algorithm: str = "sha3_256") -> List[bytes]:
+    """
+    Field-commitment roots for a batch of entries (the leaf data in ``fields`` mode)
+
+    Args:
+        events: Log entries
+        canonical: Their canonical bytes, in the same order
+        key: Disclosure key
+
+    Returns:
+        32-byte commitment root per entry
+    """
+    # One tight loop per batch: this runs once per field of every entry
+    hashfunc = getattr(hashlib, algorithm)
+    shake = hashlib.shake_256
+    encode_str = _encode_str
+    scalars = _SCALARS
+    roots = []
+    for event, data in zip(events, canonical):
+        fields = _fields(event)
+        h = shake(key)
+        h.update(data)
+        salts = h.digest(SALT_SIZE * len(fields))
+        level = []
+        offset = 0
+        for name, value in fields:
+            scalar = scalars.get(type(value))
+            encoded = scalar(value) if scalar else _encode(value)
+            field = ("[" + encode_str(name) + "," + encoded + "]").encode("ascii")
+            level.append(hashfunc(LEAF_PREFIX + salts[offset:offset + SALT_SIZE] + field).digest())
+            offset += SALT_SIZE
+        roots.append(_fold(level, hashfunc))
+    return roots
+
+
+def _multiproof(levels: List[List[bytes]], positions: Sequence[int]) -> List[bytes]:
+    """Sibling digests needed to fold the leaves at ``positions`` up to the root"""
+    known = sorted(set(positions))
+    proof = []
+    for level in levels[:-1]:
+        known_set = set(known)
+        for i in known:
+            sibling = i ^ 1
+            if sibling < len(level) and sibling not in known_set:
+                proof.append(level[sibling])
+        known = sorted({i // 2 for i in known})
+    return proof
+
+
+def _fold_multiproof(count: int, leaves: Dict[int, bytes], proof: Sequence[bytes], hashfunc) -> bytes:
+    """Inverse of :func:`_multiproof`: the root implied by some leaves and their proof"""
+    nodes = dict(leaves)
+    siblings = iter(proof)
+    while count > 1:
+        parents = {}
+        for i in sorted(nodes):
+            if i // 2 in parents:
+                continue
+            sibling = i ^ 1
+            if sibling >= count:
+                parents[i // 2] = nodes[i]
+                continue
+            other = nodes[sibling] if sibling in nodes else next(siblings)
+            left, right = (nodes[i], other) if i % 2 == 0 else (other, nodes[i])
+            parents[i // 2] = hashfunc(NODE_PREFIX + left + right).digest()
+        nodes = parents
+        count = (count + 1) // 2
+    if next(siblings, None) is not None:
+        raise ValueError("Disclosure proof has unused sibling digests")
+    return nodes[0]
+
+
+def disclose(event: Any, canonical: bytes, names: Sequence[str], key: bytes,
+             algorithm: str = "sha3_256") -> Dict[str, Any]:
+    """
+    Reveal some fields of an entry with a proof against its commitment root
+
+    Args:
+        event: Log entry
+        canonical: Canonical bytes of the entry
+        names: Field names to reveal
+        key: Disclosure key
+
+    Returns:
+        Disclosure dictionary (field count, revealed fields with salts,
+        sibling digests and the commitment root)
+    """
+    fields = field_digests(event, canonical, key, algorithm)
+    positions = {name: i for i, (name, _, _, _) in enumerate(fields)}
+    missing = [n for n in names if n not in positions]
+    if missing:
+        raise KeyError(f"Entry has no field(s): {', '.join(missing)}")
+    levels = build_levels([digest for _, _, _, digest in fields], algorithm)
+    selected = sorted(positions[n] for n in set(names))
+    return {
+        "algorithm": algorithm,
+        "field_count": len(fields),
+        "fields": [{"position": i, "name": fields[i][0], "value": fields[i][1], "salt": fields[i][2].hex()}
+                   for i in selected],
+        "siblings": [digest.hex() for digest in _multiproof(levels, selected)],
+        "commitment": levels[-1][0].hex(),
+    }
+
+
+def commitment_root(disclosure: Dict[str, Any]) -> bytes:
+    """
+    Recompute the commitment root a disclosure implies
+
+    Raises:
+        ValueError: if positions repeat, fall outside the field count or do
+                    not follow the sorted field names the commitment uses
+    """
+    hashfunc = getattr(hashlib, disclosure["algorithm"])
+    count = int(disclosure["field_count"])
+    leaves = {}
+    names = {}
+    for field in disclosure["fields"]:
+        position = int(field["position"])
+        if not 0 <= position < count:
+            raise ValueError(f"Field position {position} is out of range ({count} fields)")
+        if position in leaves:
+            # A second field at a taken position would otherwise replace the genuine one
+            raise ValueError(f"Field position {position} is disclosed more than once "
+                             f"({names[position]!r}, {field['name']!r})")
+        salt = bytes.fromhex(field["salt"])
+        if len(salt) != SALT_SIZE:
+            raise ValueError(f"Salt of {field['name']!r} is not {SALT_SIZE} bytes")
+        data = _encode([field["name"], field["value"]]).encode("ascii")
+        leaves[position] = hashfunc(LEAF_PREFIX + salt + data).digest()
+        names[position] = field["name"]
+    if not leaves:
+        raise ValueError("Disclosure reveals no fields")
+    ordered = [names[position] for position in sorted(names)]
+    if any(a >= b for a, b in zip(ordered, ordered[1:])):
+        raise ValueError("Field names are not in the sorted order of their positions")
+    return _fold_multiproof(count, leaves, [bytes.fromhex(d) for d in disclosure["siblings"]], hashfunc)
+
+
+def verify_disclosure(disclosure: Dict[str, Any], expected_root: str) -> Tuple[bool, str]:
+    """
+    Check revealed fields up to the commitment root and, through the entry's
+    audit path, up to a root the caller already trusts
+
+    The commitment and root recorded in the disclosure are only compared
+    against the recomputed values, never trusted on their own.
+
+    Args:
+        disclosure: Output of :meth:`LogVerifier.disclose_fields`
+        expected_root: Hex root the proof must resolve to, e.g. the anchored
+                       or the published root
+
+    Returns:
+        Tuple of (verified, reason)
+    """
+    import hmac
+
+    if not expected_root:
+        return False, "No expected root to check the disclosure against"
+    try:
+        expected = bytes.fromhex(expected_root)
+    except (TypeError, ValueError):
+        return False, f"Expected root is not a hex digest: {expected_root!r}"
+    if not isinstance(disclosure, dict):
+        return False, "Malformed disclosure: expected a JSON object"
+    missing = [key for key in REQUIRED_KEYS if key not in disclosure]
+    if missing:
+        return False, f"Malformed disclosure: missing {', '.join(missing)}"
+    algorithm = disclosure["algorithm"]
+    if algorithm not in hashlib.algorithms_guaranteed:
+        return False, f"Malformed disclosure: unknown algorithm {algorithm!r}"
+
+    try:
+        commitment = commitment_root(disclosure)
+        claimed_commitment = bytes.fromhex(disclosure["commitment"])
+        claimed_root = bytes.fromhex(disclosure["root"])
+        root = resolve_audit_path(hash_leaf(commitment, algorithm), path_from_json(disclosure["path"]), algorithm)
+    except (AttributeError, KeyError, TypeError, ValueError, StopIteration) as e:
+        return False, f"Malformed disclosure: {e}"
+    if not hmac.compare_digest(commitment, claimed_commitment):
+        return False, "Revealed fields do not match the commitment"
+    if not hmac.compare_digest(root, claimed_root):
+        return False, "Audit path does not resolve to the disclosed root"
+    if not hmac.compare_digest(root, expected):
+        return False, f"Root mismatch: recomputed={root.hex()}, expected={expected_root}"
+    return True, "Revealed fields are included under the root"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for checking a disclosure"""
+    parser = argparse.ArgumentParser(description='Verify a selective disclosure of log fields')
+    sub = parser.add_subparsers(dest='command', required=True)
+    verify_parser = sub.add_parser('verify', help='Verify a disclosure file')
+    verify_parser.add_argument('disclosure', type=Path, help='Disclosure JSON produced by verify_log.py --disclose')
+    verify_parser.add_argument('--root', help='Expected Merkle root, e.g. the anchored root (default: the published root)')
+    verify_parser.add_argument('--logs-dir', type=Path, default=LOGS_DIR,
+                               help='Directory whose published root to check against when --root is not given')
+    args = parser.parse_args(argv)
+
+    try:
+        disclosure = json.loads(args.disclosure.read_text())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Cannot read {args.disclosure}: {e}")
+        return 1
+    expected_root = args.root
+    if not expected_root:
+        from publish import read_manifest
+
+        manifest = read_manifest(args.logs_dir / "roots")
+        if not manifest:
+            print(f"[ERROR] Nothing published under {args.logs_dir}; pass the expected root with --root")
+            return 1
+        expected_root = manifest["root"]
+    verified, reason = verify_disclosure(disclosure, expected_root)
+    for field in disclosure.get("fields", []) if isinstance(disclosure, dict) else []:
+        print(f"  {field['name']}: {json.dumps(field['value'])}")
+    print(f"{'✅' if verified else '❌'} {reason}")
+    return 0 if verified else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,67 +1,369 @@
+import argparse
 import os
+import shutil
 from pathlib import Path
-import hashlib
 import json
-from pymerkle import InmemoryTree as MerkleTree
+import time
 import sys
+from typing import Tuple
+
+from disclosure import LEAF_MODES, commit_events, load_key
+from metrics import Registry, get_registry
+import profiling
+from publish import (LockTimeout, atomic_file, atomic_write_text, build_lock, next_generation,
+                     publish_manifest, read_manifest)
+from tree_snapshot import SnapshotWriter, TreeSnapshot, hash_leaves, snapshot_name
 
 # Define the path to the logs directory
-logs_dir = Path(__file__).parent.parent / "logs"
-
-# Step 1: Read all .json log files
-json_files = [f for f in os.listdir(logs_dir) if f.endswith('.json')]
-
-if not json_files:
-    print("[ERROR] No log (.json) files found in logs/")
-    exit(1)
-
-# Step 2: Initialize the Merkle Tree
-tree = MerkleTree(algorithm='sha3_256')
-
-# Create directories for hashes and roots if they don't exist
-hashes_dir = logs_dir / "hashes"
-roots_dir = logs_dir / "roots"
-hashes_dir.mkdir(exist_ok=True)
-roots_dir.mkdir(exist_ok=True)
-
-included_logs = 0
-# Step 3: Loop through files and add each process entry to the tree
-for file_name in json_files:
-    file_path = logs_dir / file_name
-    # Parse JSON and add to Merkle tree
-    with open(file_path, "r", encoding="utf-8-sig") as f:
-        try:
-            processes = json.load(f)
-        except Exception as e:
-            print(f"[ERROR] Failed to parse {file_name}: {e}")
-            continue
-    for idx, process in enumerate(processes):
-        process_bytes = json.dumps(process, sort_keys=True).encode("utf-8")
-        tree.append_entry(process_bytes)
-        process_hash = hashlib.sha3_256(process_bytes).digest()
-        hash_file_name = f"{file_name.replace('.json', '')}_process_{idx}.hash"
-        hash_file_path = hashes_dir / hash_file_name
-        hash_file_path.write_text(process_hash.hex())
-    included_logs += 1
-
-if included_logs == 0:
-    print("[ERROR] No valid logs found. Merkle tree not built.")
-    sys.exit(1)
-
-# Step 4: Get the final Merkle Root
-root_bytes = tree.get_state()
-root_hex = root_bytes.hex()
-
-# Print the Merkle tree structure in the terminal
-print("\nMerkle Tree Structure:")
-print(f"Root: {root_hex}")
-print("Leaves:")
-for idx, leaf in enumerate(tree.leaves):
-    print(f"  {idx}: {leaf.digest.hex()}")
-
-# Step 5: Output and Save the Merkle Root
-print(f"Merkle Tree built successfully!\nMerkle Root: {root_hex}")
-
-root_file_path = roots_dir / "latest_merkle_root.txt"
-root_file_path.write_text(root_hex)
-print(f"Merkle root saved to: {root_file_path}")
\ No newline at end of file
+LOGS_DIR = Path(__file__).parent.parent / "logs"
+
+# Leaves listed by --verbose; larger trees are summarized
+VERBOSE_LEAVES = 16
+
+
+class _EmptyBuild(Exception):
+    """
+    Raised inside a build that hashed no entries, discarding its partial outputs
+    """
+    pass
+
+
+def canonicalize(process) -> bytes:
+    """Canonical byte encoding of a log entry (the Merkle leaf data)"""
+    return json.dumps(process, sort_keys=True).encode("utf-8")
+
+
+def leaf_entries(processes, canonical, leaf_mode: str = "event", key: bytes = None):
+    """
+    Merkle leaf data for log entries
+
+    Args:
+        processes: Log entries
+        canonical: Their canonical bytes, in the same order
+        leaf_mode: ``event`` commits to the whole entry, ``fields`` to the
+                   root of a salted per-field tree (see disclosure.py)
+        key: Disclosure key, required in ``fields`` mode
+
+    Returns:
+        List of leaf data, one per entry
+    """
+    if leaf_mode == "fields":
+        return commit_events(processes, canonical, key)
+    return list(canonical)
+
+
+def batch_id(generation: int) -> str:
+    """ID of the batch published as ``generation``"""
+    return f"{generation:08d}"
+
+
+def batch_paths(logs_dir: Path, batch: str) -> Tuple[Path, Path]:
+    """
+    Files making up a batch
+
+    Returns:
+        Tuple of (event stream with one canonical entry per line, proof metadata)
+    """
+    batches_dir = Path(logs_dir) / "batches"
+    return batches_dir / f"audit_batch_{batch}.jsonl", batches_dir / f"merkle_proof_{batch}.json"
+
+
+def hash_file_path(logs_dir: Path, manifest, file_name: str, idx: int) -> Path:
+    """
+    Stored ``.hash`` digest of entry ``idx`` of ``file_name``
+
+    Each generation's digests are published as one directory under
+    logs/hashes/ named by the manifest; older builds wrote them flat.
+    """
+    hashes_dir = Path(logs_dir) / "hashes"
+    if manifest and manifest.get("hashes"):
+        hashes_dir = hashes_dir / manifest["hashes"]
+    return hashes_dir / f"{file_name.replace('.json', '')}_process_{idx}.hash"
+
+
+def build(logs_dir: Path = LOGS_DIR, registry: Registry = None, lock_timeout: float = None,
+          leaf_mode: str = "event", anchor: bool = False, backpressure_wait: float = 0.0,
+          list_leaves: int = 0) -> int:
+    """
+    Hash every log entry under ``logs_dir``, build the Merkle tree and publish its root
+
+    Only one build per logs directory runs at a time; others wait for the lock.
+
+    Args:
+        logs_dir: Directory containing the exported *.json logs
+        registry: Metrics registry (in-memory only if not provided)
+        lock_timeout: Seconds to wait for a concurrent build (None waits forever)
+        leaf_mode: ``event`` or ``fields`` (per-field commitments for selective disclosure)
+        anchor: Queue the published root in the anchor queue
+        backpressure_wait: Seconds to wait before building while anchoring is stalled
+        list_leaves: Number of leading leaves to print with the root
+
+    Returns:
+        Process exit code
+    """
+    roots_dir = logs_dir / "roots"
+    roots_dir.mkdir(parents=True, exist_ok=True)
+    registry = registry or get_registry("builder", persist=False)
+    queue = None
+    if anchor:
+        from anchor_queue import AnchorQueue
+
+        queue = AnchorQueue(roots_dir)
+        _wait_for_anchoring(queue, registry, backpressure_wait)
+    try:
+        with build_lock(roots_dir, lock_timeout):
+            status = _build(logs_dir, registry, leaf_mode, list_leaves)
+        if status == 0 and queue is not None:
+            _enqueue_root(queue, roots_dir, registry)
+        return status
+    except LockTimeout:
+        print(f"[ERROR] Another build is still running (waited {lock_timeout}s for the build lock)")
+        return 1
+    finally:
+        if queue is not None:
+            queue.close()
+
+
+def _wait_for_anchoring(queue, registry: Registry, timeout: float):
+    """Hold off a new build while the anchor queue reports it is stalled"""
+    wait_seconds = registry.histogram("audit_anchor_wait_seconds", "Time builds waited on a stalled anchor queue")
+    pressure = queue.pressure()
+    if pressure["level"] != "stalled":
+        return
+    print(f"[WARN] Anchoring is stalled: {pressure['backlog']} roots waiting, oldest {pressure['oldest_seconds']:.0f}s, "
+          f"{pressure['failures']} consecutive failures")
+    if timeout > 0:
+        start = time.perf_counter()
+        pressure = queue.wait_for_capacity(timeout)
+        wait_seconds.observe(time.perf_counter() - start)
+        if pressure["level"] == "stalled":
+            print(f"[WARN] Still stalled after {timeout:.0f}s; building anyway (older queued roots are superseded)")
+
+
+def _enqueue_root(queue, roots_dir: Path, registry: Registry):
+    """Queue the just-published root for anchoring and report the backlog"""
+    backlog = registry.gauge("audit_anchor_backlog", "Roots queued but not yet anchored")
+    manifest = read_manifest(roots_dir)
+    status = queue.enqueue(manifest["root"], manifest["generation"])
+    pressure = queue.pressure()
+    backlog.set(pressure["backlog"])
+    print(f"Root queued for anchoring ({status}); anchor queue: {pressure['backlog']} waiting, "
+          f"{pressure['in_flight']} in flight ({pressure['level']})")
+
+
+def _build(logs_dir: Path, registry: Registry = None, leaf_mode: str = "event", list_leaves: int = 0) -> int:
+    """Build and publish while holding the build lock"""
+    # Pipeline metrics
+    registry = registry or get_registry("builder", persist=False)
+    stage_seconds = registry.histogram("audit_build_stage_seconds", "Time spent per builder stage", ("stage",))
+    build_seconds = registry.histogram("audit_build_duration_seconds", "Wall-clock duration of a full Merkle build")
+    events_ingested = registry.counter("audit_events_ingested_total", "Log events appended to the Merkle tree")
+    bytes_parsed = registry.counter("audit_bytes_parsed_total", "Bytes of JSON log exports parsed")
+    parse_errors = registry.counter("audit_parse_errors_total", "Log exports that failed to parse")
+    hash_rate = registry.gauge("audit_hashes_per_second", "Leaf hashing throughput of the last build")
+    tree_leaves = registry.gauge("audit_tree_leaves", "Number of leaves in the last built tree")
+    tree_depth = registry.gauge("audit_tree_depth", "Depth of the last built tree")
+
+    build_start = time.perf_counter()
+    hash_time = 0.0
+
+    # Step 1: Read all .json log files
+    json_files = [f for f in os.listdir(logs_dir) if f.endswith('.json')]
+
+    if not json_files:
+        print("[ERROR] No log (.json) files found in logs/")
+        return 1
+
+    # Create directories for hashes and roots if they don't exist
+    hashes_dir = logs_dir / "hashes"
+    roots_dir = logs_dir / "roots"
+    hashes_dir.mkdir(exist_ok=True)
+    roots_dir.mkdir(exist_ok=True)
+
+    key = load_key(logs_dir, create=True) if leaf_mode == "fields" else None
+    generation = next_generation(roots_dir)
+    batch = batch_id(generation)
+    events_path, proof_path = batch_paths(logs_dir, batch)
+    events_path.parent.mkdir(exist_ok=True)
+    # The .hash files are plain writes into a staging directory that is
+    # renamed into place just before the manifest publishes it; a failed
+    # build removes it, so readers never see a partial generation
+    hashes_path = hashes_dir / batch
+    hashes_staging = hashes_dir / f".{batch}.{os.getpid()}.tmp"
+    shutil.rmtree(hashes_staging, ignore_errors=True)
+    hashes_staging.mkdir()
+
+    included_files = []
+    try:
+        # Step 2: Stream the tree and the batch to disk. Each leaf is hashed once,
+        # as H(0x00 || data), and the same digest goes to the tree snapshot and to
+        # the staged .hash files; tree levels are built from the snapshot file, so
+        # memory does not grow with the number of leaves. The batch holds every
+        # leaf's canonical entry in tree order (in fields mode the leaves are
+        # commitment roots, so the leaf data cannot stand in for them).
+        snapshot_path = roots_dir / snapshot_name(generation)
+        with SnapshotWriter(snapshot_path, algorithm='sha3_256') as tree, \
+                atomic_file(events_path, "wb", durable=True) as batch_file:
+            # Step 3: Loop through files and add each process entry to the tree
+            for file_name in json_files:
+                file_path = logs_dir / file_name
+                # Parse JSON and add to Merkle tree
+                with stage_seconds.labels(stage="parse").time():
+                    with open(file_path, "r", encoding="utf-8-sig") as f:
+                        try:
+                            processes = json.load(f)
+                        except Exception as e:
+                            print(f"[ERROR] Failed to parse {file_name}: {e}")
+                            parse_errors.inc()
+                            continue
+                bytes_parsed.inc(file_path.stat().st_size)
+
+                with stage_seconds.labels(stage="canonicalize").time():
+                    entries = [canonicalize(process) for process in processes]
+
+                start = time.perf_counter()
+                with stage_seconds.labels(stage="commit").time():
+                    leaves = leaf_entries(processes, entries, leaf_mode, key)
+                with stage_seconds.labels(stage="hash").time():
+                    digests = hash_leaves(leaves, 'sha3_256')
+                hash_time += time.perf_counter() - start
+
+                with stage_seconds.labels(stage="write").time():
+                    tree.extend(digests)
+                    batch_file.writelines(line + b"\n" for line in entries)
+                    stem = file_name.replace('.json', '')
+                    for idx, process_hash in enumerate(digests):
+                        (hashes_staging / f"{stem}_process_{idx}.hash").write_text(process_hash.hex())
+                included_files.append({"name": file_name, "leaf_start": tree.size - len(entries),
+                                       "leaves": len(entries)})
+                events_ingested.inc(len(entries))
+
+            if not tree.size:
+                raise _EmptyBuild()
+
+            # Step 4: Build every tree level (nodes are H(0x01 || left || right)) and get the root
+            with stage_seconds.labels(stage="tree").time():
+                root_bytes = tree.finish()
+    except _EmptyBuild:
+        shutil.rmtree(hashes_staging, ignore_errors=True)
+        print("[ERROR] No valid logs found. Merkle tree not built.")
+        return 1
+    except BaseException:
+        shutil.rmtree(hashes_staging, ignore_errors=True)
+        raise
+    root_hex = root_bytes.hex()
+    size = tree.size
+    print(f"Tree snapshot saved to: {snapshot_path}")
+
+    # Summarize the Merkle tree in the terminal; leaves only on request, and
+    # never all of them (the snapshot holds every leaf)
+    print("\nMerkle Tree Structure:")
+    print(f"Root: {root_hex}")
+    print(f"Leaves: {size}")
+    if list_leaves:
+        with TreeSnapshot(snapshot_path) as snapshot:
+            for idx in range(min(size, list_leaves)):
+                print(f"  {idx}: {snapshot.leaf(idx).hex()}")
+        if size > list_leaves:
+            print(f"  ... {size - list_leaves} more")
+
+    # Step 5: Record the batch: leaf range, root and snapshot needed to re-derive
+    # and check the root from its event stream
+    with stage_seconds.labels(stage="batch").time():
+        atomic_write_text(proof_path, json.dumps({
+            "batch_id": batch,
+            "generation": generation,
+            "algorithm": 'sha3_256',
+            "leaf_mode": leaf_mode,
+            "leaf_start": 0,
+            "leaves": size,
+            "root": root_hex,
+            "events": events_path.name,
+            "snapshot": snapshot_path.name,
+            "files": included_files,
+        }, indent=2), durable=True)
+    print(f"Batch {batch} saved to: {events_path}")
+
+    # Step 6: Output and Publish the Merkle Root (manifest last: it commits the generation)
+    print(f"Merkle Tree built successfully!\nMerkle Root: {root_hex}")
+
+    root_file_path = roots_dir / "latest_merkle_root.txt"
+    atomic_write_text(root_file_path, root_hex, durable=True)
+    print(f"Merkle root saved to: {root_file_path}")
+
+    # Left behind by a build of this generation that died before publishing
+    shutil.rmtree(hashes_path, ignore_errors=True)
+    os.replace(hashes_staging, hashes_path)
+    publish_manifest(roots_dir, {
+        "generation": generation,
+        "root": root_hex,
+        "size": size,
+        "algorithm": 'sha3_256',
+        "leaf_mode": leaf_mode,
+        "snapshot": snapshot_path.name,
+        "batch": batch,
+        "hashes": hashes_path.name,
+        "files": included_files,
+    })
+    print(f"Published generation {generation}")
+    _prune(roots_dir, "tree-*.snapshot", keep={snapshot_name(generation), snapshot_name(generation - 1)})
+    kept_batches = {p.name for g in (generation, generation - 1) for p in batch_paths(logs_dir, batch_id(g))}
+    _prune(events_path.parent, "audit_batch_*.jsonl", keep=kept_batches)
+    _prune(events_path.parent, "merkle_proof_*.json", keep=kept_batches)
+    _prune(hashes_dir, "*.hash", keep=set())
+    _prune_dirs(hashes_dir, keep={batch, batch_id(generation - 1)})
+
+    elapsed = time.perf_counter() - build_start
+    build_seconds.observe(elapsed)
+    tree_leaves.set(size)
+    tree_depth.set((size - 1).bit_length())
+    if hash_time > 0:
+        hash_rate.set(size / hash_time)
+    print(f"Build stats: {size} events, depth {(size - 1).bit_length()}, "
+          f"{size / hash_time if hash_time else 0:.0f} hashes/sec, {elapsed:.3f}s")
+    return 0
+
+
+def _prune(directory: Path, pattern: str, keep: set):
+    """Remove superseded outputs; ones still open in a reader are retried next build"""
+    for path in directory.glob(pattern):
+        if path.name not in keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _prune_dirs(directory: Path, keep: set):
+    """Remove superseded .hash generations and staging directories of crashed builds"""
+    for path in directory.iterdir():
+        if path.is_dir() and path.name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    """Main entry point for the Merkle tree builder"""
+    parser = argparse.ArgumentParser(description="Hash log entries and build the Merkle tree")
+    parser.add_argument('--logs-dir', type=Path, default=LOGS_DIR, help='Directory containing the exported logs')
+    parser.add_argument('--lock-timeout', type=float, default=None,
+                        help='Seconds to wait for a concurrent build to finish (default: wait)')
+    parser.add_argument('--leaf-mode', choices=LEAF_MODES, default='event',
+                        help='Commit to whole entries (event) or to per-field trees for selective disclosure (fields)')
+    parser.add_argument('--anchor', action='store_true',
+                        help='Queue the published root for anchoring (see anchor_queue.py)')
+    parser.add_argument('--backpressure-wait', type=float, default=0.0,
+                        help='With --anchor: seconds to wait before building while anchoring is stalled')
+    parser.add_argument('--verbose', action='store_true',
+                        help=f'Also print the first {VERBOSE_LEAVES} leaf hashes')
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.start("hash_and_build_merkle", args.profile, args.logs_dir / "profiles")
+
+    # Pipeline metrics (persisted to logs/metrics/builder.json on exit)
+    return build(args.logs_dir, get_registry("builder", metrics_dir=args.logs_dir / "metrics"),
+                 args.lock_timeout, args.leaf_mode, args.anchor, args.backpressure_wait,
+                 VERBOSE_LEAVES if args.verbose else 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
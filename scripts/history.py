@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Operation History Module
+Append-only record of the pipeline commands run from the web interface,
+kept in a SQLite database in WAL mode (``logs/history.db``) so it survives
+reloads and is shared by every browser session.
+
+Each operation is one small row indexed by timestamp and by status; its
+captured output is stored compressed in a separate table and only read when
+an entry is opened. Per-status counts and durations are kept in a totals
+table updated in the same transaction as each insert, so summaries never
+scan the history, and pages are fetched by keyset (``id < cursor``) rather
+than by offset.
+
+Usage:
+    python scripts/history.py
+    python scripts/history.py --status Failed --limit 50
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+HISTORY_PATH = Path(__file__).parent.parent / "logs" / "history.db"
+STATUSES = ("Success", "Failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    command TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL,
+    output_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS operations_timestamp ON operations (timestamp);
+CREATE INDEX IF NOT EXISTS operations_status ON operations (status, id);
+CREATE TABLE IF NOT EXISTS outputs (
+    id INTEGER PRIMARY KEY REFERENCES operations (id),
+    output BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    status TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    seconds REAL NOT NULL
+);
+"""
+
+
+class OperationHistory:
+    """
+    Persistent operation history; one instance may be shared across threads
+    """
+
+    def __init__(self, path: Path = HISTORY_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; writes use explicit BEGIN IMMEDIATE transactions
+        self._db = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def record(self, command: str, output: str, status: str, duration: float, timestamp: float = None) -> int:
+        """
+        Append one operation
+
+        Args:
+            command: Command line that was run
+            output: Captured stdout and stderr
+            status: ``Success`` or ``Failed``
+            duration: Run time in seconds
+            timestamp: Start time (default: now)
+
+        Returns:
+            Id of the new entry
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        data = output.encode("utf-8", "replace")
+        with self._transaction() as db:
+            cursor = db.execute("INSERT INTO operations (timestamp, command, status, duration, output_size) "
+                                "VALUES (?, ?, ?, ?, ?)", (timestamp, command, status, duration, len(data)))
+            entry_id = cursor.lastrowid
+            db.execute("INSERT INTO outputs (id, output) VALUES (?, ?)", (entry_id, zlib.compress(data, 1)))
+            db.execute("INSERT INTO totals (status, count, seconds) VALUES (?, 1, ?) ON CONFLICT (status) "
+                       "DO UPDATE SET count = count + 1, seconds = seconds + excluded.seconds", (status, duration))
+        return entry_id
+
+    def page(self, status: Optional[str] = None, before: Optional[int] = None, limit: int = 20,
+             since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        One page of entries, newest first, without their output
+
+        Args:
+            status: Only entries with this status (default: all)
+            before: Keyset cursor; only entries with a smaller id (the last
+                    id of the previous page)
+            limit: Page size
+            since: Only entries started at or after this Unix time
+
+        Returns:
+            List of entry dictionaries
+        """
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        rows = self._query(f"SELECT * FROM operations {where}ORDER BY id DESC LIMIT ?", (*params, limit))
+        return [dict(row) for row in rows]
+
+    def output(self, entry_id: int) -> Optional[str]:
+        """Captured output of one entry, or None if it does not exist"""
+        rows = self._query("SELECT output FROM outputs WHERE id = ?", (entry_id,))
+        if not rows:
+            return None
+        return zlib.decompress(rows[0][0]).decode("utf-8", "replace")
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Precomputed count and total duration per status"""
+        return {row["status"]: {"count": row["count"], "seconds": row["seconds"]}
+                for row in self._query("SELECT * FROM totals")}
+
+    def count(self, status: Optional[str] = None) -> int:
+        """Number of entries, optionally of one status, from the totals"""
+        totals = self.totals()
+        if status is not None:
+            return int(totals.get(status, {}).get("count", 0))
+        return int(sum(t["count"] for t in totals.values()))
+
+    def clear(self):
+        """Delete every entry"""
+        with self._transaction() as db:
+            db.execute("DELETE FROM outputs")
+            db.execute("DELETE FROM operations")
+            db.execute("DELETE FROM totals")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for listing the operation history"""
+    parser = argparse.ArgumentParser(description='List operations run from the web interface')
+    parser.add_argument('--history', type=Path, default=HISTORY_PATH, help='History database')
+    parser.add_argument('--status', choices=STATUSES, help='Only entries with this status')
+    parser.add_argument('--limit', type=int, default=20, help='Number of entries (default: 20)')
+    parser.add_argument('--before', type=int, help='Only entries older than this id')
+    args = parser.parse_args(argv)
+
+    if not args.history.exists():
+        print(f"[ERROR] No history at {args.history}")
+        return 1
+    with OperationHistory(args.history) as history:
+        result = {"totals": history.totals(), "entries": history.page(args.status, args.before, args.limit)}
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+Lightweight counters, gauges and histograms shared by the builder, submitter
+and verifier, persisted per component under logs/metrics/ and exposed as a
+Prometheus-style text endpoint.
+
+Usage:
+    python scripts/metrics.py --port 9108     # serve /metrics
+    python scripts/metrics.py --dump          # print current exposition
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from publish import atomic_write_text, file_lock
+
+METRICS_DIR = Path(__file__).parent.parent / "logs" / "metrics"
+DEFAULT_PORT = int(os.environ.get("AUDIT_METRICS_PORT", "9108"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames: Tuple[str, ...], key: Tuple[str, ...],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class for a metric family keyed by label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, **labels):
+        return _Bound(self, _label_key(self.labelnames, labels))
+
+    def _unlabelled(self) -> Tuple[str, ...]:
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return ()
+
+
+class _Bound:
+    """A metric family bound to one set of label values"""
+
+    def __init__(self, metric: _Metric, key: Tuple[str, ...]):
+        self._metric = metric
+        self._key = key
+
+    def __getattr__(self, attr):
+        method = getattr(self._metric, f"_{attr}")
+        return lambda *args, **kwargs: method(self._key, *args, **kwargs)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, accumulated across runs"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1):
+        self._inc(self._unlabelled(), amount)
+
+    def _inc(self, key, amount: float = 1):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _merge(self, key, value):
+        self._inc(key, value)
+
+
+class Gauge(_Metric):
+    """Last observed value"""
+
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._set(self._unlabelled(), value)
+
+    def _set(self, key, value: float):
+        with self._lock:
+            self._values[key] = value
+
+    def _merge(self, key, value):
+        self._set(key, value)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations (cumulative on render)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float):
+        self._observe(self._unlabelled(), value)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        with self._time(self._unlabelled()):
+            yield
+
+    def _observe(self, key, value: float):
+        with self._lock:
+            state = self._values.setdefault(
+                key, {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            else:
+                state["counts"][-1] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def _time(self, key) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe(key, time.perf_counter() - start)
+
+    def _merge(self, key, value):
+        with self._lock:
+            state = self._values.setdefault(
+                key, {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            )
+            if len(value["counts"]) != len(state["counts"]):
+                logger.warning(f"Bucket layout changed for {self.name}; dropping stored counts")
+                return
+            state["counts"] = [a + b for a, b in zip(state["counts"], value["counts"])]
+            state["sum"] += value["sum"]
+            state["count"] += value["count"]
+
+
+class Registry:
+    """
+    Collection of metrics for one component (builder, submitter, verifier, app)
+    """
+
+    def __init__(self, component: str, metrics_dir: Path = None):
+        self.component = component
+        self.metrics_dir = Path(metrics_dir) if metrics_dir else METRICS_DIR
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, tuple(labelnames), **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def to_dict(self) -> Dict[str, Any]:
+        metrics = {}
+        for name, metric in self._metrics.items():
+            with metric._lock:
+                entry = {
+                    "type": metric.kind,
+                    "help": metric.documentation,
+                    "labels": list(metric.labelnames),
+                    "samples": [
+                        {"labels": list(key), "value": json.loads(json.dumps(value))}
+                        for key, value in metric._values.items()
+                    ],
+                }
+            if isinstance(metric, Histogram):
+                entry["buckets"] = list(metric.buckets)
+            metrics[name] = entry
+        return {"component": self.component, "updated": datetime.now().isoformat(), "metrics": metrics}
+
+    def merge_dict(self, data: Dict[str, Any]):
+        """Fold a stored snapshot into this registry"""
+        for name, entry in data.get("metrics", {}).items():
+            labelnames = tuple(entry.get("labels", ()))
+            kind = entry.get("type")
+            if kind == "counter":
+                metric = self.counter(name, entry.get("help", ""), labelnames)
+            elif kind == "gauge":
+                metric = self.gauge(name, entry.get("help", ""), labelnames)
+            elif kind == "histogram":
+                metric = self.histogram(name, entry.get("help", ""), labelnames,
+                                        tuple(entry.get("buckets", DEFAULT_BUCKETS)))
+            else:
+                continue
+            for sample in entry.get("samples", []):
+                metric._merge(tuple(sample["labels"]), sample["value"])
+
+    @property
+    def path(self) -> Path:
+        return self.metrics_dir / f"{self.component}.json"
+
+    def save(self):
+        """Merge with the stored snapshot for this component and write it atomically"""
+        try:
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+            # Concurrent runs of the same component must not lose each other's counts
+            with file_lock(self.metrics_dir / f".{self.component}.lock", timeout=10):
+                merged = Registry(self.component, self.metrics_dir)
+                stored = _read_snapshot(self.path)
+                if stored:
+                    merged.merge_dict(stored)
+                merged.merge_dict(self.to_dict())
+                atomic_write_text(self.path, json.dumps(merged.to_dict(), indent=2))
+        except Exception as e:
+            logger.warning(f"Failed to save metrics for {self.component}: {e}")
+
+    def render(self) -> str:
+        """Render the Prometheus text exposition format"""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            with metric._lock:
+                items = sorted(metric._values.items())
+            for key, value in items:
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), value["counts"]):
+                        cumulative += count
+                        le = ("le", _format_value(bound))
+                        lines.append(f"{name}_bucket{_format_labels(metric.labelnames, key, le)} {cumulative}")
+                    labels = _format_labels(metric.labelnames, key)
+                    lines.append(f"{name}_sum{labels} {_format_value(value['sum'])}")
+                    lines.append(f"{name}_count{labels} {value['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable metrics snapshot {path}: {e}")
+        return None
+
+
+def get_registry(component: str, persist: bool = True, metrics_dir: Path = None) -> Registry:
+    """
+    Create the registry for a pipeline component
+
+    Args:
+        component: Component name (builder, submitter, verifier, app)
+        persist: Save the run's metrics to logs/metrics/<component>.json on exit
+        metrics_dir: Override the metrics directory
+
+    Returns:
+        Registry for this process
+    """
+    registry = Registry(component, metrics_dir)
+    if persist:
+        atexit.register(registry.save)
+    return registry
+
+
+def load_all(metrics_dir: Path = None) -> Dict[str, Dict[str, Any]]:
+    """Load every stored component snapshot"""
+    metrics_dir = Path(metrics_dir) if metrics_dir else METRICS_DIR
+    snapshots = {}
+    if metrics_dir.exists():
+        for path in sorted(metrics_dir.glob("*.json")):
+            data = _read_snapshot(path)
+            if data:
+                snapshots[data.get("component", path.stem)] = data
+    return snapshots
+
+
+def render_all(metrics_dir: Path = None, live: List[Registry] = ()) -> str:
+    """Render stored snapshots plus any in-process registries as one exposition"""
+    combined = Registry("all", metrics_dir)
+    for data in load_all(metrics_dir).values():
+        combined.merge_dict(data)
+    for registry in live:
+        combined.merge_dict(registry.to_dict())
+    return combined.render()
+
+
+def summarize(metrics_dir: Path = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Flatten stored snapshots into per-metric summaries for display
+
+    Returns:
+        Mapping of ``metric{labels}`` to value (counters, gauges) or
+        ``{"count", "sum", "mean"}`` (histograms)
+    """
+    combined = Registry("all", metrics_dir)
+    for data in load_all(metrics_dir).values():
+        combined.merge_dict(data)
+    summary = {}
+    for name, entry in combined.to_dict()["metrics"].items():
+        for sample in entry["samples"]:
+            label = _format_labels(tuple(entry["labels"]), tuple(sample["labels"]))
+            value = sample["value"]
+            if entry["type"] == "histogram":
+                count = value["count"]
+                value = {"count": count, "sum": value["sum"],
+                         "mean": value["sum"] / count if count else 0.0}
+            summary[f"{name}{label}"] = value
+    return summary
+
+
+def start_server(port: int = DEFAULT_PORT, host: str = "127.0.0.1",
+                 live: List[Registry] = ()):
+    """
+    Serve /metrics on a daemon thread
+
+    Args:
+        port: TCP port to listen on
+        host: Interface to bind (local only by default)
+        live: In-process registries to include alongside stored snapshots
+
+    Returns:
+        The running server
+    """
+    # Deferred so the pipeline scripts don't pay for http.server at startup
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    live = list(live)
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_all(live=live).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """Main entry point for the metrics endpoint"""
+    parser = argparse.ArgumentParser(description='Serve pipeline metrics in Prometheus text format')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--dump', action='store_true', help='Print the current exposition and exit')
+    args = parser.parse_args()
+
+    if args.dump:
+        print(render_all(), end="")
+        return 0
+
+    server = start_server(args.port, args.host)
+    print(f"Serving metrics on http://{args.host}:{args.port}/metrics")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
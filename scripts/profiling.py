@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Profiling Module
+Opt-in cProfile or stack-sampling hooks for the pipeline entry points.
+Profiles are written under logs/profiles/ together with a JSON summary of
+the hottest functions so the History page can list them.
+
+Enable with ``--profile`` (cProfile), ``--profile sample`` (sampling
+profiler, collapsed stacks for flamegraph tools) or by setting the
+``AUDIT_PROFILE`` environment variable to ``cprofile`` or ``sample``.
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from publish import atomic_write_text
+
+PROFILES_DIR = Path(__file__).parent.parent / "logs" / "profiles"
+ENV_VAR = "AUDIT_PROFILE"
+INTERVAL_ENV_VAR = "AUDIT_PROFILE_INTERVAL"
+MODES = ("cprofile", "sample")
+TOP_N = 25
+
+logger = logging.getLogger(__name__)
+
+
+def add_profile_argument(parser: argparse.ArgumentParser):
+    """Add the common ``--profile [cprofile|sample]`` option to a CLI"""
+    parser.add_argument(
+        '--profile', nargs='?', const='cprofile', choices=MODES,
+        default=os.environ.get(ENV_VAR) or None,
+        help=f'Profile this run into logs/profiles/ (default mode: cprofile; env: {ENV_VAR})'
+    )
+
+
+class _Sampler:
+    """
+    Periodically samples the main thread's stack from a background thread
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._target = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class ProfileSession:
+    """
+    A running profile that is saved to logs/profiles/ when stopped
+    """
+
+    def __init__(self, name: str, mode: str, profiles_dir: Path = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {MODES}")
+        self.name = name
+        self.mode = mode
+        self.profiles_dir = Path(profiles_dir) if profiles_dir else PROFILES_DIR
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+        self._stopped = False
+        if mode == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            interval = float(os.environ.get(INTERVAL_ENV_VAR, "0.005"))
+            self._profiler = _Sampler(interval)
+            self._profiler.start()
+
+    def stop(self) -> Optional[Path]:
+        """
+        Stop profiling and write the profile plus its summary
+
+        Returns:
+            Path of the JSON summary, or None if already stopped or saving failed
+        """
+        if self._stopped:
+            return None
+        self._stopped = True
+        duration = time.perf_counter() - self._start
+        try:
+            self.profiles_dir.mkdir(parents=True, exist_ok=True)
+            stem = f"{self.name}_{self.started.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+            if self.mode == "cprofile":
+                self._profiler.disable()
+                profile_path = self.profiles_dir / f"{stem}.prof"
+                self._profiler.dump_stats(str(profile_path))
+                top, total = _cprofile_top(self._profiler)
+            else:
+                self._profiler.stop()
+                profile_path = self.profiles_dir / f"{stem}.folded"
+                with open(profile_path, "w", encoding="utf-8") as f:
+                    for stack, count in self._profiler.stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+                top, total = _sample_top(self._profiler.stacks, self._profiler.interval)
+
+            summary = {
+                "name": self.name,
+                "mode": self.mode,
+                "started": self.started.isoformat(),
+                "duration": round(duration, 6),
+                "command": " ".join(sys.argv),
+                "profile_file": profile_path.name,
+                "total": total,
+                "top": top,
+            }
+            summary_path = self.profiles_dir / f"{stem}.json"
+            atomic_write_text(summary_path, json.dumps(summary, indent=2))
+            print(f"Profile saved to: {profile_path}")
+            return summary_path
+        except Exception as e:
+            logger.warning(f"Failed to save profile for {self.name}: {e}")
+            return None
+
+
+def _cprofile_top(profiler) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Hottest functions by self time from a cProfile run"""
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{func} ({Path(filename).name}:{line})",
+            "calls": nc,
+            "self_seconds": round(tt, 6),
+            "total_seconds": round(ct, 6),
+        })
+    rows.sort(key=lambda r: r["self_seconds"], reverse=True)
+    return rows[:TOP_N], {"calls": stats.total_calls, "seconds": round(stats.total_tt, 6)}
+
+
+def _sample_top(stacks: Counter, interval: float) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Hottest functions by self samples from collapsed stacks"""
+    self_samples: Counter = Counter()
+    total_samples: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            total_samples[frame] += count
+    rows = [
+        {
+            "function": function,
+            "calls": None,
+            "self_seconds": round(count * interval, 6),
+            "total_seconds": round(total_samples[function] * interval, 6),
+        }
+        for function, count in self_samples.most_common(TOP_N)
+    ]
+    samples = sum(stacks.values())
+    return rows, {"samples": samples, "seconds": round(samples * interval, 6)}
+
+
+def start(name: str, mode: Optional[str], profiles_dir: Path = None) -> Optional[ProfileSession]:
+    """
+    Start profiling the current process until it exits
+
+    Args:
+        name: Entry point name used in the profile file name
+        mode: ``cprofile``, ``sample`` or None to do nothing
+        profiles_dir: Override the profiles directory
+
+    Returns:
+        The running session, or None when profiling is disabled
+    """
+    if not mode:
+        return None
+    if mode not in MODES:
+        logger.warning(f"Ignoring unknown profile mode {mode!r} (expected one of {MODES})")
+        return None
+    session = ProfileSession(name, mode, profiles_dir)
+    atexit.register(session.stop)
+    return session
+
+
+def list_profiles(profiles_dir: Path = None, limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Load profile summaries, newest first
+
+    Args:
+        profiles_dir: Override the profiles directory
+        limit: Maximum number of summaries to return
+
+    Returns:
+        List of summary dictionaries
+    """
+    profiles_dir = Path(profiles_dir) if profiles_dir else PROFILES_DIR
+    if not profiles_dir.exists():
+        return []
+    paths = sorted(profiles_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    summaries = []
+    for path in paths[:limit]:
+        try:
+            summaries.append(json.loads(path.read_text()))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable profile summary {path}: {e}")
+    return summaries
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Publication Module
+Exclusive build locking and atomic publication of build outputs. Every file
+is written to a temporary sibling and moved into place with ``os.replace``,
+so readers never see a torn root, digest or manifest. ``manifest.json`` is
+written last and carries a monotonically increasing generation counter that
+readers can use to detect a new root cheaply.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+ROOTS_DIR = Path(__file__).parent.parent / "logs" / "roots"
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".build.lock"
+
+# Windows refuses to replace a file another process has open; retry briefly
+_REPLACE_RETRIES = 10
+_REPLACE_DELAY = 0.05
+
+
+class LockTimeout(Exception):
+    """
+    Raised when a lock cannot be acquired within the timeout
+    """
+    pass
+
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Path, timeout: Optional[float] = None, poll: float = 0.1) -> Iterator[None]:
+    """
+    Hold an exclusive inter-process lock on ``path``
+
+    Args:
+        path: Lock file (created if missing)
+        timeout: Seconds to wait, or None to wait forever
+        poll: Seconds between attempts
+
+    Raises:
+        LockTimeout: if the lock is still held by another process after ``timeout``
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    f = open(path, "a+b")
+    try:
+        while True:
+            try:
+                _try_lock(f)
+                break
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeout(f"Timed out after {timeout}s waiting for {path}")
+                time.sleep(poll)
+        try:
+            yield
+        finally:
+            try:
+                _unlock(f)
+            except OSError:
+                pass
+    finally:
+        f.close()
+
+
+def build_lock(roots_dir: Path = ROOTS_DIR, timeout: Optional[float] = None):
+    """Exclusive lock serializing builds that publish into ``roots_dir``"""
+    return file_lock(Path(roots_dir) / LOCK_NAME, timeout)
+
+
+def _replace(src: Path, dst: Path):
+    for attempt in range(_REPLACE_RETRIES):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == _REPLACE_RETRIES - 1:
+                raise
+            time.sleep(_REPLACE_DELAY)
+
+
+@contextmanager
+def atomic_file(path: Path, mode: str = "wb", durable: bool = False, **kwargs) -> Iterator[Any]:
+    """
+    Open a temporary sibling of ``path`` that replaces it on successful exit
+
+    Args:
+        path: Final destination
+        mode: File mode for the temporary file
+        durable: fsync before publishing
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        _replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes, durable: bool = False):
+    """Atomically replace ``path`` with ``data``"""
+    with atomic_file(path, "wb", durable) as f:
+        f.write(data)
+
+
+def atomic_write_text(path: Path, text: str, durable: bool = False):
+    """Atomically replace ``path`` with ``text`` (UTF-8)"""
+    atomic_write_bytes(path, text.encode("utf-8"), durable)
+
+
+_manifest_cache: Dict[Path, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+
+
+def read_manifest(roots_dir: Path = ROOTS_DIR) -> Optional[Dict[str, Any]]:
+    """
+    Current published manifest, re-read only when the file changes
+
+    Returns:
+        Manifest dictionary, or None if nothing has been published
+    """
+    path = Path(roots_dir) / MANIFEST_NAME
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _manifest_cache.pop(path, None)
+        return None
+    # os.replace gives every publication a new file, so the inode changes even
+    # when two publications land within the same mtime tick
+    token = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _manifest_cache.get(path)
+    if cached and cached[0] == token:
+        return cached[1]
+    manifest = json.loads(path.read_text())
+    _manifest_cache[path] = (token, manifest)
+    return manifest
+
+
+def read_generation(roots_dir: Path = ROOTS_DIR) -> int:
+    """Generation of the current manifest (0 if nothing has been published)"""
+    manifest = read_manifest(roots_dir)
+    return manifest["generation"] if manifest else 0
+
+
+def next_generation(roots_dir: Path = ROOTS_DIR) -> int:
+    """Generation the next publication will carry; call while holding :func:`build_lock`"""
+    return read_generation(roots_dir) + 1
+
+
+def publish_manifest(roots_dir: Path, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Publish a new generation; call while holding :func:`build_lock`
+
+    Args:
+        roots_dir: Directory holding the manifest
+        manifest: Build outputs to record (generation from :func:`next_generation`,
+                  root, size, snapshot, ...)
+
+    Returns:
+        The published manifest
+    """
+    manifest = dict(manifest)
+    if manifest.get("generation") != next_generation(roots_dir):
+        raise ValueError("Manifest generation is stale; was the build lock held?")
+    manifest["published"] = datetime.now().isoformat()
+    atomic_write_text(Path(roots_dir) / MANIFEST_NAME, json.dumps(manifest, indent=2), durable=True)
+    return manifest
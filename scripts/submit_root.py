@@ -1,75 +1,268 @@
 # scripts/submit_root.py
 # The final, correct version using the latest solders.transaction and solders.message
 
+import argparse
 import json
+import sys
+import time
 from pathlib import Path
 
-from solana.rpc.api import Client
-from solders.transaction import Transaction
-from solders.message import Message
-from solders.instruction import Instruction, AccountMeta
-from solders.keypair import Keypair
-from solders.pubkey import Pubkey
-from solders.system_program import ID as SYSTEM_PROGRAM_ID
+from metrics import Registry, get_registry
+import profiling
 
-# --- 1. Load Configuration and Connect ---
+SCRIPTS_DIR = Path(__file__).parent
+RPC_URL = "http://127.0.0.1:8899"
+WALLET_PATH = SCRIPTS_DIR / "wallet.json"
+IDL_PATH = SCRIPTS_DIR / "idl.json"
+ROOT_PATH = SCRIPTS_DIR.parent / "logs" / "roots" / "latest_merkle_root.txt"
 
-http_client = Client("http://127.0.0.1:8899")
+SUBMIT_ROOT_DISCRIMINATOR = bytes([15, 86, 198, 221, 22, 34, 184, 178])
 
-wallet_path = Path(__file__).parent / "wallet.json"
-with open(wallet_path, "r") as f:
-    keypair_data = json.load(f)
-wallet_keypair = Keypair.from_bytes(bytes(keypair_data))
+# RootAccount: 8-byte Anchor discriminator, root [u8; 32], timestamp i64, user Pubkey
+ROOT_ACCOUNT_SIZE = 8 + 32 + 8 + 32
 
-idl_path = Path(__file__).parent / "idl.json"
-with open(idl_path, "r") as f:
-    idl = json.load(f)
-program_id = Pubkey.from_string(idl["address"])
 
-# --- 2. Prepare Instruction Data ---
+def load_wallet(wallet_path: Path = WALLET_PATH):
+    """Load the fee-payer keypair from a Solana CLI wallet file"""
+    from solders.keypair import Keypair
 
-root_path = Path(__file__).parent.parent / "logs" / "roots" / "latest_merkle_root.txt"
-if not root_path.exists():
-    raise FileNotFoundError("latest_merkle_root.txt not found. Please run build_merkle.py first.")
-root_hex = root_path.read_text().strip()
-root_bytes = bytes.fromhex(root_hex)
+    with open(wallet_path, "r") as f:
+        keypair_data = json.load(f)
+    return Keypair.from_bytes(bytes(keypair_data))
 
-submit_root_discriminator = bytes([15, 86, 198, 221, 22, 34, 184, 178])
-instruction_data = submit_root_discriminator + root_bytes
 
-# --- 3. Define Accounts and Instruction ---
+def load_program_id(idl_path: Path = IDL_PATH):
+    """Read the program address from the Anchor IDL"""
+    from solders.pubkey import Pubkey
 
-(pda, _bump) = Pubkey.find_program_address(
-    seeds=[b"merkle", bytes(wallet_keypair.pubkey())],
-    program_id=program_id
-)
+    with open(idl_path, "r") as f:
+        idl = json.load(f)
+    return Pubkey.from_string(idl["address"])
 
-accounts = [
-    AccountMeta(pubkey=pda, is_signer=False, is_writable=True),
-    AccountMeta(pubkey=wallet_keypair.pubkey(), is_signer=True, is_writable=True),
-    AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
-]
 
-instruction = Instruction(
-    program_id=program_id,
-    data=instruction_data,
-    accounts=accounts,
-)
+def read_root(root_path: Path = ROOT_PATH) -> bytes:
+    """Read the latest Merkle root produced by the builder"""
+    if not root_path.exists():
+        raise FileNotFoundError("latest_merkle_root.txt not found. Please run build_merkle.py first.")
+    root_hex = root_path.read_text().strip()
+    return bytes.fromhex(root_hex)
 
-# --- 4. Create and Send the Transaction (Solders way) ---
 
-# Step 4a: Fetch a recent blockhash
-recent_blockhash = http_client.get_latest_blockhash().value.blockhash
+def root_account_address(user_pubkey, program_id):
+    """PDA holding the latest root anchored by ``user_pubkey``"""
+    from solders.pubkey import Pubkey
 
-# Step 4b: Build the message
-message = Message([instruction], wallet_keypair.pubkey())
+    (pda, _bump) = Pubkey.find_program_address(
+        seeds=[b"merkle", bytes(user_pubkey)],
+        program_id=program_id
+    )
+    return pda
 
-# Step 4c: Create the transaction
-transaction = Transaction([wallet_keypair], message, recent_blockhash)
 
-# Step 4d: Send the transaction
-print("Submitting Merkle root...")
-response = http_client.send_raw_transaction(bytes(transaction))
-tx_signature = response.value
+def build_instruction(wallet_keypair, program_id, root_bytes: bytes):
+    """Build the ``submit_root`` instruction for the wallet's PDA"""
+    from solders.instruction import Instruction, AccountMeta
+    from solders.system_program import ID as SYSTEM_PROGRAM_ID
 
-print(f"Merkle root submitted successfully! Transaction signature: {tx_signature}")
\ No newline at end of file
+    instruction_data = SUBMIT_ROOT_DISCRIMINATOR + root_bytes
+
+    pda = root_account_address(wallet_keypair.pubkey(), program_id)
+
+    accounts = [
+        AccountMeta(pubkey=pda, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=wallet_keypair.pubkey(), is_signer=True, is_writable=True),
+        AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+
+    return Instruction(
+        program_id=program_id,
+        data=instruction_data,
+        accounts=accounts,
+    )
+
+
+def sign_root_transaction(wallet_keypair, program_id, root_bytes: bytes, recent_blockhash):
+    """Sign a single-instruction transaction anchoring ``root_bytes`` with ``recent_blockhash``"""
+    from solders.message import Message
+    from solders.transaction import Transaction
+
+    instruction = build_instruction(wallet_keypair, program_id, root_bytes)
+    message = Message([instruction], wallet_keypair.pubkey())
+    return Transaction([wallet_keypair], message, recent_blockhash)
+
+
+def submit_root(rpc_url: str = RPC_URL, wallet_path: Path = WALLET_PATH, idl_path: Path = IDL_PATH,
+                root_path: Path = ROOT_PATH, registry: Registry = None):
+    """
+    Anchor the latest Merkle root on Solana and wait for confirmation
+
+    Args:
+        rpc_url: Solana JSON-RPC endpoint
+        wallet_path: Fee-payer wallet file
+        idl_path: Anchor IDL of the audit program
+        root_path: File holding the hex Merkle root
+        registry: Metrics registry (in-memory only if not provided)
+
+    Returns:
+        Transaction signature
+    """
+    from solana.rpc.api import Client
+
+    registry = registry or get_registry("submitter", persist=False)
+    rpc_latency = registry.histogram("audit_rpc_latency_seconds", "Solana RPC call latency", ("method",))
+    submissions = registry.counter("audit_submissions_total", "Merkle root submissions by outcome", ("status",))
+
+    # --- 1. Load Configuration and Connect ---
+
+    http_client = Client(rpc_url)
+    wallet_keypair = load_wallet(wallet_path)
+    program_id = load_program_id(idl_path)
+
+    # --- 2. Prepare Instruction Data ---
+
+    root_bytes = read_root(root_path)
+
+    # --- 3. Create and Send the Transaction (Solders way) ---
+
+    # Step 3a: Fetch a recent blockhash
+    with rpc_latency.labels(method="getLatestBlockhash").time():
+        blockhash_resp = http_client.get_latest_blockhash()
+    recent_blockhash = blockhash_resp.value.blockhash
+
+    # Step 3b: Build and sign the transaction
+    transaction = sign_root_transaction(wallet_keypair, program_id, root_bytes, recent_blockhash)
+
+    # Step 3c: Send the transaction
+    print("Submitting Merkle root...")
+    try:
+        with rpc_latency.labels(method="sendTransaction").time():
+            response = http_client.send_raw_transaction(bytes(transaction))
+    except Exception:
+        submissions.labels(status="failed").inc()
+        raise
+    tx_signature = response.value
+    submissions.labels(status="sent").inc()
+
+    print(f"Merkle root submitted successfully! Transaction signature: {tx_signature}")
+
+    # Step 3d: Wait for confirmation
+    start = time.perf_counter()
+    try:
+        http_client.confirm_transaction(
+            tx_signature, last_valid_block_height=blockhash_resp.value.last_valid_block_height
+        )
+        submissions.labels(status="confirmed").inc()
+        print(f"Transaction confirmed in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        submissions.labels(status="unconfirmed").inc()
+        print(f"[WARN] Transaction not confirmed: {e}")
+    finally:
+        rpc_latency.labels(method="confirmTransaction").observe(time.perf_counter() - start)
+
+    return tx_signature
+
+
+def fetch_anchored_root(rpc_url: str = RPC_URL, wallet_path: Path = WALLET_PATH, idl_path: Path = IDL_PATH,
+                        registry: Registry = None):
+    """
+    Read the root most recently anchored by the wallet from its PDA
+
+    Args:
+        rpc_url: Solana JSON-RPC endpoint
+        wallet_path: Wallet whose PDA to read
+        idl_path: Anchor IDL of the audit program
+        registry: Metrics registry (in-memory only if not provided)
+
+    Returns:
+        Dictionary with the hex root, on-chain timestamp, user and PDA,
+        or None if the wallet has not anchored a root yet
+    """
+    from solana.rpc.api import Client
+    from solders.pubkey import Pubkey
+
+    registry = registry or get_registry("submitter", persist=False)
+    rpc_latency = registry.histogram("audit_rpc_latency_seconds", "Solana RPC call latency", ("method",))
+
+    wallet_keypair = load_wallet(wallet_path)
+    pda = root_account_address(wallet_keypair.pubkey(), load_program_id(idl_path))
+    with rpc_latency.labels(method="getAccountInfo").time():
+        account = Client(rpc_url).get_account_info(pda).value
+    if account is None:
+        return None
+    data = bytes(account.data)
+    if len(data) < ROOT_ACCOUNT_SIZE:
+        raise ValueError(f"Root account {pda} holds {len(data)} bytes, expected {ROOT_ACCOUNT_SIZE}")
+    return {
+        "root": data[8:40].hex(),
+        "timestamp": int.from_bytes(data[40:48], "little", signed=True),
+        "user": str(Pubkey.from_bytes(data[48:80])),
+        "account": str(pda),
+    }
+
+
+def submit_queued(rpc_url: str = RPC_URL, wallet_path: Path = WALLET_PATH, idl_path: Path = IDL_PATH,
+                  root_path: Path = ROOT_PATH, registry: Registry = None, wait: float = 60.0) -> int:
+    """
+    Queue the latest Merkle root in the anchor queue and drain it for up to ``wait`` seconds
+
+    A root that is not confirmed in time stays queued; the next submission
+    or ``anchor_queue.py run`` picks it up again.
+
+    Returns:
+        Process exit code
+    """
+    from anchor_queue import AnchorQueue, Anchorer
+    from publish import read_manifest
+
+    root_hex = read_root(root_path).hex()
+    manifest = read_manifest(root_path.parent)
+    generation = manifest["generation"] if manifest and manifest.get("root") == root_hex else None
+
+    with AnchorQueue(root_path.parent) as queue:
+        status = queue.enqueue(root_hex, generation)
+        if status in ("pending", "sent"):
+            print("Submitting Merkle root...")
+            Anchorer(queue, rpc_url, wallet_path, idl_path, registry).run(root=root_hex, timeout=wait)
+        entry = queue.get(root_hex)
+        pressure = queue.pressure()
+
+    if entry["status"] == "confirmed":
+        print(f"Merkle root submitted successfully! Transaction signature: {entry['signature']}")
+    elif entry["status"] == "superseded":
+        print(f"Merkle root superseded by newer root {entry['superseded_by']}, which covers the same logs")
+    else:
+        print(f"[ERROR] Merkle root not confirmed after {wait:.0f}s "
+              f"({entry['sends']} transactions sent, last error: {entry['last_error']}). "
+              f"It stays queued; submit again or run anchor_queue.py run to keep retrying.")
+    if pressure["backlog"]:
+        print(f"Anchor queue: {pressure['backlog']} roots waiting, oldest {pressure['oldest_seconds']:.0f}s "
+              f"({pressure['level']})")
+    return 0 if entry["status"] in ("confirmed", "superseded") else 1
+
+
+def main(argv=None) -> int:
+    """Main entry point for root submission"""
+    parser = argparse.ArgumentParser(description="Submit the latest Merkle root to Solana")
+    parser.add_argument('--rpc-url', default=RPC_URL, help=f'Solana JSON-RPC endpoint (default: {RPC_URL})')
+    parser.add_argument('--wallet', type=Path, default=WALLET_PATH, help='Fee-payer wallet file')
+    parser.add_argument('--idl', type=Path, default=IDL_PATH, help='Anchor IDL of the audit program')
+    parser.add_argument('--root-file', type=Path, default=ROOT_PATH, help='File holding the hex Merkle root')
+    parser.add_argument('--wait', type=float, default=60.0,
+                        help='Seconds to keep retrying before leaving the root queued (default: 60)')
+    parser.add_argument('--direct', action='store_true',
+                        help='Send once without the anchor queue (no retries)')
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    # The root file lives in <logs>/roots/; profiles go next to it like the builder's
+    profiling.start("submit_root", args.profile, args.root_file.parent.parent / "profiles")
+
+    # Pipeline metrics (persisted to <logs>/metrics/submitter.json on exit)
+    registry = get_registry("submitter", metrics_dir=args.root_file.parent.parent / "metrics")
+    if args.direct:
+        submit_root(args.rpc_url, args.wallet, args.idl, args.root_file, registry)
+        return 0
+    return submit_queued(args.rpc_url, args.wallet, args.idl, args.root_file, registry, args.wait)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
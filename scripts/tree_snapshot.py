@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Tree Snapshot Module
+Immutable on-disk snapshot of every Merkle tree level, written by the builder
+and memory-mapped read-only by verifiers and the UI. Answering "root",
+"leaf i" and "audit path for i" needs no parsing and no tree rebuild, and
+every reader of the same file shares the OS page cache.
+
+File layout (little-endian):
+    header      MAGIC, version, digest size, flags, leaf count, level count,
+                algorithm name
+    level table (offset, count) per level, leaves first, root last
+    levels      contiguous ``count * digest_size`` byte arrays
+
+Levels are built pairwise with ``H(0x01 || left || right)`` and an unpaired
+last node is promoted unchanged, which yields the same root as pymerkle's
+RFC 9162 tree over the same leaf digests.
+
+Each build publishes a new generation-numbered snapshot file (readers keep
+their mapping of the old one until they close it); ``manifest.json`` names
+the current one.
+
+:class:`SnapshotWriter` builds the same file in external memory: leaves are
+appended as they are hashed and each parent level is computed by streaming
+pairs from the level below it on disk, so building and proving never hold
+more than a fixed-size buffer of digests in RAM.
+
+Usage:
+    python scripts/tree_snapshot.py root
+    python scripts/tree_snapshot.py proof 42
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from publish import ROOTS_DIR, atomic_file, read_manifest
+
+MAGIC = b"MRKLSNAP"
+VERSION = 1
+FLAG_SECURITY = 0x1
+
+# magic, version, digest size, flags, leaf count, level count, algorithm
+_HEADER = struct.Struct("<8sHHIQI16s")
+_LEVEL = struct.Struct("<QQ")
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# Level table room reserved ahead of streamed leaves, whose count is not
+# known up front (enough for 2^64 leaves)
+MAX_LEVELS = 65
+# Digests read per chunk while streaming a level (must be even)
+CHUNK_NODES = 1 << 16
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot file is missing, truncated or malformed
+    """
+    pass
+
+
+def hash_leaf(data: bytes, algorithm: str = "sha3_256") -> bytes:
+    """Leaf digest ``H(0x00 || data)``, as pymerkle computes it"""
+    return getattr(hashlib, algorithm)(LEAF_PREFIX + data).digest()
+
+
+def hash_leaves(leaves: Iterable[bytes], algorithm: str = "sha3_256") -> List[bytes]:
+    """
+    Leaf digests of a batch of leaf data, as :func:`hash_leaf` computes them
+
+    The hash state after the leaf prefix is computed once and copied per
+    leaf, so each leaf costs one C-level copy, update and digest.
+
+    Args:
+        leaves: Leaf data in tree order
+        algorithm: hashlib algorithm name
+
+    Returns:
+        List of leaf digests
+    """
+    prefixed = hashlib.new(algorithm, LEAF_PREFIX)
+    copy = prefixed.copy
+    digests = []
+    append = digests.append
+    for data in leaves:
+        h = copy()
+        h.update(data)
+        append(h.digest())
+    return digests
+
+
+def build_levels(leaves: Sequence[bytes], algorithm: str = "sha3_256") -> List[List[bytes]]:
+    """
+    Compute every level of the tree from its leaf digests
+
+    Args:
+        leaves: Leaf digests in tree order
+        algorithm: hashlib algorithm name
+
+    Returns:
+        List of levels, leaves first and the single-root level last
+    """
+    if not leaves:
+        raise ValueError("Cannot build a tree without leaves")
+    hashfunc = getattr(hashlib, algorithm)
+    levels = [list(leaves)]
+    level = levels[0]
+    while len(level) > 1:
+        parents = [hashfunc(NODE_PREFIX + level[i] + level[i + 1]).digest()
+                   for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+        level = parents
+    return levels
+
+
+class MerkleAccumulator:
+    """
+    Streaming Merkle root over leaf digests in O(log n) memory
+
+    Keeps the roots of the perfect subtrees seen so far (at most one per
+    size) and folds them right to left, which gives the same root as
+    :func:`build_levels` and pymerkle.
+    """
+
+    def __init__(self, algorithm: str = "sha3_256"):
+        self.algorithm = algorithm
+        self._hashfunc = getattr(hashlib, algorithm)
+        self._stack: List[Tuple[int, bytes]] = []
+        self.size = 0
+
+    def append(self, leaf: bytes):
+        """Add the next leaf digest"""
+        hashfunc = self._hashfunc
+        stack = self._stack
+        height, node = 0, leaf
+        while stack and stack[-1][0] == height:
+            node = hashfunc(NODE_PREFIX + stack.pop()[1] + node).digest()
+            height += 1
+        stack.append((height, node))
+        self.size += 1
+
+    def root(self) -> bytes:
+        """Root of the leaves appended so far"""
+        if not self._stack:
+            raise ValueError("Cannot compute the root of an empty tree")
+        node = self._stack[-1][1]
+        for _, left in reversed(self._stack[:-1]):
+            node = self._hashfunc(NODE_PREFIX + left + node).digest()
+        return node
+
+
+def write_snapshot(path: Path, levels: List[List[bytes]], algorithm: str = "sha3_256") -> Path:
+    """
+    Write all tree levels to ``path``, replacing any previous snapshot atomically
+
+    Args:
+        path: Destination snapshot file
+        levels: Output of :func:`build_levels`
+        algorithm: Hash algorithm the digests were produced with
+
+    Returns:
+        The snapshot path
+    """
+    digest_size = len(levels[0][0])
+    table_size = _LEVEL.size * len(levels)
+    offset = _HEADER.size + table_size
+    table = []
+    for level in levels:
+        table.append(_LEVEL.pack(offset, len(level)))
+        offset += len(level) * digest_size
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_file(path, "wb", durable=True) as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, digest_size, FLAG_SECURITY, len(levels[0]),
+                             len(levels), algorithm.encode("ascii")))
+        f.write(b"".join(table))
+        for level in levels:
+            f.write(b"".join(level))
+    return path
+
+
+class SnapshotWriter:
+    """
+    External-memory snapshot builder
+
+    Leaf digests are written to the snapshot file as they are appended; on
+    :meth:`finish` every parent level is computed from the level below it in
+    chunks of :data:`CHUNK_NODES` digests and appended to the file. Memory use
+    is bounded by one chunk regardless of the number of leaves, and the
+    snapshot has the same levels and root as :func:`build_levels` followed
+    by :func:`write_snapshot`. The file replaces ``path`` atomically on
+    :meth:`finish`; leaving the ``with`` block without finishing discards it.
+    """
+
+    def __init__(self, path: Path, algorithm: str = "sha3_256", chunk_nodes: int = CHUNK_NODES):
+        if chunk_nodes < 2 or chunk_nodes % 2:
+            raise ValueError("chunk_nodes must be an even number of at least 2")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.algorithm = algorithm
+        self.digest_size = hashlib.new(algorithm).digest_size
+        self.chunk_nodes = chunk_nodes
+        self.size = 0
+        self._data_start = _HEADER.size + MAX_LEVELS * _LEVEL.size
+        self._output = atomic_file(self.path, "w+b", durable=True)
+        self._file = self._output.__enter__()
+        self._file.seek(self._data_start)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.abort()
+        return False
+
+    def append(self, leaf: bytes):
+        """Add the next leaf digest"""
+        if len(leaf) != self.digest_size:
+            raise ValueError(f"Expected a {self.digest_size}-byte leaf digest, got {len(leaf)} bytes")
+        self._file.write(leaf)
+        self.size += 1
+
+    def extend(self, leaves: Sequence[bytes]):
+        """Add a batch of leaf digests"""
+        data = b"".join(leaves)
+        if len(data) != len(leaves) * self.digest_size:
+            raise ValueError(f"Expected {self.digest_size}-byte leaf digests")
+        self._file.write(data)
+        self.size += len(leaves)
+
+    def finish(self) -> bytes:
+        """
+        Compute the parent levels, write the header and publish the snapshot
+
+        Returns:
+            Merkle root
+        """
+        if self._file is None:
+            raise ValueError("Snapshot writer is already closed")
+        if not self.size:
+            raise ValueError("Cannot build a tree without leaves")
+        hashfunc = getattr(hashlib, self.algorithm)
+        f = self._file
+        size = self.digest_size
+        pair = 2 * size
+        offset, count = self._data_start, self.size
+        table = [(offset, count)]
+        end = offset + count * size
+        while count > 1:
+            parent_offset = end
+            for start in range(0, count, self.chunk_nodes):
+                n = min(self.chunk_nodes, count - start)
+                f.seek(offset + start * size)
+                nodes = f.read(n * size)
+                parents = [hashfunc(NODE_PREFIX + nodes[i:i + pair]).digest()
+                           for i in range(0, (n - 1) * size, pair)]
+                if n % 2:
+                    # Only the last chunk can be odd; its unpaired node is promoted
+                    parents.append(nodes[-size:])
+                f.seek(end)
+                f.write(b"".join(parents))
+                end += len(parents) * size
+            offset, count = parent_offset, (count + 1) // 2
+            table.append((offset, count))
+
+        f.seek(offset)
+        root = f.read(size)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, size, FLAG_SECURITY, self.size, len(table),
+                             self.algorithm.encode("ascii")))
+        f.write(b"".join(_LEVEL.pack(level_offset, level_count) for level_offset, level_count in table))
+        self._file = None
+        self._output.__exit__(None, None, None)
+        return root
+
+    def abort(self):
+        """Discard the unfinished snapshot"""
+        if self._file is not None:
+            self._file = None
+            error = SnapshotError(f"Snapshot {self.path} was not finished")
+            self._output.__exit__(SnapshotError, error, None)
+
+
+def snapshot_name(generation: int) -> str:
+    """File name of the snapshot published as ``generation``"""
+    return f"tree-{generation:08d}.snapshot"
+
+
+def current_snapshot_path(roots_dir: Path = ROOTS_DIR) -> Path:
+    """
+    Path of the snapshot named by the current manifest
+
+    Raises:
+        SnapshotError: if no snapshot has been published
+    """
+    manifest = read_manifest(roots_dir)
+    if not manifest or not manifest.get("snapshot"):
+        raise SnapshotError(f"No tree snapshot published in {roots_dir}")
+    return Path(roots_dir) / manifest["snapshot"]
+
+
+class TreeSnapshot:
+    """
+    Read-only, memory-mapped view of a tree snapshot
+    """
+
+    def __init__(self, path: Path = None):
+        """
+        Map a snapshot file
+
+        Args:
+            path: Snapshot file written by :func:`write_snapshot`
+                  (default: the currently published snapshot)
+        """
+        self._mmap = None
+        self._view = None
+        self.path = Path(path) if path else current_snapshot_path()
+        try:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map snapshot {self.path}: {e}") from e
+        self._view = memoryview(self._mmap)
+
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise SnapshotError(f"Snapshot {self.path} is truncated")
+        magic, version, digest_size, flags, size, level_count, algorithm = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError(f"{self.path} is not a version {VERSION} tree snapshot")
+
+        self.digest_size = digest_size
+        self.security = bool(flags & FLAG_SECURITY)
+        self.size = size
+        self.algorithm = algorithm.rstrip(b"\0").decode("ascii")
+        self.levels: List[Tuple[int, int]] = [
+            _LEVEL.unpack_from(self._mmap, _HEADER.size + i * _LEVEL.size) for i in range(level_count)
+        ]
+        end = self.levels[-1][0] + self.levels[-1][1] * digest_size if self.levels else 0
+        if not self.levels or end > len(self._mmap) or self.levels[0][1] != size:
+            self.close()
+            raise SnapshotError(f"Snapshot {self.path} is truncated or inconsistent")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        """Release the mapping"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def node(self, level: int, index: int) -> bytes:
+        """Digest at ``index`` within ``level`` (0 = leaves)"""
+        offset, count = self.levels[level]
+        if not 0 <= index < count:
+            raise IndexError(f"Node {index} out of range for level {level} ({count} nodes)")
+        start = offset + index * self.digest_size
+        return bytes(self._view[start:start + self.digest_size])
+
+    def level_view(self, level: int) -> memoryview:
+        """Zero-copy view over a whole level's contiguous digest array"""
+        offset, count = self.levels[level]
+        return self._view[offset:offset + count * self.digest_size]
+
+    def root(self) -> bytes:
+        """Merkle root"""
+        return self.node(len(self.levels) - 1, 0)
+
+    def verify_levels(self, chunk_nodes: int = CHUNK_NODES) -> bool:
+        """
+        True if every level is the pairwise hash of the level below it
+
+        Each level is streamed from the mapping in chunks of ``chunk_nodes``
+        digests, the same way :class:`SnapshotWriter` builds it, so checking
+        a snapshot holds no more than one chunk in RAM.
+        """
+        if chunk_nodes < 2 or chunk_nodes % 2:
+            raise ValueError("chunk_nodes must be an even number of at least 2")
+        hashfunc = getattr(hashlib, self.algorithm)
+        size = self.digest_size
+        pair = 2 * size
+        for (offset, count), (parent_offset, parent_count) in zip(self.levels, self.levels[1:]):
+            if parent_count != (count + 1) // 2:
+                return False
+            for start in range(0, count, chunk_nodes):
+                n = min(chunk_nodes, count - start)
+                nodes = self._mmap[offset + start * size:offset + (start + n) * size]
+                parents = [hashfunc(NODE_PREFIX + nodes[i:i + pair]).digest()
+                           for i in range(0, (n - 1) * size, pair)]
+                if n % 2:
+                    parents.append(nodes[-size:])
+                parent_start = parent_offset + start // 2 * size
+                if b"".join(parents) != self._mmap[parent_start:parent_start + len(parents) * size]:
+                    return False
+        return self.levels[-1][1] == 1
+
+    def leaf(self, index: int) -> bytes:
+        """Leaf digest at ``index`` (counting from zero)"""
+        return self.node(0, index)
+
+    def audit_path(self, index: int) -> List[Tuple[bool, bytes]]:
+        """
+        Sibling digests from leaf ``index`` up to the root
+
+        Args:
+            index: Leaf index counting from zero
+
+        Returns:
+            List of ``(sibling_is_left, digest)`` pairs, leaf level first
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(f"Leaf {index} out of range ({self.size} leaves)")
+        path = []
+        for level, (_, count) in enumerate(self.levels[:-1]):
+            if index % 2:
+                path.append((True, self.node(level, index - 1)))
+            elif index + 1 < count:
+                path.append((False, self.node(level, index + 1)))
+            index //= 2
+        return path
+
+
+def resolve_audit_path(leaf: bytes, path: List[Tuple[bool, bytes]], algorithm: str = "sha3_256") -> bytes:
+    """Fold an audit path from a leaf digest up to the root it implies"""
+    hashfunc = getattr(hashlib, algorithm)
+    node = leaf
+    for sibling_is_left, sibling in path:
+        if sibling_is_left:
+            node = hashfunc(NODE_PREFIX + sibling + node).digest()
+        else:
+            node = hashfunc(NODE_PREFIX + node + sibling).digest()
+    return node
+
+
+def verify_audit_path(leaf: bytes, path: List[Tuple[bool, bytes]], root: bytes,
+                      algorithm: str = "sha3_256") -> bool:
+    """True if ``path`` proves ``leaf`` is included under ``root``"""
+    import hmac
+
+    return hmac.compare_digest(resolve_audit_path(leaf, path, algorithm), root)
+
+
+def path_to_json(path: List[Tuple[bool, bytes]]) -> List[dict]:
+    """Serializable form of an audit path"""
+    return [{"side": "left" if is_left else "right", "digest": digest.hex()} for is_left, digest in path]
+
+
+def path_from_json(data: List[dict]) -> List[Tuple[bool, bytes]]:
+    """Inverse of :func:`path_to_json`"""
+    return [(step["side"] == "left", bytes.fromhex(step["digest"])) for step in data]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for querying a snapshot"""
+    parser = argparse.ArgumentParser(description='Query a Merkle tree snapshot')
+    parser.add_argument('--snapshot', type=Path, help='Snapshot file (default: currently published snapshot)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('root', help='Print the Merkle root')
+    leaf_parser = sub.add_parser('leaf', help='Print a leaf digest')
+    leaf_parser.add_argument('index', type=int, help='Leaf index counting from zero')
+    proof_parser = sub.add_parser('proof', help='Print the audit path for a leaf')
+    proof_parser.add_argument('index', type=int, help='Leaf index counting from zero')
+    args = parser.parse_args(argv)
+
+    try:
+        with TreeSnapshot(args.snapshot) as snapshot:
+            if args.command == 'root':
+                result = {"root": snapshot.root().hex(), "size": snapshot.size}
+            elif args.command == 'leaf':
+                result = {"index": args.index, "leaf": snapshot.leaf(args.index).hex()}
+            else:
+                result = {
+                    "index": args.index,
+                    "size": snapshot.size,
+                    "leaf": snapshot.leaf(args.index).hex(),
+                    "root": snapshot.root().hex(),
+                    "path": path_to_json(snapshot.audit_path(args.index)),
+                }
+    except (SnapshotError, IndexError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,35 +8,56 @@ import argparse
 import json
 import logging
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
-# Import verification components
-try:
-    from pymerkle import InmemoryTree as MerkleTree
-except ImportError as e:
-    logging.error(f"Failed to import verification components: {e}")
+import disclosure
+from hash_and_build_merkle import batch_id as format_batch_id, batch_paths, canonicalize, leaf_entries
+from metrics import Registry, get_registry
+import profiling
+from publish import read_manifest
+from tree_snapshot import (MerkleAccumulator, SnapshotError, TreeSnapshot, hash_leaf, path_to_json,
+                           verify_audit_path)
 
 class LogVerifier:
     """
     Verifies the integrity of log events using Merkle proofs
     """
     
-    def __init__(self, logs_dir: str = None):
+    def __init__(self, logs_dir: str = None, registry: Registry = None):
         """
         Initialize log verifier
         
         Args:
             logs_dir: Directory containing audit logs and proofs
+            registry: Metrics registry (in-memory only if not provided)
         """
         self.logger = logging.getLogger(__name__)
         
+        # Setup metrics
+        registry = registry or get_registry("verifier", persist=False)
+        self._verifications = registry.counter(
+            "audit_verifications_total", "Verification checks performed", ("kind",))
+        self._verify_failures = registry.counter(
+            "audit_verify_failures_total", "Verification checks that failed", ("kind",))
+        self._verify_seconds = registry.histogram(
+            "audit_verify_duration_seconds", "Duration of verification checks", ("kind",))
+        
         # Setup directories
         if logs_dir:
             self.logs_dir = Path(logs_dir)
         else:
             self.logs_dir = Path(__file__).parent.parent / 'logs'
+        self.roots_dir = self.logs_dir / 'roots'
+        
+        # Snapshot of the currently published tree (remapped on new generations).
+        # The manifest is re-checked at most every ``snapshot_refresh`` seconds.
+        self.snapshot_refresh = 0.0
+        self._current: Optional[Tuple[TreeSnapshot, Dict[str, Any]]] = None
+        self._manifest_checked = 0.0
+        self._disclosure_key: Optional[bytes] = None
         
         self.logger.info("Log verifier initialized")
     
@@ -53,6 +74,20 @@ class LogVerifier:
         Returns:
             True if integrity is verified
         """
+        with self._verify_seconds.labels(kind="event").time():
+            verified = self._verify_event_integrity(event_file, proof_file, root_hash)
+        self._record("event", verified)
+        return verified
+    
+    def _record(self, kind: str, verified: bool):
+        """Count a verification outcome"""
+        self._verifications.labels(kind=kind).inc()
+        if not verified:
+            self._verify_failures.labels(kind=kind).inc()
+    
+    def _verify_event_integrity(self, event_file: str, proof_file: str, 
+                               root_hash: str = None) -> bool:
+        """Verify a single event without recording metrics"""
         try:
             # Load event and proof
             event_data = self._load_json_file(event_file)
@@ -211,63 +246,317 @@ class LogVerifier:
         event_bytes = event_str.encode('utf-8')
         return hashlib.sha256(event_bytes).hexdigest()
     
-    def verify_batch_integrity(self, batch_id: str) -> bool:
+    def verify_batch_integrity(self, batch_id: str, expected_root: str = None) -> bool:
         """
         Verify the integrity of an entire batch
         
         Args:
-            batch_id: ID of the batch to verify
+            batch_id: ID of the batch to verify (generation number or ``latest``)
+            expected_root: Root the batch must yield, e.g. the anchored on-chain root
             
         Returns:
             True if batch integrity is verified
         """
-        try:
-            # Load batch and proof
-            batch_file = self.logs_dir / f"audit_batch_{batch_id}.json"
-            proof_file = self.logs_dir / f"merkle_proof_{batch_id}.json"
-            
-            if not all(f.exists() for f in [batch_file, proof_file]):
-                self.logger.error(f"Missing batch files for {batch_id}")
-                return False
+        return self.verify_batch(batch_id, expected_root)['verified']
+    
+    def verify_batch(self, batch_id: str, expected_root: str = None) -> Dict[str, Any]:
+        """
+        Stream a batch written by the builder and recompute its root from the leaves
+        
+        Args:
+            batch_id: ID of the batch to verify (generation number or ``latest``)
+            expected_root: Root the batch must yield, e.g. the anchored on-chain root
             
-            # Load data
-            with open(batch_file, 'r') as f:
-                batch_data = json.load(f)
+        Returns:
+            Report with the recomputed root, verdict, reason and throughput
+        """
+        with self._verify_seconds.labels(kind="batch").time():
+            try:
+                report = self._verify_batch(batch_id, expected_root)
+            except Exception as e:
+                self.logger.error(f"Error verifying batch integrity: {e}")
+                report = {'batch_id': batch_id, 'verified': False, 'reason': str(e)}
+        self._record("batch", report['verified'])
+        return report
+    
+    def _verify_batch(self, batch_id: str, expected_root: Optional[str]) -> Dict[str, Any]:
+        """Verify a batch without recording metrics"""
+        if batch_id == 'latest':
+            manifest = read_manifest(self.roots_dir)
+            if not manifest or not manifest.get('batch'):
+                raise FileNotFoundError(f"No batch published in {self.roots_dir}")
+            batch_id = manifest['batch']
+        elif batch_id.isdigit():
+            batch_id = format_batch_id(int(batch_id))
+        
+        events_file, proof_file = batch_paths(self.logs_dir, batch_id)
+        if not all(f.exists() for f in [events_file, proof_file]):
+            raise FileNotFoundError(f"Missing batch files for {batch_id}")
+        with open(proof_file, 'r') as f:
+            proof_data = json.load(f)
+        algorithm = proof_data['algorithm']
+        leaf_start = proof_data['leaf_start']
+        # Lines are canonical entries; in fields mode each is re-committed per field
+        fields_mode = proof_data.get('leaf_mode', 'event') == 'fields'
+        
+        # The snapshot is the proof store; it may have been pruned since
+        try:
+            snapshot = TreeSnapshot(self.roots_dir / proof_data['snapshot'])
+        except SnapshotError:
+            snapshot = None
+        
+        start = time.perf_counter()
+        accumulator = MerkleAccumulator(algorithm)
+        mismatched = []
+        bytes_read = 0
+        try:
+            leaf_view = snapshot.level_view(0) if snapshot else None
+            digest_size = snapshot.digest_size if snapshot else 0
+            with open(events_file, 'rb') as f:
+                for index, line in enumerate(f, start=leaf_start):
+                    bytes_read += len(line)
+                    data = line.rstrip(b'\n')
+                    if fields_mode:
+                        data = self._leaf_data(json.loads(data), 'fields', data)
+                    digest = hash_leaf(data, algorithm)
+                    accumulator.append(digest)
+                    if leaf_view is not None and len(mismatched) < 100:
+                        offset = index * digest_size
+                        if leaf_view[offset:offset + digest_size] != digest:
+                            mismatched.append(index)
+            snapshot_root = snapshot.root().hex() if snapshot else None
+        finally:
+            if snapshot:
+                leaf_view = None
+                snapshot.close()
+        elapsed = time.perf_counter() - start
+        
+        root = accumulator.root().hex() if accumulator.size else None
+        report = {
+            'batch_id': batch_id,
+            'generation': proof_data['generation'],
+            'events': accumulator.size,
+            'leaf_range': [leaf_start, leaf_start + accumulator.size],
+            'root': root,
+            'recorded_root': proof_data['root'],
+            'snapshot_root': snapshot_root,
+            'expected_root': expected_root,
+            'mismatched_leaves': mismatched,
+            'seconds': round(elapsed, 3),
+            'events_per_sec': round(accumulator.size / elapsed, 1) if elapsed else None,
+            'mb_per_sec': round(bytes_read / elapsed / (1024 * 1024), 1) if elapsed else None,
+        }
+        
+        if accumulator.size != proof_data['leaves']:
+            reason = f"Batch holds {accumulator.size} events, expected {proof_data['leaves']}"
+        elif root != proof_data['root']:
+            reason = f"Recomputed root {root} does not match recorded root {proof_data['root']}"
+        elif snapshot_root is not None and snapshot_root != root:
+            reason = f"Snapshot root {snapshot_root} does not match the batch"
+        elif expected_root and expected_root != root:
+            reason = f"Root mismatch: batch={root}, expected={expected_root}"
+        else:
+            reason = None
+        report['verified'] = reason is None
+        report['reason'] = reason
+        
+        if reason:
+            self.logger.error(f"Batch {batch_id} verification failed: {reason}")
+        else:
+            self.logger.info(f"Batch {batch_id} integrity verification successful: {accumulator.size} events "
+                             f"in {elapsed:.3f}s ({report['events_per_sec']} events/sec)")
+        return report
+
+    def current_snapshot(self, refresh: bool = False) -> Tuple[TreeSnapshot, Dict[str, Any]]:
+        """
+        Memory-mapped snapshot and manifest of the currently published tree
+        
+        Args:
+            refresh: Re-check the manifest even if ``snapshot_refresh`` has not elapsed
+        
+        Returns:
+            Tuple of (snapshot, manifest)
             
-            with open(proof_file, 'r') as f:
-                proof_data = json.load(f)
+        Raises:
+            SnapshotError: if no tree has been published
+        """
+        current = self._current
+        now = time.monotonic()
+        if current is not None and not refresh and now - self._manifest_checked < self.snapshot_refresh:
+            return current
+        self._manifest_checked = now
+        manifest = read_manifest(self.roots_dir)
+        if not manifest or not manifest.get('snapshot'):
+            raise SnapshotError(f"No tree snapshot published in {self.roots_dir}")
+        if current is None or current[1]['generation'] != manifest['generation']:
+            # Swapped as one tuple; the previous mapping is left to the garbage
+            # collector so callers still holding it are not cut off mid-read
+            current = (TreeSnapshot(self.roots_dir / manifest['snapshot']), manifest)
+            self._current = current
+            self.logger.info(f"Loaded tree snapshot generation {manifest['generation']}")
+        return current
+    
+    def leaf_index(self, file_name: str, entry: int) -> int:
+        """
+        Leaf index of entry ``entry`` of log file ``file_name`` in the current tree
+        
+        Raises:
+            KeyError: if the file or entry is not part of the published tree
+        """
+        _, manifest = self.current_snapshot()
+        for included in manifest.get('files', []):
+            if included['name'] == file_name:
+                if not 0 <= entry < included['leaves']:
+                    raise KeyError(f"{file_name} has no entry {entry}")
+                return included['leaf_start'] + entry
+        raise KeyError(f"{file_name} is not part of generation {manifest['generation']}")
+    
+    def prove_inclusion(self, index: int) -> Dict[str, Any]:
+        """
+        Audit path for leaf ``index`` from the published snapshot
+        
+        Args:
+            index: Leaf index counting from zero
             
-            # Verify all events in batch
-            events = batch_data.get('events', [])
-            for event in events:
-                if not self._verify_event_in_batch(event, batch_data, proof_data):
-                    self.logger.error(f"Event verification failed: {event.get('event_hash', 'unknown')}")
-                    return False
+        Returns:
+            Proof dictionary (leaf, root, size, generation and sibling path)
+        """
+        return self._proof(*self.current_snapshot(), index)
+    
+    def _proof(self, snapshot: TreeSnapshot, manifest: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """Proof dictionary for ``index`` from one specific snapshot"""
+        return {
+            'index': index,
+            'size': snapshot.size,
+            'generation': manifest['generation'],
+            'leaf': snapshot.leaf(index).hex(),
+            'root': snapshot.root().hex(),
+            'path': path_to_json(snapshot.audit_path(index)),
+        }
+    
+    def verify_inclusion(self, index: int, event: Any = None, leaf: str = None,
+                         expected_root: str = None) -> Dict[str, Any]:
+        """
+        Verify that an event (or leaf digest) is included at ``index``
+        
+        Args:
+            index: Leaf index counting from zero
+            event: Log entry as exported; hashed the way the builder hashes it
+            leaf: Hex leaf digest, used when ``event`` is not given
+            expected_root: Root the proof must resolve to, e.g. the anchored
+                           on-chain root (default: the published root)
             
-            self.logger.info(f"Batch {batch_id} integrity verification successful")
-            return True
+        Returns:
+            Proof dictionary with ``verified`` and, on failure, ``reason``
+        """
+        with self._verify_seconds.labels(kind="inclusion").time():
+            result = self._verify_inclusion(index, event, leaf, expected_root)
+        self._record("inclusion", result['verified'])
+        return result
+    
+    def _verify_inclusion(self, index: int, event: Any, leaf: Optional[str],
+                          expected_root: Optional[str]) -> Dict[str, Any]:
+        """Verify inclusion without recording metrics"""
+        snapshot, manifest = self.current_snapshot()
+        result = self._proof(snapshot, manifest, index)
+        if event is not None:
+            claimed = hash_leaf(self._leaf_data(event, manifest.get('leaf_mode', 'event')), snapshot.algorithm)
+        elif leaf:
+            claimed = bytes.fromhex(leaf)
+        else:
+            raise ValueError("Either event or leaf is required")
+        result['claimed_leaf'] = claimed.hex()
+        
+        root = bytes.fromhex(result['root'])
+        if claimed.hex() != result['leaf']:
+            result.update(verified=False, reason='Leaf does not match the published tree')
+        elif not verify_audit_path(claimed, snapshot.audit_path(index), root, snapshot.algorithm):
+            result.update(verified=False, reason='Audit path does not resolve to the root')
+        elif expected_root and expected_root != result['root']:
+            result.update(verified=False, reason=f"Root mismatch: published={result['root']}, expected={expected_root}")
+        else:
+            result['verified'] = True
+        return result
+    
+    def _leaf_data(self, event: Any, leaf_mode: str, canonical: bytes = None) -> bytes:
+        """Leaf data of an entry, as the builder derived it in ``leaf_mode``"""
+        canonical = canonical if canonical is not None else canonicalize(event)
+        key = self.disclosure_key() if leaf_mode == 'fields' else None
+        return leaf_entries([event], [canonical], leaf_mode, key)[0]
+    
+    def disclosure_key(self) -> bytes:
+        """Secret needed to recompute field commitments (kept by the log owner)"""
+        if self._disclosure_key is None:
+            self._disclosure_key = disclosure.load_key(self.logs_dir)
+        return self._disclosure_key
+    
+    def locate(self, index: int) -> Tuple[str, int]:
+        """
+        Log file and entry number of leaf ``index`` in the current tree
+        
+        Raises:
+            IndexError: if the index is outside the published tree
+        """
+        _, manifest = self.current_snapshot()
+        for included in manifest.get('files', []):
+            if included['leaf_start'] <= index < included['leaf_start'] + included['leaves']:
+                return included['name'], index - included['leaf_start']
+        raise IndexError(f"Leaf {index} is not part of generation {manifest['generation']}")
+    
+    def disclose_fields(self, index: int, fields: List[str]) -> Dict[str, Any]:
+        """
+        Selective disclosure of some fields of the entry at leaf ``index``
+        
+        Requires a tree built with ``--leaf-mode fields`` and the disclosure key.
+        
+        Args:
+            index: Leaf index counting from zero
+            fields: Names of the top-level fields to reveal
             
-        except Exception as e:
-            self.logger.error(f"Error verifying batch integrity: {e}")
-            return False
+        Returns:
+            Disclosure with the revealed fields, their field-tree proof and
+            the entry's audit path (see disclosure.verify_disclosure)
+        """
+        snapshot, manifest = self.current_snapshot()
+        if manifest.get('leaf_mode', 'event') != 'fields':
+            raise ValueError(f"Generation {manifest['generation']} commits to whole entries; "
+                             f"rebuild with --leaf-mode fields to disclose single fields")
+        file_name, entry = self.locate(index)
+        with open(self.logs_dir / file_name, 'r', encoding='utf-8-sig') as f:
+            event = json.load(f)[entry]
+        canonical = canonicalize(event)
+        
+        result = disclosure.disclose(event, canonical, fields, self.disclosure_key(), snapshot.algorithm)
+        if hash_leaf(bytes.fromhex(result['commitment']), snapshot.algorithm) != snapshot.leaf(index):
+            raise ValueError(f"{file_name} entry {entry} has changed since generation {manifest['generation']}")
+        result.update({
+            'index': index,
+            'generation': manifest['generation'],
+            'root': snapshot.root().hex(),
+            'path': path_to_json(snapshot.audit_path(index)),
+        })
+        return result
     
-    def _verify_event_in_batch(self, event: Dict[str, Any], 
-                              batch_data: Dict[str, Any], 
-                              proof_data: Dict[str, Any]) -> bool:
-        """Verify that an event is properly included in the batch"""
-        try:
-            event_hash = event.get('event_hash', '')
-            calculated_hash = self._calculate_event_hash(event)
+    def verify_disclosure(self, disclosed: Dict[str, Any], expected_root: str = None) -> Dict[str, Any]:
+        """
+        Verify a selective disclosure up to the tree root
+        
+        The root recorded in the disclosure is never trusted on its own.
+        
+        Args:
+            disclosed: Output of :meth:`disclose_fields`
+            expected_root: Root the proof must resolve to, e.g. the anchored
+                           on-chain root (default: the published root)
             
-            if event_hash == calculated_hash:
-                return True
-            else:
-                self.logger.error(f"Event hash mismatch: {event_hash} vs {calculated_hash}")
-                return False
-                
-        except Exception as e:
-            self.logger.error(f"Error verifying event in batch: {e}")
-            return False
+        Returns:
+            Dictionary with ``verified`` and ``reason``
+        """
+        if not expected_root:
+            expected_root = self.current_snapshot()[0].root().hex()
+        with self._verify_seconds.labels(kind="disclosure").time():
+            verified, reason = disclosure.verify_disclosure(disclosed, expected_root)
+        self._record("disclosure", verified)
+        return {'verified': verified, 'reason': reason}
 
 def main():
     """Main entry point for log verification"""
@@ -275,10 +564,18 @@ def main():
     parser.add_argument('--event', help='Path to event file')
     parser.add_argument('--proof', help='Path to proof file')
     parser.add_argument('--root', help='Expected Merkle root hash')
-    parser.add_argument('--batch', help='Batch ID for batch verification')
+    parser.add_argument('--batch', help='Batch ID (generation number or "latest") for batch verification')
+    parser.add_argument('--anchored', action='store_true',
+                        help='Check against the root anchored on Solana instead of --root')
+    parser.add_argument('--index', type=int, help='Leaf index to prove against the published tree snapshot')
+    parser.add_argument('--disclose', metavar='FIELDS',
+                        help='With --index: print a disclosure of these comma separated fields')
+    parser.add_argument('--disclosure', help='Path to a disclosure file to verify')
     parser.add_argument('--logs-dir', help='Directory containing audit logs')
+    profiling.add_profile_argument(parser)
     
     args = parser.parse_args()
+    profiling.start("verify_log", args.profile, Path(args.logs_dir) / "profiles" if args.logs_dir else None)
     
     # Setup logging
     logging.basicConfig(
@@ -286,18 +583,73 @@ def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    # Initialize verifier
-    verifier = LogVerifier(logs_dir=args.logs_dir)
+    # Initialize verifier (metrics persisted to <logs>/metrics/verifier.json on exit)
+    metrics_dir = Path(args.logs_dir) / "metrics" if args.logs_dir else None
+    verifier = LogVerifier(logs_dir=args.logs_dir, registry=get_registry("verifier", metrics_dir=metrics_dir))
+    
+    expected_root = args.root
+    if args.anchored:
+        from submit_root import fetch_anchored_root
+        
+        try:
+            anchored = fetch_anchored_root()
+        except Exception as e:
+            print(f"Error: Cannot read the anchored root: {e}")
+            sys.exit(1)
+        if not anchored:
+            print("Error: No root has been anchored by this wallet")
+            sys.exit(1)
+        expected_root = anchored['root']
     
     # Perform verification
-    if args.batch:
-        # Verify entire batch
-        success = verifier.verify_batch_integrity(args.batch)
+    if args.disclose:
+        # Reveal selected fields of one entry (needs the disclosure key)
+        if args.index is None:
+            print("Error: --disclose requires --index")
+            sys.exit(1)
+        try:
+            result = verifier.disclose_fields(args.index, [f for f in args.disclose.split(',') if f])
+        except (SnapshotError, IndexError, KeyError, ValueError, OSError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        sys.exit(0)
+    elif args.disclosure:
+        # Check revealed fields up to the (expected) root
+        disclosed = verifier._load_json_file(args.disclosure)
+        if disclosed is None:
+            sys.exit(1)
+        try:
+            result = verifier.verify_disclosure(disclosed, expected_root)
+        except SnapshotError as e:
+            print(f"Error: {e}; pass the expected root with --root or --anchored")
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        success = result['verified']
+    elif args.batch:
+        # Stream the batch and recompute its root
+        report = verifier.verify_batch(args.batch, expected_root)
+        print(json.dumps(report, indent=2))
+        success = report['verified']
+    elif args.index is not None:
+        # Prove a leaf against the published snapshot (and the event file, if given)
+        try:
+            if args.event:
+                event = verifier._load_json_file(args.event)
+                result = verifier.verify_inclusion(args.index, event=event, expected_root=expected_root)
+            else:
+                proof = verifier.prove_inclusion(args.index)
+                result = verifier.verify_inclusion(args.index, leaf=proof['leaf'], expected_root=expected_root)
+        except (SnapshotError, IndexError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        success = result['verified']
     elif args.event and args.proof:
         # Verify specific event
-        success = verifier.verify_event_integrity(args.event, args.proof, args.root)
+        success = verifier.verify_event_integrity(args.event, args.proof, expected_root)
     else:
-        print("Error: Must specify either --batch or both --event and --proof")
+        print("Error: Must specify --batch, --index, --disclosure, or both --event and --proof")
         sys.exit(1)
     
     if success:
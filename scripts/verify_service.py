@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Verification Service
+Asyncio HTTP API around LogVerifier for auditors and SIEM tooling. Proofs are
+served from the memory-mapped tree snapshot, which is re-checked in the
+background when a new generation is published; the anchored on-chain root is
+cached for ``--chain-ttl`` seconds. Manifest reloads, RPC calls and proof and
+verification work (which reads snapshot pages and may fault them in from disk)
+run in the default executor so slow disks or a slow validator never stall
+other clients.
+
+Endpoints:
+    GET  /health          service status and published generation
+    GET  /root            published root and the root anchored on Solana
+    GET  /proof/<index>   audit path for a leaf
+    POST /verify          {"index" | "file"+"entry", "event" | "leaf", "anchored"}
+    POST /verify/batch    {"queries": [...]} with the same fields per query
+    POST /verify/disclosure  disclosure from verify_log.py --disclose, plus "anchored";
+                             checked against the published root unless "anchored"
+    GET  /metrics         Prometheus-style exposition of service metrics
+
+Usage:
+    python scripts/verify_service.py --port 8787
+    python scripts/verify_service.py --no-chain
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from metrics import Registry, get_registry
+import profiling
+from submit_root import IDL_PATH, RPC_URL, WALLET_PATH
+from tree_snapshot import SnapshotError
+from verify_log import LogVerifier
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_BATCH = 10000
+# Batch queries verified per executor call
+BATCH_CHUNK = 256
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    """
+    Raised by handlers to answer with an error status
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ChainRootCache:
+    """
+    Anchored on-chain root, fetched at most once per ``ttl`` seconds
+    """
+
+    def __init__(self, rpc_url: str = RPC_URL, wallet_path: Path = WALLET_PATH, idl_path: Path = IDL_PATH,
+                 ttl: float = 30.0, enabled: bool = True, registry: Registry = None):
+        self.rpc_url = rpc_url
+        self.wallet_path = wallet_path
+        self.idl_path = idl_path
+        self.ttl = ttl
+        self.enabled = enabled
+        self.registry = registry
+        self._value: Optional[Dict[str, Any]] = None
+        self._error: Optional[str] = "disabled" if not enabled else None
+        self._fetched = float("-inf")
+        self._pending: Optional[asyncio.Future] = None
+
+    def _fetch(self) -> Optional[Dict[str, Any]]:
+        from submit_root import fetch_anchored_root
+
+        return fetch_anchored_root(self.rpc_url, self.wallet_path, self.idl_path, self.registry)
+
+    async def get(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Cached anchored root
+
+        Returns:
+            Tuple of (anchored root dictionary or None, error message or None)
+        """
+        if not self.enabled or time.monotonic() - self._fetched < self.ttl:
+            return self._value, self._error
+        # Concurrent requests share a single in-flight lookup
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._refresh())
+        pending = self._pending
+        await asyncio.shield(pending)
+        return self._value, self._error
+
+    async def _refresh(self):
+        loop = asyncio.get_running_loop()
+        try:
+            self._value = await loop.run_in_executor(None, self._fetch)
+            self._error = None if self._value else "No root anchored for this wallet"
+        except Exception as e:
+            self._value = None
+            self._error = f"{type(e).__name__}: {e}"
+        finally:
+            self._fetched = time.monotonic()
+            self._pending = None
+
+
+class VerificationService:
+    """
+    Request handlers and background snapshot refresh
+    """
+
+    def __init__(self, verifier: LogVerifier, chain: ChainRootCache, registry: Registry,
+                 refresh_interval: float = 1.0):
+        """
+        Args:
+            verifier: Verifier whose snapshot cache serves proofs
+            chain: Anchored root cache
+            registry: Metrics registry for request counts and latency
+            refresh_interval: Seconds between manifest checks
+        """
+        self.verifier = verifier
+        self.chain = chain
+        self.registry = registry
+        self.refresh_interval = refresh_interval
+        # Requests never touch the manifest; only the refresh task does
+        self.verifier.snapshot_refresh = float("inf")
+        self._started = time.time()
+        self._requests = registry.counter("audit_http_requests_total", "Verification service requests",
+                                          ("route", "status"))
+        self._latency = registry.histogram("audit_http_request_seconds", "Verification service latency",
+                                           ("route",))
+        self._generation = registry.gauge("audit_service_generation", "Tree generation being served")
+
+    async def refresh_snapshot(self) -> Optional[int]:
+        """Re-check the manifest off the event loop; returns the served generation"""
+        loop = asyncio.get_running_loop()
+        try:
+            _, manifest = await loop.run_in_executor(None, lambda: self.verifier.current_snapshot(refresh=True))
+        except SnapshotError as e:
+            self.verifier.logger.warning(str(e))
+            return None
+        self._generation.set(manifest["generation"])
+        return manifest["generation"]
+
+    async def watch_snapshot(self):
+        """Background task picking up newly published generations"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh_snapshot()
+
+    def _snapshot(self):
+        try:
+            return self.verifier.current_snapshot()
+        except SnapshotError as e:
+            raise HTTPError(503, str(e))
+
+    # --- Routes ---
+
+    async def health(self, body) -> Dict[str, Any]:
+        try:
+            _, manifest = self.verifier.current_snapshot()
+        except SnapshotError:
+            manifest = None
+        return {
+            "status": "ok" if manifest else "no_snapshot",
+            "generation": manifest["generation"] if manifest else None,
+            "size": manifest["size"] if manifest else None,
+            "uptime": round(time.time() - self._started, 3),
+        }
+
+    async def root(self, body) -> Dict[str, Any]:
+        snapshot, manifest = self._snapshot()
+        anchored, error = await self.chain.get()
+        published = snapshot.root().hex()
+        return {
+            "published": {"root": published, "generation": manifest["generation"], "size": snapshot.size,
+                          "published": manifest.get("published")},
+            "anchored": anchored,
+            "anchored_error": error,
+            "matches": anchored is not None and anchored["root"] == published,
+        }
+
+    async def proof(self, index: str) -> Dict[str, Any]:
+        self._snapshot()
+        try:
+            index = int(index)
+        except ValueError:
+            raise HTTPError(400, f"Invalid leaf index: {index}")
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self.verifier.prove_inclusion, index)
+        except IndexError as e:
+            raise HTTPError(404, str(e))
+
+    async def verify(self, body) -> Dict[str, Any]:
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Expected a JSON object")
+        self._snapshot()
+        expected_root = await self._expected_root([body])
+        return await asyncio.get_running_loop().run_in_executor(None, self._verify_query, body, expected_root)
+
+    async def verify_batch(self, body) -> Dict[str, Any]:
+        queries = body.get("queries") if isinstance(body, dict) else None
+        if not isinstance(queries, list):
+            raise HTTPError(400, "Expected {\"queries\": [...]}")
+        if len(queries) > MAX_BATCH:
+            raise HTTPError(413, f"At most {MAX_BATCH} queries per batch")
+        self._snapshot()
+        expected_root = await self._expected_root(queries)
+        loop = asyncio.get_running_loop()
+        results = []
+        # In chunks, so large batches share the executor with other clients
+        for start in range(0, len(queries), BATCH_CHUNK):
+            results += await loop.run_in_executor(None, self._verify_queries,
+                                                  queries[start:start + BATCH_CHUNK], expected_root)
+        verified = sum(1 for r in results if r.get("verified"))
+        return {"results": results, "verified": verified, "failed": len(results) - verified}
+
+    async def verify_disclosure(self, body) -> Dict[str, Any]:
+        # Only checks disclosures; producing them needs the key and stays offline
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Expected a JSON object")
+        snapshot, _ = self._snapshot()
+        # Anchored root if asked for, otherwise the published one; never the disclosure's own
+        expected_root = await self._expected_root([body])
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.verifier.verify_disclosure, body, expected_root or snapshot.root().hex())
+
+    async def _expected_root(self, queries: List[Dict[str, Any]]) -> Optional[str]:
+        if not any(isinstance(q, dict) and q.get("anchored") for q in queries):
+            return None
+        anchored, error = await self.chain.get()
+        if anchored is None:
+            raise HTTPError(503, f"Anchored root unavailable: {error}")
+        return anchored["root"]
+
+    def _verify_queries(self, queries: List[Any], expected_root: Optional[str]) -> List[Dict[str, Any]]:
+        results = []
+        for query in queries:
+            try:
+                if not isinstance(query, dict):
+                    raise HTTPError(400, "Expected a JSON object")
+                results.append(self._verify_query(query, expected_root))
+            except HTTPError as e:
+                results.append({"verified": False, "error": str(e), "status": e.status})
+        return results
+
+    def _verify_query(self, query: Dict[str, Any], expected_root: Optional[str]) -> Dict[str, Any]:
+        try:
+            if "index" in query:
+                index = int(query["index"])
+            elif "file" in query:
+                index = self.verifier.leaf_index(query["file"], int(query.get("entry", 0)))
+            else:
+                raise HTTPError(400, "Query needs an index or a file and entry")
+            return self.verifier.verify_inclusion(
+                index, event=query.get("event"), leaf=query.get("leaf"),
+                expected_root=expected_root if query.get("anchored") else query.get("root"),
+            )
+        except KeyError as e:
+            raise HTTPError(404, e.args[0] if e.args else str(e))
+        except IndexError as e:
+            raise HTTPError(404, str(e))
+        except (TypeError, ValueError) as e:
+            raise HTTPError(400, str(e))
+        except FileNotFoundError as e:
+            # Field-committed trees need the disclosure key to check whole events
+            raise HTTPError(409, f"Cannot recompute field commitments: {e}")
+
+    async def metrics(self, body) -> str:
+        return self.registry.render()
+
+    async def dispatch(self, method: str, path: str, body: Any) -> Tuple[str, Any]:
+        """
+        Route a request
+
+        Returns:
+            Tuple of (route label, response payload)
+        """
+        if path.startswith("/proof/"):
+            if method != "GET":
+                raise HTTPError(405, f"{method} not allowed on /proof")
+            return "/proof", await self.proof(path[len("/proof/"):])
+        routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/root"): self.root,
+            ("POST", "/verify"): self.verify,
+            ("POST", "/verify/batch"): self.verify_batch,
+            ("POST", "/verify/disclosure"): self.verify_disclosure,
+            ("GET", "/metrics"): self.metrics,
+        }
+        handler = routes.get((method, path))
+        if handler is None:
+            if any(p == path for _, p in routes):
+                raise HTTPError(405, f"{method} not allowed on {path}")
+            raise HTTPError(404, f"No route for {path}")
+        return path, await handler(body)
+
+    # --- HTTP/1.1 plumbing ---
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line: bytes, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> bool:
+        start = time.perf_counter()
+        route = "invalid"
+        keep_alive = False
+        try:
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                raise HTTPError(400, "Malformed request line")
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                # The body cannot be framed, so the connection cannot be reused
+                keep_alive = False
+                raise HTTPError(400, f"Invalid Content-Length: {headers['content-length']}")
+            if length > MAX_BODY_BYTES:
+                keep_alive = False
+                raise HTTPError(413, f"Body exceeds {MAX_BODY_BYTES} bytes")
+            body = None
+            if length:
+                raw = await reader.readexactly(length)
+                try:
+                    body = json.loads(raw)
+                except ValueError as e:
+                    raise HTTPError(400, f"Invalid JSON body: {e}")
+
+            route, payload = await self.dispatch(method.upper(), urlsplit(target).path, body)
+            status = 200
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            self.verifier.logger.exception("Unhandled error")
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        if isinstance(payload, str):
+            content_type, data = "text/plain; version=0.0.4", payload.encode("utf-8")
+        else:
+            content_type, data = "application/json", json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+        )
+        self._requests.labels(route=route, status=str(status)).inc()
+        self._latency.labels(route=route).observe(time.perf_counter() - start)
+        return keep_alive
+
+
+async def serve(service: VerificationService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Run the service until cancelled"""
+    await service.refresh_snapshot()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    watcher = asyncio.ensure_future(service.watch_snapshot())
+    bound_host, bound_port = server.sockets[0].getsockname()[:2]
+    print(f"Serving on http://{bound_host}:{bound_port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the verification service"""
+    parser = argparse.ArgumentParser(description='Serve Merkle inclusion proofs and verdicts over HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Bind address (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on, 0 for any free port (default: {DEFAULT_PORT})')
+    parser.add_argument('--logs-dir', type=Path, help='Directory containing audit logs')
+    parser.add_argument('--refresh', type=float, default=1.0, help='Seconds between manifest checks (default: 1)')
+    parser.add_argument('--rpc-url', default=RPC_URL, help=f'Solana JSON-RPC endpoint (default: {RPC_URL})')
+    parser.add_argument('--wallet', type=Path, default=WALLET_PATH, help='Wallet whose anchored root to read')
+    parser.add_argument('--idl', type=Path, default=IDL_PATH, help='Anchor IDL of the audit program')
+    parser.add_argument('--chain-ttl', type=float, default=30.0,
+                        help='Seconds to cache the anchored root (default: 30)')
+    parser.add_argument('--no-chain', action='store_true', help='Do not look up the anchored root')
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.start("verify_service", args.profile, args.logs_dir / "profiles" if args.logs_dir else None)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Pipeline metrics (persisted to <logs>/metrics/verify_service.json on exit)
+    registry = get_registry("verify_service", metrics_dir=args.logs_dir / "metrics" if args.logs_dir else None)
+    verifier = LogVerifier(logs_dir=args.logs_dir, registry=registry)
+    chain = ChainRootCache(args.rpc_url, args.wallet, args.idl, args.chain_ttl, not args.no_chain, registry)
+    service = VerificationService(verifier, chain, registry, args.refresh)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())